@@ -1,9 +1,10 @@
 from .executor import Executor
 from .models import Stats
-from .gin import make_tool
+from .gin import make_tool, row_local
 
 __all__ = [
     "Executor",
     "Stats",
     "make_tool",
+    "row_local",
 ]
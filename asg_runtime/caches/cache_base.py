@@ -1,4 +1,6 @@
 import logging  # needed to conditionally perform costly cache lookups
+import math
+import time
 from abc import ABC, abstractmethod
 
 from ..models import (
@@ -13,12 +15,17 @@ from ..utils import get_logger
 logger = get_logger("base_cache")
 
 HEADERS_MARKER = "::headers"
+NEGATIVE_MARKER = "::negative"
 
 
 def get_headers_key(data_key: str) -> int:
     return f"{data_key}{HEADERS_MARKER}"
 
 
+def get_negative_key(data_key: str) -> str:
+    return f"{data_key}{NEGATIVE_MARKER}"
+
+
 class BaseCache(ABC):
 
     @classmethod
@@ -133,10 +140,31 @@ class BaseCache(ABC):
         if raw is None:
             return None
         logger.debug(f"async_get_headers raw={raw}, decoding")
-        headers_dict, other = self.serializer.decode(raw)
-        logger.debug(f"async_get_headers headers_dict={headers_dict}, other={other}")
+        headers_dict = self.serializer.decode(raw)
+        logger.debug(f"async_get_headers headers_dict={headers_dict}")
         return CachedHeaders(**headers_dict)
 
+    async def async_set_negative(self, key: str, failure: str, ttl: float) -> None:
+        """Remember for ttl seconds that fetching the data of the key failed, and how."""
+        logger.debug(f"async_set_negative enter for key={key}, failure={failure}, ttl={ttl}")
+        entry = {"failure": failure, "expires_at": time.time() + ttl}
+        await self._async_set(get_negative_key(key), self.serializer.encode(entry), math.ceil(ttl))
+        self.stats.negative_sets += 1
+
+    async def async_get_negative(self, key: str) -> str | None:
+        """The failure remembered for the key, None if there is none or its ttl passed."""
+        raw = await self._async_get(get_negative_key(key))
+        if not raw:
+            return None
+        entry = self.serializer.decode(raw)
+        # not all the backends expire the entries by themselves
+        if time.time() >= entry["expires_at"]:
+            await self._async_delete(get_negative_key(key))
+            return None
+        logger.debug(f"counting one negative hit for key={key}")
+        self.stats.negative_hits += 1
+        return entry["failure"]
+
     async def async_delete(self, key: str, with_headers: bool = False) -> None:
         logger.debug(f"async_delete enter for key={key}")
 
@@ -1,15 +1,20 @@
+import asyncio
 import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger  # for type checking only
 from pathlib import Path
 
 from .caches import BaseCache, async_create_cache
+from .gin import SchemaHints
 from .gin_helper import GinHelper
-from .http import OriginFetcher
+from .http import OriginFetcher, track_stale_sources
 from .models import (
     AppStats,
     CacheStats,
     Settings,
     Stats,
+    TransformStats,
 )
 from .serializers import Serializer
 from .utils import get_logger, setup_logging
@@ -22,6 +27,9 @@ class Executor:
     origin_cache: BaseCache = None
 
     origin_fetcher: OriginFetcher = None
+    schema_hints: SchemaHints = None
+    transform_pool: ThreadPoolExecutor = None
+    transform_stats: TransformStats = None
 
     response_serializer: Serializer = None
     transforms_path: Path = None
@@ -90,6 +98,25 @@ class Executor:
             cache=self.origin_cache,
         )
 
+        # ------------------ Schema hints ------------------
+        if settings.schema_hints_enabled:
+            self.logger.debug("initializing schema hints")
+            self.schema_hints = SchemaHints(path=settings.schema_hints_path)
+            self.logger.debug(f"schema hints created: {self.schema_hints.describe()}")
+        else:
+            self.logger.debug("skipping schema hints (disabled in settings)")
+            self.schema_hints = None
+
+        # ------------------ Transform pool ------------------
+        if settings.transform.parallel:
+            self.logger.debug(f"initializing transform pool of {settings.transform_workers} threads")
+            self.transform_pool = ThreadPoolExecutor(
+                max_workers=settings.transform_workers, thread_name_prefix="transform")
+        else:
+            self.logger.debug("skipping transform pool (exports are transformed sequentially)")
+            self.transform_pool = None
+        self.transform_stats = TransformStats()
+
         # TODO enable loading transforms on init
         # currently methods are loaded for every request
         self.transforms_path = settings.transforms_path
@@ -108,9 +135,16 @@ class Executor:
             rest=self.origin_fetcher.get_rest_client_stats(),
             response_cache=self.response_cache.get_stats() if self.response_cache else None,
             origin_cache=self.origin_cache.get_stats() if self.origin_cache else None,
-            responce_encoder=self.response_serializer.get_stats()
+            responce_encoder=self.response_serializer.get_stats(),
+            normalizer=self.schema_hints.get_stats() if self.schema_hints else None,
+            transform=self.transform_stats,
         )
         self.logger.info(f"ASG Runtime is shutting down, stats={stats.describe()}")
+        if self.schema_hints:
+            self.schema_hints.save()
+        if self.transform_pool:
+            self.transform_pool.shutdown(wait=True)
+        await self.origin_fetcher.aclose()
         # TODO check what needs to be cleanup
         return
     
@@ -139,6 +173,9 @@ class Executor:
                 "hits" : self.origin_cache.get_stats().hits,
                 "misses" : self.origin_cache.get_stats().misses
             }   
+        if self.schema_hints:
+            stats["normalizer"] = self.schema_hints.get_stats().describe()
+        stats["transform"] = self.transform_stats.describe()
 
         return stats
 
@@ -174,7 +211,11 @@ class Executor:
 
         try:
             self.logger.debug("creating new request handler instance for this request")
-            gin_helper = GinHelper(ep_spec_string, self.transforms_path)
+            gin_helper = GinHelper(
+                ep_spec_string,
+                self.transforms_path,
+                max_dependent_calls=self.settings.http_max_dependent_calls,
+            )
         except Exception as e:
             return self.svc_response(
                 start_time = start_time,
@@ -182,6 +223,7 @@ class Executor:
                 error = e)
 
         # Response cache check
+        response_cache_key = None
         if self.response_cache:
             try:
                 response_cache_key = gin_helper.get_key_for_spec()
@@ -197,6 +239,8 @@ class Executor:
                     error = e)
         
         self.logger.debug("no cached response, fetching the data")
+        # origin data served stale is flagged in the response
+        stale_sources = track_stale_sources()
         try:           
             origin_data = await self.get_origin_data(gin_helper, two_stage=True)
         except Exception as e:
@@ -204,9 +248,27 @@ class Executor:
                 start_time = start_time, 
                 message = f"error fetching data from origin servers: {str(e)}",
                 error = e)
+
+        if self.settings.executor_chunks_transforms and gin_helper.exports_are_row_local():
+            try:
+                self.logger.debug("data fetched, applying transforms and encoding in chunks")
+                encoded_data = await asyncio.to_thread(
+                    gin_helper.apply_transforms_chunked,
+                    origin_data, self.response_serializer, self.settings.transform, self.schema_hints)
+            except Exception as e:
+                return self.svc_response(
+                    start_time = start_time,
+                    message = f"internal error transforming the data: {str(e)}",
+                    error = e)
+            return await self.cache_and_respond(
+                start_time, response_cache_key, encoded_data, stale_sources)
+
         try:
             self.logger.debug("data fetched, applying transforms")
-            transformed_data = gin_helper.apply_transforms(origin_data)
+            # off the event loop, which keeps serving other requests while the transforms run
+            transformed_data = await asyncio.to_thread(
+                gin_helper.apply_transforms,
+                origin_data, self.schema_hints, self.transform_pool, self.transform_stats)
         except Exception as e:
             return self.svc_response(
                 start_time = start_time, 
@@ -220,8 +282,23 @@ class Executor:
                 start_time = start_time, 
                 message = f"internal error encoding the response: {str(e)}",
                 error = e)
-        
-        if self.response_cache:
+
+        return await self.cache_and_respond(
+            start_time, response_cache_key, encoded_data, stale_sources)
+
+    async def cache_and_respond(
+        self,
+        start_time: float,
+        response_cache_key: str | None,
+        encoded_data: any,
+        stale_sources: list[str] | None = None,
+    ) -> dict[str, any]:
+        if stale_sources:
+            # not kept past the revalidation of the origin data
+            self.logger.warning(f"responding with stale data of {stale_sources}, not caching")
+        elif isinstance(encoded_data, Iterator):
+            self.logger.debug("streaming the response spilled to disk, not caching")
+        elif self.response_cache:
             try:
                 self.logger.debug("caching the result")
                 if not response_cache_key:
@@ -231,13 +308,14 @@ class Executor:
                 self.logger.error(f"internal error caching the response: {str(e)}")
                 pass
 
-        return self.svc_response(start_time = start_time, data=encoded_data)
+        return self.svc_response(start_time = start_time, data=encoded_data, stale=stale_sources)
     
     def svc_response(self, 
                      start_time: float, 
                      message: str| None = None, 
                      data: any = None,
-                     error: Exception | None = None) -> dict[str, any]:
+                     error: Exception | None = None,
+                     stale: list[str] | None = None) -> dict[str, any]:
         processing_time = time.time() - start_time
         self.app_stats.processing_time += processing_time
         self.logger.debug(f"finished processing the request in {processing_time:.2f} seconds")
@@ -245,20 +323,33 @@ class Executor:
             self.logger.error("should not be here: svc_response with both the message and the data")
         if data:
             self.app_stats.requests_served += 1
-            self.app_stats.bytes_served += data.__sizeof__()
-            self.logger.debug(f"returning data of type={type(data)}, len={len(data)}")
+            if isinstance(data, Iterator):
+                self.logger.debug("returning the blocks of the data to stream")
+                data = self.count_served_bytes(data)
+            else:
+                self.app_stats.bytes_served += data.__sizeof__()
+                self.logger.debug(f"returning data of type={type(data)}, len={len(data)}")
+            if stale:
+                # the urls of the origin data served stale
+                return {"status": "ok", "data": data, "stale": stale}
             return {"status": "ok", "data": data}
         self.app_stats.requests_failed += 1
         if message:            
             self.logger.exception(f"{message}: error={error}")
             return {"status": "error", "message": message, "data": None}
+
+    def count_served_bytes(self, blocks: Iterator[bytes]) -> Iterator[bytes]:
+        for block in blocks:
+            self.app_stats.bytes_served += len(block)
+            yield block
         
-    async def get_origin_data(self, gin_helper: GinHelper, two_stage: bool | None = False) -> dict:
+    async def get_origin_data(self, gin_helper: GinHelper, two_stage: bool | None = True) -> dict:
 
         if not two_stage:
             start = time.perf_counter_ns()
-            self.logger.debug("call gin_helper to retrieve origin data")
-            origin_data = gin_helper.get_origin_data()
+            # the legacy path fetches synchronously, kept off the event loop
+            self.logger.debug("call gin_helper to retrieve origin data in a worker thread")
+            origin_data = await asyncio.to_thread(gin_helper.get_origin_data)
             self.logger.debug(
                 f"returned in {(time.perf_counter_ns() - start):.2f} seconds with {len(origin_data)} datasets"
             )
@@ -407,6 +498,8 @@ async def main(times: int | None = 2):
             return
 
         data = result.get("data")
+        if isinstance(data, Iterator):
+            data = b"".join(data)
         logger.debug(f"received data of type {type(data)} and size = {len(data)}")
 
         if data and isinstance(data, dict):
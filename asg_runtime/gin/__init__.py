@@ -7,10 +7,17 @@ from .common import (
     ConnectorSpec,
     Dataset,
     make_tool,
+    row_local,
 )
 
+from .executor.transform.schema_hints import SchemaHints
 from .executor.transform.transform_exec import (
+    ArgumentRecords,
     apply_transformations_json,
+    apply_transformations_json_chunked,
+    apply_transformations_json_parallel,
+    is_row_local,
+    normalize_json,
 )
 
 __all__ = [
@@ -23,5 +30,12 @@ __all__ = [
     "CallTypeEnum",
     "ArgLocationEnum",
     "make_tool",
+    "row_local",
     "apply_transformations_json",
+    "apply_transformations_json_chunked",
+    "apply_transformations_json_parallel",
+    "is_row_local",
+    "normalize_json",
+    "ArgumentRecords",
+    "SchemaHints",
 ]
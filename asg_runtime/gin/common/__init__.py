@@ -7,7 +7,7 @@ from .con_spec.spec_helper_models import (
     CallTypeEnum,
     Dataset,
 )
-from .tool_decorator import make_tool
+from .tool_decorator import make_tool, row_local
 
 __all__ = [
     "ConnectorSpec",
@@ -18,4 +18,5 @@ __all__ = [
     "CallTypeEnum",
     "ArgLocationEnum",
     "make_tool",
+    "row_local",
 ]
@@ -269,6 +269,46 @@ class Pagination(BaseModel):
     param_translation: PagingParamDirectory | None = Field(
         default=None, alias="paramTranslation"
     )
+    # Time-based pagination of append-only data can be synced incrementally:
+    # the query parameter through which the API returns only the records newer
+    # than a given value, and the path within a record to that value
+    # (a timestamp or a keyset value), the high-water mark of the cached data.
+    since_param: str | None = Field(default=None, alias="sinceParam")
+    watermark_path: str | None = Field(default=None, alias="watermarkPath")
+    # Path within the response data to the records, the response data itself if not provided.
+    records_path: str | None = Field(default=None, alias="recordsPath")
+    # Optional trimming of the synced data: keep the records whose watermark is within
+    # this distance of the high-water mark (seconds for ISO-8601 timestamps),
+    # and at most this many of the newest records.
+    retention_window: float | None = Field(default=None, alias="retentionWindow")
+    retention_records: int | None = Field(default=None, alias="retentionRecords")
+
+
+class Pushdown(BaseModel):
+    # Name of the query parameter through which the API accepts the list of
+    # fields to return. If provided, the fields read by the transformations are
+    # requested instead of the whole records.
+    projection_param: str | None = Field(default=None, alias="projectionParam")
+    # Separator used to join the requested fields into the projection parameter.
+    projection_separator: str = Field(default=",", alias="projectionSeparator")
+    # Dictionary containing names of filter transform functions the API can apply
+    # by itself, and values mapping the query parameters to send instead of
+    # applying the function. Both the keys and the values of the mapping are
+    # templates formatted with the transform function's params, e.g.
+    # {"filter_by_year": {"{year_col}": "{input_year}"}}
+    filters: dict[str, dict[str, str]] | None = None
+
+
+class FanOut(BaseModel):
+    # In federated deployments every server of the connector is a node holding
+    # part of the dataset: the API call is sent to all of them concurrently and
+    # the union of their responses is returned.
+    # Seconds to wait for the nodes, the nodes that did not answer by then are
+    # left out of the results. Waits for all the nodes if not provided.
+    deadline: float | None = None
+    # Fewest nodes that must answer for the partial results to be returned,
+    # the call fails otherwise.
+    min_nodes: int = Field(default=1, ge=1, alias="minNodes")
 
 
 class ApiCall(BaseModel):
@@ -277,6 +317,8 @@ class ApiCall(BaseModel):
     method: MethodEnum
     arguments: list[Argument] | None = None
     pagination: Pagination | None = None
+    pushdown: Pushdown | None = None
+    fan_out: FanOut | None = Field(default=None, alias="fanOut")
 
 
 class Call(BaseModel):
@@ -54,3 +54,13 @@ def make_tool(func):
         # Add to the global list
         tool_metadata_list.append(tool_data)
     return func
+
+
+def row_local(func):
+    """
+    Decorator to declare that a transform function works on each row independently,
+    e.g. maps, filters or expressions over the columns of the same row.
+    Row-local transforms can be applied to the data in chunks.
+    """
+    func.row_local = True
+    return func
@@ -40,10 +40,6 @@ def perform_rest_api_call(
     Returns:
         dict[str, any]): A dictionary containing the response json formatted output data
     """
-    # Assemble the URL for the REST call
-    # Supporting only using the 1st entry in the servers list
-    call_url = servers[0].removesuffix("/") + "/" + api_call.endpoint.removeprefix("/")
-
     # Loop through all pages of data
     response_list: list[requests.Response] = []
     pg = 1
@@ -51,20 +47,31 @@ def perform_rest_api_call(
     while not done:
         # Pop off path parameters from parameters so they don't get passed
         # into query string
-        logger.debug("Page: %d. Calling: %s", pg, call_url)
         logger.debug("Parameters: %s", parameter_arguments)
         logger.debug("Headers: %s", header_arguments)
         logger.debug("Data: %s", data_arguments)
 
         # Make call, and collect response
-        response = _perform_url_call(
-            api_call.method,
-            call_url,
-            parameter_arguments,
-            header_arguments,
-            data_arguments,
-            timeout,
-        )
+        if pg == 1:
+            # The rest of the pages come from the server answering the first one
+            response, call_url = _perform_servers_call(
+                api_call,
+                servers,
+                parameter_arguments,
+                header_arguments,
+                data_arguments,
+                timeout,
+            )
+        else:
+            logger.debug("Page: %d. Calling: %s", pg, call_url)
+            response = _perform_url_call(
+                api_call.method,
+                call_url,
+                parameter_arguments,
+                header_arguments,
+                data_arguments,
+                timeout,
+            )
         response_list.append(response)
 
         # Determine URL and parameters for next call
@@ -91,6 +98,54 @@ def perform_rest_api_call(
     return output
 
 
+def _perform_servers_call(
+    api_call: con_spec_models.ApiCall,
+    servers: list[str],
+    parameter_arguments: dict | None = None,
+    header_arguments: dict | None = None,
+    data_arguments: dict | None = None,
+    timeout: int | None = None,
+) -> tuple[requests.Response, str]:
+    """
+    Perform the REST call on the first of the servers answering it,
+    the servers being replicas of the origin.
+
+    Args:
+        api_call (ApiCall): Single API call to be made here.
+        servers (list[str]): Servers to try, in order.
+        parameter_arguments (dict | None, optional): Query parameters.
+        header_arguments (dict | None, optional): Header arguments.
+        data_arguments (dict | None, optional): Data for POST/PUT.
+        timeout (int | None, optional): Timeout for HTTP request.
+
+    Returns:
+        tuple[requests.Response, str]: Response from request, and the URL it was sent to.
+    """
+    for index, server in enumerate(servers):
+        call_url = server.removesuffix("/") + "/" + api_call.endpoint.removeprefix("/")
+        logger.debug("Page: 1. Calling: %s", call_url)
+        try:
+            response = _perform_url_call(
+                api_call.method,
+                call_url,
+                parameter_arguments,
+                header_arguments,
+                data_arguments,
+                timeout,
+            )
+            return response, call_url
+        except requests.exceptions.HTTPError as e:
+            # a rejected request would be rejected by the other servers too, a throttled one not
+            status = e.response.status_code if e.response is not None else None
+            if status is None or (status < 500 and status != 429) or index == len(servers) - 1:
+                raise
+            logger.warning("Call to %s failed: %s, trying the next server", call_url, e)
+        except Exception as e:
+            if index == len(servers) - 1:
+                raise
+            logger.warning("Call to %s failed: %s, trying the next server", call_url, e)
+
+
 def _perform_url_call(
     method: con_spec_models.MethodEnum,
     url: str,
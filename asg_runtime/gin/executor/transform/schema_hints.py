@@ -0,0 +1,250 @@
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import orjson
+import pandas as pd
+from pydantic import BaseModel
+
+from asg_runtime.models import NormalizerStats
+from asg_runtime.utils import get_logger
+
+logger = get_logger("schema_hints")
+
+# least seconds between two saves of the changed hints, the last changes are saved at shutdown
+SAVE_INTERVAL = 60.0
+
+
+class SchemaHint(BaseModel):
+    """
+    Column layout learned from a successful normalization of an origin dataset.
+
+    Attributes
+        layout: nested dict mirroring the record keys, leaves are None,
+            nested records (flattened by json_normalize) are nested dicts.
+        columns: flattened column name -> list of keys leading to the value.
+        dtypes: flattened column name -> pandas dtype name.
+    """
+
+    layout: dict
+    columns: dict[str, list[str]]
+    dtypes: dict[str, str]
+
+
+class SchemaHints:
+    """
+    Registry of learned origin dataset schemas, optionally persisted to a json file.
+
+    After the first successful normalization of a dataset, the layout and the dtypes
+    of the resulting dataframe are remembered under the dataset key. Later normalizations
+    of the same dataset build the columns directly, skipping key discovery and type inference,
+    and fall back to `pd.json_normalize` when any record does not match the learned layout.
+    Changed hints are saved at most every SAVE_INTERVAL seconds, and by `save` at shutdown.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path) if path else None
+        self.stats = NormalizerStats()
+        self._hints: dict[str, SchemaHint] = {}
+        self._lock = threading.Lock()
+        # hints changed since the last save, and the monotonic time of that save
+        self._dirty = False
+        self._saved_at: float | None = None
+        if self.path:
+            self.load()
+
+    # ------------------ exported methods -----------------
+
+    def get_stats(self) -> NormalizerStats:
+        return self.stats
+
+    def get(self, key: str) -> SchemaHint | None:
+        return self._hints.get(key)
+
+    def normalize(self, json_data: any, key: str | None = None) -> pd.DataFrame:
+        if key is None:
+            return pd.json_normalize(json_data)
+
+        hint = self._hints.get(key)
+        if hint:
+            df = build_with_hint(json_data, hint)
+            if df is not None:
+                self.stats.fast_normalizations += 1
+                return df
+            logger.debug(f"data does not match the schema learned for key={key}, falling back")
+            self.stats.fallbacks += 1
+
+        df = pd.json_normalize(json_data)
+        self.stats.full_normalizations += 1
+        self.learn(key, json_data, df)
+        return df
+
+    def learn(self, key: str, json_data: any, df: pd.DataFrame) -> SchemaHint | None:
+        hint = learn_hint(json_data, df)
+        if not hint:
+            logger.debug(f"could not learn a schema for key={key}, forgetting the old one")
+            with self._lock:
+                if self._hints.pop(key, None):
+                    self._dirty = True
+            return None
+        with self._lock:
+            if self._hints.get(key) == hint:
+                return hint
+            self._hints[key] = hint
+            self._dirty = True
+            self.stats.schemas_learned += 1
+        logger.debug(f"learned schema for key={key} with {len(hint.columns)} columns")
+        if self._dirty and (
+            self._saved_at is None or time.monotonic() - self._saved_at >= SAVE_INTERVAL
+        ):
+            self.save()
+        return hint
+
+    def load(self) -> None:
+        if not self.path or not self.path.is_file():
+            logger.debug(f"no persisted schema hints at {self.path}")
+            return
+        try:
+            raw = orjson.loads(self.path.read_bytes())
+            self._hints = {key: SchemaHint(**value) for key, value in raw.items()}
+            logger.debug(f"loaded {len(self._hints)} schema hints from {self.path}")
+        except Exception as e:
+            logger.warning(f"failed to load schema hints from {self.path}, ignoring: {e}")
+            self._hints = {}
+
+    def save(self) -> None:
+        """Persist the hints if they changed since the last save."""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            raw = {key: hint.model_dump() for key, hint in self._hints.items()}
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_bytes(orjson.dumps(raw))
+        except Exception as e:
+            logger.warning(f"failed to persist schema hints to {self.path}: {e}")
+
+    def describe(self) -> dict:
+        return {
+            "type": self.__class__.__name__,
+            "path": str(self.path) if self.path else None,
+            "schemas": len(self._hints),
+            "stats": self.stats.describe(),
+        }
+
+
+# ------------------ helpers ------------------
+
+def learn_hint(json_data: any, df: pd.DataFrame) -> SchemaHint | None:
+    """Learn a hint only for lists of records whose layout reproduces the normalized columns."""
+    if not isinstance(json_data, list) or not json_data or not isinstance(json_data[0], dict):
+        return None
+
+    layout = _record_layout(json_data[0])
+    paths = {".".join(keys): keys for keys in _layout_paths(layout)}
+    if paths.keys() != set(df.columns):
+        return None
+
+    return SchemaHint(
+        layout=layout,
+        # keep the column order produced by json_normalize
+        columns={name: paths[name] for name in df.columns},
+        dtypes={name: str(dtype) for name, dtype in df.dtypes.items()},
+    )
+
+
+def build_with_hint(json_data: any, hint: SchemaHint) -> pd.DataFrame | None:
+    """Build the dataframe from the known columns, returns None if the data does not match."""
+    if not isinstance(json_data, list) or not json_data:
+        return None
+
+    for record in json_data:
+        if not _matches_layout(record, hint.layout):
+            return None
+
+    columns = {}
+    for name, keys in hint.columns.items():
+        if len(keys) == 1:
+            key = keys[0]
+            values = [record[key] for record in json_data]
+        else:
+            values = [_dig(record, keys) for record in json_data]
+        column = _typed_column(values, hint.dtypes[name])
+        if column is None:
+            return None
+        columns[name] = column
+
+    return pd.DataFrame(columns, copy=False)
+
+
+def _record_layout(record: dict) -> dict:
+    return {
+        key: _record_layout(value) if isinstance(value, dict) and value else None
+        for key, value in record.items()
+    }
+
+
+def _layout_paths(layout: dict, prefix: list[str] | None = None) -> list[list[str]]:
+    paths = []
+    for key, sub_layout in layout.items():
+        path = (prefix or []) + [key]
+        if sub_layout is None:
+            paths.append(path)
+        else:
+            paths.extend(_layout_paths(sub_layout, path))
+    return paths
+
+
+def _matches_layout(record: any, layout: dict) -> bool:
+    if type(record) is not dict or record.keys() != layout.keys():
+        return False
+    for key, sub_layout in layout.items():
+        if sub_layout is not None and not _matches_layout(record[key], sub_layout):
+            return False
+    return True
+
+
+def _dig(record: dict, keys: list[str]) -> any:
+    for key in keys:
+        record = record[key]
+    return record
+
+
+def _typed_column(values: list, dtype: str) -> any:
+    """Build a column of the learned dtype, returns None if the values do not fit it."""
+    if dtype == "object":
+        if any(type(value) is dict for value in values):
+            # json_normalize would have flattened these
+            return None
+        return pd.Series(values, dtype=object)
+
+    if dtype in ("str", "string"):
+        if pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+            return None
+        return pd.array(values, dtype=dtype)
+
+    try:
+        expected = np.dtype(dtype)
+    except TypeError:
+        # extension dtypes we do not know how to build directly
+        return None
+
+    try:
+        array = np.asarray(values)
+    except ValueError:
+        return None
+    if array.ndim != 1:
+        # lists of the same length make a 2-d array, not a column
+        return None
+    if array.dtype == expected:
+        return array
+    if expected.kind == "f" and array.dtype.kind in "iO":
+        # json_normalize turns nulls in numeric columns into NaNs
+        try:
+            return np.array(values, dtype=expected)
+        except (TypeError, ValueError):
+            return None
+    return None
@@ -1,19 +1,51 @@
 import operator
+import time
+from collections.abc import Iterator
+from concurrent.futures import Executor
 
+import numpy as np
 import pandas as pd
+from pandas.core.dtypes.cast import find_common_type
 
 from asg_runtime.utils import get_logger
 
 from .load_functions import load_user_functions
+from .schema_hints import SchemaHints
 from .transform_funtions import functions
 
 logger = get_logger("transform_exec")
 
+# Transform pipelines rely on the copy-on-write of pandas 3: every field pipeline gets the same
+# normalized dataframe and transform functions return new dataframes instead of modifying it
+# (e.g. with df.assign()). The new dataframes share the unchanged columns with their input,
+# so no function needs to copy it defensively.
+
+
+class ArgumentRecords(list):
+    """
+    Records of all the calls of a dependent api, with the argument-<name> columns of the records
+    as arrays, assigned to the dataframe once the records are normalized rather than to every record.
+    Slices keep the arguments of their records.
+    """
+
+    def __init__(self, records: list = (), arguments: dict[str, np.ndarray] | None = None):
+        super().__init__(records)
+        self.arguments = arguments or {}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ArgumentRecords(
+                super().__getitem__(index),
+                {name: values[index] for name, values in self.arguments.items()})
+        return super().__getitem__(index)
+
 
 def apply_transformations_json(
     json_data :any, 
     process_data_set, 
-    user_functions_path=None
+    user_functions_path=None,
+    schema_hints: SchemaHints | None = None,
+    schema_key: str | None = None,
 ) -> list[dict]:
     """
     Create a pandas data frame from json_output and path, and apply transformations defined in process_data_set.
@@ -21,6 +53,8 @@ def apply_transformations_json(
     Args:
         json_data (json): json data to transform.
         process_data_set (ProcessDataSet): Dataset transformation specification object.
+        schema_hints (SchemaHints, optional): learned schemas used to skip type inference.
+        schema_key (str, optional): key of the origin dataset in schema_hints.
     Returns:
         (list[dict]): transformed json data
     """
@@ -28,31 +62,310 @@ def apply_transformations_json(
         f"apply_transformations_json enter process_data_set = {process_data_set}"
     )
 
-    input_df = pd.json_normalize(json_data)
+    input_df = normalize_json(json_data, schema_hints, schema_key)
     logger.debug(f"input dataframe shape={input_df.shape}")
 
+    res_df = _transform_dataframe(input_df, process_data_set, user_functions_path)
+
+    res_json = res_df.to_dict(orient='records')
+    logger.debug(f"transformed input data into {len(res_json)} transformed data items")
+    return res_json
+
+
+def apply_transformations_json_chunked(
+    json_data: any,
+    process_data_set,
+    user_functions_path=None,
+    chunk_rows: int = 10000,
+    memory_budget: int | None = None,
+    schema_hints: SchemaHints | None = None,
+    schema_key: str | None = None,
+) -> Iterator[list[dict]]:
+    """
+    Normalize and transform json records in bounded-size chunks,
+    only valid for row-local transformations (see is_row_local).
+    The columns of every chunk get the dtypes inferred for the whole data, found by
+    a first pass over the chunks, so the results match transforming the data at once.
+
+    Args:
+        json_data (json): json data to transform.
+        process_data_set (ProcessDataSet): Dataset transformation specification object.
+        chunk_rows (int): maximal number of records to normalize at once.
+        memory_budget (int, optional): bytes per request, used to shrink the chunks of wide records.
+        schema_hints (SchemaHints, optional): learned schemas used to skip type inference.
+        schema_key (str, optional): key of the origin dataset in schema_hints.
+    Yields:
+        (list[dict]): transformed json data of one chunk
+    """
+    logger.debug(
+        f"apply_transformations_json_chunked enter chunk_rows={chunk_rows}, memory_budget={memory_budget}"
+    )
+    records = json_data if isinstance(json_data, list) else [json_data]
+    # load the user functions once rather than for every chunk
+    user_functions = None
+    if user_functions_path is not None and _uses_user_functions(process_data_set):
+        user_functions = load_user_functions(user_functions_path)
+    rows = max(1, chunk_rows)
+    dtypes = None
+    if len(records) > rows:
+        dtypes = _common_dtypes(records, rows, schema_hints, schema_key)
+    start = 0
+    while start < len(records):
+        chunk = records[start:start + rows]
+        input_df = normalize_json(chunk, schema_hints, schema_key)
+        if dtypes:
+            input_df = _conform_dtypes(input_df, dtypes)
+        if memory_budget and start == 0 and len(input_df):
+            # the normalized chunk and the per-field results should fit a fraction of the budget
+            row_size = max(1, int(input_df.memory_usage(deep=True).sum()) // len(input_df))
+            rows = max(1, min(rows, memory_budget // (CHUNK_BUDGET_FACTOR * row_size)))
+            logger.debug(f"row_size={row_size}, chunk rows set to {rows}")
+        start += len(chunk)
+
+        res_df = _transform_dataframe(
+            input_df, process_data_set, user_functions_path, user_functions)
+        del input_df
+        yield res_df.to_dict(orient='records')
+
+
+def apply_transformations_json_parallel(
+    origin_data: dict,
+    process_data_sets: dict,
+    pool: Executor,
+    user_functions_path=None,
+    schema_hints: SchemaHints | None = None,
+    schema_keys: dict[str, str] | None = None,
+) -> tuple[dict[str, list[dict]], dict[str, float]]:
+    """
+    Transform several exports with their field pipelines scheduled onto a pool.
+
+    Each origin dataset is normalized once, then every (export, field) pipeline runs
+    as a separate task on a shallow copy of the shared input dataframe. The tasks never
+    wait on each other, so a bounded pool can not deadlock. Results are assembled in spec order.
+
+    Args:
+        origin_data (dict): json data of the origin datasets, by dataframe name.
+        process_data_sets (dict[str, ProcessDataSet]): export specifications, by export name.
+        pool (Executor): pool to run the normalizations and the field pipelines on.
+        schema_hints (SchemaHints, optional): learned schemas used to skip type inference.
+        schema_keys (dict[str, str], optional): keys of the origin datasets in schema_hints.
+    Returns:
+        (dict[str, list[dict]], dict[str, float]): transformed json data and wall time
+            in seconds of every export, by export name.
+    """
+    logger.debug(f"apply_transformations_json_parallel enter for {len(process_data_sets)} exports")
+    schema_keys = schema_keys or {}
+    input_dfs = {
+        path: pool.submit(normalize_json, origin_data[path], schema_hints, schema_keys.get(path))
+        for path in dict.fromkeys(pds.dataframe for pds in process_data_sets.values())
+    }
+
+    # loading user functions imports modules, keep it out of the pool
+    user_functions = None
+    if user_functions_path is not None and any(
+        _uses_user_functions(pds) for pds in process_data_sets.values()
+    ):
+        user_functions = load_user_functions(user_functions_path)
+
+    field_futures = {}
+    for export_name, pds in process_data_sets.items():
+        input_df = input_dfs[pds.dataframe].result()
+        field_futures[export_name] = {
+            # guard the shared input against functions that break the no-mutation contract,
+            # a shallow copy does not copy any data under copy-on-write
+            field_name: pool.submit(
+                _timed_apply_transformations,
+                input_df.copy(deep=False),
+                transform_funcs,
+                field_name,
+                user_functions_path,
+                user_functions,
+            )
+            for field_name, transform_funcs in pds.fields.items()
+        }
+
+    results = {}
+    export_times = {}
+    for export_name, futures in field_futures.items():
+        fields = {field_name: future.result() for field_name, future in futures.items()}
+        assembly_start = time.perf_counter()
+        res_df = _assemble_fields(
+            (field_name, series) for field_name, (series, _, _) in fields.items())
+        results[export_name] = res_df.to_dict(orient='records')
+        assembly_time = time.perf_counter() - assembly_start
+        if fields:
+            first_start = min(start for _, start, _ in fields.values())
+            last_end = max(end for _, _, end in fields.values())
+            export_times[export_name] = last_end - first_start + assembly_time
+        else:
+            export_times[export_name] = assembly_time
+        logger.debug(f"export {export_name} took {export_times[export_name]:.4f}s")
+
+    return results, export_times
+
+
+def is_row_local(process_data_set, user_functions_path=None) -> bool:
+    """
+    Check whether every transformation of the dataset works on each row independently,
+    so that transforming the data in chunks yields the same result as transforming it at once.
+
+    Args:
+        process_data_set (ProcessDataSet): Dataset transformation specification object.
+    Returns:
+        bool: True if all the transformations are row-local.
+    """
+    user_functions = None
+    for transform_funcs in process_data_set.fields.values():
+        for transform_func in transform_funcs:
+            func_name = transform_func.function
+            if func_name.startswith("pd.DataFrame"):
+                method = func_name.split(".")[-1]
+                if not _is_row_local_pandas_call(method, transform_func.params or {}):
+                    return False
+            elif func_name == "operator":
+                continue
+            elif func_name in functions:
+                if not getattr(functions[func_name], "row_local", False):
+                    return False
+            elif user_functions_path is not None:
+                if user_functions is None:
+                    user_functions = load_user_functions(user_functions_path)
+                if not getattr(user_functions.get(func_name), "row_local", False):
+                    return False
+            else:
+                return False
+    return True
+
+
+def _is_row_local_pandas_call(method: str, params: dict) -> bool:
+    if method not in ROW_LOCAL_PANDAS_METHODS:
+        return False
+    if method == "dropna":
+        # axis=1 drops the columns with a missing value in any row
+        return params.get("axis", 0) in (0, "index")
+    if method == "fillna":
+        # method fills from the previous or next rows, limit counts the filled rows
+        return "method" not in params and "limit" not in params
+    if method == "filter":
+        # axis=0 selects rows by their index, which restarts in every chunk
+        return params.get("axis") in (None, 1, "columns")
+    return True
+
+
+def _common_dtypes(
+    records: list, rows: int, schema_hints: SchemaHints | None, schema_key: str | None
+) -> dict[str, any]:
+    """
+    Dtypes of the columns, in order, as normalizing all the records at once infers them,
+    found by normalizing them rows at a time.
+    """
+    dtypes: dict[str, list] = {}
+    # columns with missing values, in some rows or in whole chunks
+    nullable = set()
+    for start in range(0, len(records), rows):
+        df = normalize_json(records[start:start + rows], schema_hints, schema_key)
+        nullable.update(dtypes.keys() - set(df.columns))
+        for name, column in df.items():
+            if name not in dtypes:
+                dtypes[name] = []
+                if start:
+                    nullable.add(name)
+            has_value = column.notna()
+            if not has_value.all():
+                nullable.add(name)
+            # all-null columns do not tell the type of the values
+            if has_value.any():
+                dtypes[name].append(column.dtype)
+
+    common = {}
+    for name, column_dtypes in dtypes.items():
+        dtype = find_common_type(column_dtypes) if column_dtypes else np.dtype(object)
+        if name in nullable and dtype.kind in "iu":
+            dtype = np.dtype("float64")
+        elif name in nullable and dtype.kind == "b":
+            dtype = np.dtype(object)
+        common[name] = dtype
+    return common
+
+
+def _conform_dtypes(df: pd.DataFrame, dtypes: dict[str, any]) -> pd.DataFrame:
+    if list(df.columns) != list(dtypes):
+        df = df.reindex(columns=list(dtypes))
+    changed = {name: dtype for name, dtype in dtypes.items() if df[name].dtype != dtype}
+    return df.astype(changed) if changed else df
+
+
+def _uses_user_functions(process_data_set) -> bool:
+    return any(
+        not transform_func.function.startswith("pd.DataFrame")
+        and transform_func.function != "operator"
+        and transform_func.function not in functions
+        for transform_funcs in process_data_set.fields.values()
+        for transform_func in transform_funcs
+    )
+
+
+def _transform_dataframe(
+    input_df, process_data_set, user_functions_path=None, user_functions=None
+) -> pd.DataFrame:
+    fields = (
+        (field_name, _apply_transformations(
+            input_df, transform_funcs, field_name, user_functions_path, user_functions))
+        for field_name, transform_funcs in process_data_set.fields.items()
+    )
+    return _assemble_fields(fields)
+
+
+def _assemble_fields(fields) -> pd.DataFrame:
     res_df = pd.DataFrame()
-    for field_name, transform_funcs in process_data_set.fields.items():
-        logger.debug(f"processing field field_name={field_name}, transform_funcs={transform_funcs}")
-        res_df[field_name] = _apply_transformations(
-            input_df, transform_funcs, field_name, user_functions_path)
+    for field_name, series in fields:
+        logger.debug(f"assembling field field_name={field_name}")
+        res_df[field_name] = series
 
     res_df = res_df.dropna()
     logger.debug(f"result dataframe shape={res_df.shape}")
+    return res_df
+
+
+def _timed_apply_transformations(*args) -> tuple[pd.Series, float, float]:
+    start = time.perf_counter()
+    series = _apply_transformations(*args)
+    return series, start, time.perf_counter()
 
-    res_json = res_df.to_dict(orient='records')
-    logger.debug(f"transformed input data into {len(res_json)} transformed data items")
-    return res_json
+
+def normalize_json(
+    json_data: any,
+    schema_hints: SchemaHints | None = None,
+    schema_key: str | None = None,
+) -> pd.DataFrame:
+    """
+    Normalize json data into a flat dataframe, using the learned schema when available.
+
+    Args:
+        json_data (json): json data to normalize.
+        schema_hints (SchemaHints, optional): learned schemas used to skip type inference.
+        schema_key (str, optional): key of the origin dataset in schema_hints.
+    Returns:
+        pd.DataFrame: normalized data.
+    """
+    if schema_hints is None or schema_key is None:
+        df = pd.json_normalize(json_data)
+    else:
+        df = schema_hints.normalize(json_data, schema_key)
+    if isinstance(json_data, ArgumentRecords):
+        df = df.assign(**json_data.arguments)
+    return df
 
 
 def _apply_transformations(
-    df, transform_functions, export_column_name, user_functions_path=None
+    df, transform_functions, export_column_name, user_functions_path=None, user_functions=None
 ) -> pd.DataFrame:
     """
     apply transformation functions on a dataframe and export the output series.
+    The functions must return new dataframes rather than modify df, which is shared.
 
     Args:
-        df (pd.DataFrame): dataframe to apply transformation on.
+        df (pd.DataFrame): dataframe to apply transformation on, left unmodified.
         transform_functions (List[TransformFunction]): transformation functions specification list.
         export_column_name (str): name of the output field in the output dataframe.
     Returns:
@@ -74,12 +387,12 @@ def _apply_transformations(
                     f"Unsupported function, pandas doesn't have function called: {func_name}"
                 )
         elif func_name == "operator":
-            operator = params.pop("operator")
+            operator = params.get("operator")
             if operator in SUPPORTED_OPERATIONS:
                 logger.debug("invoking supported operator")
-                df.loc[:, params["output"]] = SUPPORTED_OPERATIONS[operator](
+                df = df.assign(**{params["output"]: SUPPORTED_OPERATIONS[operator](
                     df[params["col1"]], df[params["col2"]]
-                )
+                )})
             else:
                 raise ValueError(f"Unsupported operator: {operator}")
         elif func_name in functions:
@@ -87,7 +400,8 @@ def _apply_transformations(
             df = functions[func_name](df, **params)
         elif user_functions_path is not None:
             logger.debug("loading user functions")
-            user_functions = load_user_functions(user_functions_path)
+            if user_functions is None:
+                user_functions = load_user_functions(user_functions_path)
             if func_name in user_functions:
                 logger.debug(f"Running {func_name} from user defined package")
                 df = user_functions[func_name](df, **params)
@@ -98,6 +412,25 @@ def _apply_transformations(
     return df[export_column_name]
 
 
+# DataFrame methods that transform each row independently of the other rows,
+# dropna, fillna and filter only with some params (see _is_row_local_pandas_call)
+ROW_LOCAL_PANDAS_METHODS = {
+    "abs",
+    "assign",
+    "astype",
+    "dropna",
+    "eval",
+    "fillna",
+    "filter",
+    "query",
+    "rename",
+    "replace",
+    "round",
+}
+
+# the normalized chunk is expected to take at most 1/CHUNK_BUDGET_FACTOR of the memory budget
+CHUNK_BUDGET_FACTOR = 4
+
 # Define supported operations for arithmetic, since they need special handling
 SUPPORTED_OPERATIONS = {
     "subtract": operator.sub,
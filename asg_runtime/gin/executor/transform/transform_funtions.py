@@ -1,17 +1,21 @@
 # Example transform Functions.
-from asg_runtime.gin.common.tool_decorator import make_tool
+# Transform functions must not modify the dataframe they receive, it is shared
+# by the pipelines of all the export fields. Return a new dataframe instead,
+# e.g. with df.assign() - under copy-on-write it shares the unchanged columns.
+from asg_runtime.gin.common.tool_decorator import make_tool, row_local
 
 
+@row_local
 def multiply_by_value(df, column, value, output):
-    df[output] = df[column] * value
-    return df
+    return df.assign(**{output: df[column] * value})
 
 
+@row_local
 def substract_columns(df, from_col, other_col, output):
-    df[output] = df[from_col] - df[other_col]
-    return df
+    return df.assign(**{output: df[from_col] - df[other_col]})
 
 
+@row_local
 @make_tool
 def map_field(df, source, target):
     """
@@ -24,10 +28,10 @@ def map_field(df, source, target):
     Returns:
         df after mapping the source to target
     """
-    df[target] = df[source]
-    return df
+    return df.assign(**{target: df[source]})
 
 
+@row_local
 @make_tool
 def concatenate_fields(df, col1, col2, output):
     """
@@ -42,8 +46,7 @@ def concatenate_fields(df, col1, col2, output):
         df with new output column of the concatenation of col1 and col2
     """
     # Convert the columns to strings and concatenate their values
-    df[output] = df[col1].astype(str) + df[col2].astype(str)
-    return df
+    return df.assign(**{output: df[col1].astype(str) + df[col2].astype(str)})
 
 
 # Dictionary of available functions
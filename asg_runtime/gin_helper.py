@@ -1,5 +1,9 @@
+import asyncio
 import hashlib
 import re
+import time
+from collections.abc import Iterator
+from concurrent.futures import Executor
 from pathlib import Path
 
 import pandas as pd
@@ -9,21 +13,32 @@ from varsubst import exceptions, varsubst
 from .gin import ArgLocationEnum as GinArgLocationEnum
 from .gin import ArgSourceEnum as GinArgSourceEnum
 from .gin import Argument as GinArgument
+from .gin import ArgumentRecords, SchemaHints
 from .gin import CallTypeEnum as GinCallTypeEnum
 
 # import GIN data models
 from .gin import ConnectorSpec as GinConnectorSpec
 from .gin import Dataset as GinDataset
 from .gin import apply_transformations_json as gin_apply_transforms
+from .gin import apply_transformations_json_chunked as gin_apply_transforms_chunked
+from .gin import apply_transformations_json_parallel as gin_apply_transforms_parallel
+from .gin import is_row_local as gin_is_row_local
+from .gin import normalize_json as gin_normalize_json
 
 # import GIN methods
 from .gin.common.util import replace_env_var
 from .http import OriginFetcher
-from .models import RestDataSource
+from .http.httpx_helper import extract_json_path
+from .models import RestDataSource, TransformSettings, TransformStats
+from .pushdown import plan_pushdown
+from .serializers import Serializer, SpooledJsonWriter
 from .utils import get_logger
 
 logger = get_logger("gin_helper")
 
+# calls made for the values of the reference arguments of an api call
+DEFAULT_MAX_DEPENDENT_CALLS = 1000
+
 
 class TempApiCall(BaseModel):
     api_call: BaseModel | None = None
@@ -38,6 +53,12 @@ class TempApiCall(BaseModel):
     # method: str = 'post'| 'get'| 'put'
     method: str
     pagination: BaseModel | None = None
+    api_name: str | None = None
+    # arguments resolved from the data of other api calls, by argument name:
+    # referenced api, dataset path, field name and argument location
+    references: dict[str, dict] | None = None
+    # collected only to resolve the references of other calls, not part of the output
+    is_output: bool = True
 
 class OriginApi(BaseModel):
     processed: bool | None = False
@@ -57,12 +78,19 @@ class GinHelper:
     transforms_path: Path
 
     origin_apis: dict[str, OriginApi]
+    # query parameters pushed down to each origin api, see _get_pushdown_params
+    pushdown_params: dict[str, dict[str, str]]
 
     # this is used to unwrap legacy recursion
     collect_only: bool = True
     collected_apis = list[TempApiCall]  # maybe we can combine it into origin_apis
 
-    def __init__(self, spec_string: str, transforms_path: Path):
+    def __init__(
+        self,
+        spec_string: str,
+        transforms_path: Path,
+        max_dependent_calls: int = DEFAULT_MAX_DEPENDENT_CALLS,
+    ):
         """
         Initialize the ConnectorRequest with the YAML specification,
         either from a file or from a string, and with a pointer to the
@@ -72,6 +100,8 @@ class GinHelper:
             spec_file (str): A string containing a path name of the connector specification file
             spec_string (str): A string containing the connector specification
             transforms_path (str): A string containing a path name of the transformations folder
+            max_dependent_calls (int): most calls made for the values of reference arguments,
+                0 does not limit
         """
         logger.debug("initializing request handler for the spec")
         self.con_spec = GinConnectorSpec.from_string(spec_string)
@@ -80,8 +110,10 @@ class GinHelper:
 
         logger.debug("TODO - just saving the transorms path, better to also load the functions")
         self.transforms_path = transforms_path
+        self.max_dependent_calls = max_dependent_calls
 
         self.origin_apis = self.init_origin_apis()
+        self.pushdown_params = {}
         self.collect_apis_to_call()
 
         self.spec_hash = hashlib.sha256(spec_string.encode("utf-8")).hexdigest()
@@ -143,41 +175,41 @@ class GinHelper:
         self, origin_sources: list[TempApiCall], origin_fetcher: OriginFetcher | None = None
     ) -> dict[str, any]:
         logger.debug(f"get_data_from_sources - enter for {len(origin_sources)} sources")
+        if origin_fetcher:
+            logger.debug("use new async-caching fetcher")
+            result = await self._fetch_sources(origin_sources, origin_fetcher)
+            logger.debug(f"collected {len(result)} datasets")
+            return result
+
+        # the legacy path fetches every call on its own, rejecting the specs it can not serve
+        # before fetching anything
+        unsupported = [
+            source.api_name for source in origin_sources
+            if source.references or (source.api_call and source.api_call.fan_out)
+        ]
+        if unsupported:
+            raise ValueError(
+                f"Badly formatted spec for fetching without the origin fetcher: {unsupported} "
+                "reference the data of other api calls or fan out, which needs the origin fetcher")
+
+        # the legacy sync path blocks while fetching, it runs in a worker thread
         result = {}
-
         for source in origin_sources:
             logger.debug(f"source={source}")
-
-            if origin_fetcher:
-                logger.debug("use new async-caching fetcher")
-                http_data_source = RestDataSource(
-                    url_template=source.url,
-                    parameter_args=source.param_args,
-                    header_args=source.header_args,
-                    timeout=source.timeout,
-                    pagination = source.pagination,
-                )
-                json_pages = await origin_fetcher.fetch_json_pages_from_source(http_data_source)
-                if not isinstance(json_pages, list):
-                    logger.error(
-                        f"origin_fetcher.fetch_json_pages_from_source returned {type(json_pages)}, expected list")                   
-                logger.debug(f"received {len(json_pages)} json pages")
-                origin_data = jason_to_datasets(source.otput_spec, json_pages)
-                logger.debug(
-                    f"transformed into origin_data of type={type(origin_data)} and len={len(origin_data)}"
-                )
-            else:
-                # use legacy sync non-caching way
-                from .gin.executor.rest_helper import perform_rest_api_call as gin_rest_api_call
-                origin_data = gin_rest_api_call(
-                    source.api_call,
-                    source.servers,
-                    source.param_args,
-                    source.header_args,
-                    source.data_args,
-                    source.otput_spec,
-                    source.timeout,
-                )
+            if not source.is_output:
+                continue
+            # use legacy sync non-caching way
+            from .gin.executor.rest_helper import perform_rest_api_call as gin_rest_api_call
+            origin_data = await asyncio.to_thread(
+                gin_rest_api_call,
+                source.api_call,
+                source.servers,
+                source.param_args,
+                source.header_args,
+                source.data_args,
+                source.otput_spec,
+                source.timeout,
+            )
             logger.debug(f"api_result: len={len(origin_data)}")
             result.update(self._accumulate_api_result(origin_data, source.prepend_values))
 
@@ -195,30 +227,209 @@ class GinHelper:
 
         return output
 
-    def apply_transforms(self, origin_data: dict) -> dict:
+    def apply_transforms(
+        self,
+        origin_data: dict,
+        schema_hints: SchemaHints | None = None,
+        pool: Executor | None = None,
+        stats: TransformStats | None = None,
+    ) -> dict:
+        """
+        Transform the origin data into the spec exports, on the pool if provided.
+        Results are in spec order either way, per-export wall times are added to stats.
+        """
         logger.debug(f"apply_transforms = enter, origin_data type={type(origin_data)}, len={len(origin_data)}")
         spec_exports = self.con_spec.spec.output.exports
         if not spec_exports or not len(spec_exports):
             logger.debug("no exports defined, returning data with no transformations")
-            return origin_data
+            return {
+                name: gin_normalize_json(data).to_dict("records")
+                if isinstance(data, ArgumentRecords) else data
+                for name, data in origin_data.items()
+            }
 
         logger.debug(f"spec defines {len(spec_exports)} output datasets")
-        result = {}
-        for export_name, process_data_set in spec_exports.items():
-            data_set_path = process_data_set.dataframe
-            logger.debug(
-                f"transforming origin data to produce dataset {export_name} from data at path={data_set_path} with {process_data_set}"
-            )
-            export_data = gin_apply_transforms(
-                json_data=origin_data[data_set_path],
-                process_data_set=process_data_set,
-                user_functions_path=self.transforms_path)
-            logger.debug(f"received export_data of len={len(export_data)}")
-            result[export_name] = export_data
-            
-        logger.debug(f"apply_transforms = exit, collected {len(result)} datasets")
+        start_time = time.perf_counter()
+        if pool is not None:
+            result, export_times = gin_apply_transforms_parallel(
+                origin_data=origin_data,
+                process_data_sets=spec_exports,
+                pool=pool,
+                user_functions_path=self.transforms_path,
+                schema_hints=schema_hints,
+                schema_keys={
+                    process_data_set.dataframe: self.get_dataset_key(process_data_set.dataframe)
+                    for process_data_set in spec_exports.values()
+                } if schema_hints else None)
+        else:
+            result = {}
+            export_times = {}
+            for export_name, process_data_set in spec_exports.items():
+                export_start = time.perf_counter()
+                data_set_path = process_data_set.dataframe
+                logger.debug(
+                    f"transforming origin data to produce dataset {export_name} from data at path={data_set_path} with {process_data_set}"
+                )
+                export_data = gin_apply_transforms(
+                    json_data=origin_data[data_set_path],
+                    process_data_set=process_data_set,
+                    user_functions_path=self.transforms_path,
+                    schema_hints=schema_hints,
+                    schema_key=self.get_dataset_key(data_set_path) if schema_hints else None)
+                logger.debug(f"received export_data of len={len(export_data)}")
+                result[export_name] = export_data
+                export_times[export_name] = time.perf_counter() - export_start
+
+        transform_time = time.perf_counter() - start_time
+        if stats is not None:
+            stats.update(export_times, transform_time, parallel=pool is not None)
+        logger.debug(
+            f"apply_transforms = exit, collected {len(result)} datasets in {transform_time:.4f}s, "
+            f"export times: {({name: round(t, 4) for name, t in export_times.items()})}"
+        )
         return result
 
+    def exports_are_row_local(self) -> bool:
+        spec_exports = self.con_spec.spec.output.exports
+        if not spec_exports:
+            return False
+        return all(
+            gin_is_row_local(process_data_set, self.transforms_path)
+            for process_data_set in spec_exports.values()
+        )
+
+    def apply_transforms_chunked(
+        self,
+        origin_data: dict,
+        serializer: Serializer,
+        settings: TransformSettings,
+        schema_hints: SchemaHints | None = None,
+    ) -> bytes | Iterator[bytes]:
+        """
+        Transform the origin data in bounded-size chunks and encode the results incrementally,
+        only valid when exports_are_row_local() holds.
+        Returns the encoded exports, same as encoding the result of apply_transforms,
+        or the blocks to stream them in when they exceeded the memory budget and were spilled.
+        """
+        spec_exports = self.con_spec.spec.output.exports
+        logger.debug(f"apply_transforms_chunked = enter for {len(spec_exports)} output datasets")
+
+        writer = SpooledJsonWriter(
+            serializer=serializer,
+            max_size=settings.memory_budget,
+            spill_dir=settings.transform_spill_dir,
+        )
+        try:
+            for export_name, process_data_set in spec_exports.items():
+                data_set_path = process_data_set.dataframe
+                writer.begin_dataset(export_name)
+                chunks = gin_apply_transforms_chunked(
+                    json_data=origin_data[data_set_path],
+                    process_data_set=process_data_set,
+                    user_functions_path=self.transforms_path,
+                    chunk_rows=settings.transform_chunk_rows,
+                    memory_budget=settings.memory_budget,
+                    schema_hints=schema_hints,
+                    schema_key=self.get_dataset_key(data_set_path) if schema_hints else None)
+                for records in chunks:
+                    writer.write_records(records)
+                writer.end_dataset()
+        except BaseException:
+            writer.close()
+            raise
+        if writer.spilled:
+            logger.info(f"transformed data exceeded the memory budget of {settings.memory_budget} bytes, streaming it from disk")
+            return writer.iter_blocks()
+        with writer:
+            encoded = writer.getvalue()
+
+        logger.debug(f"apply_transforms_chunked = exit, encoded {len(encoded)} bytes")
+        return encoded
+
+    def get_dataset_key(self, data_set_path: str) -> str:
+        """
+        Identify the origin dataset behind an export's dataframe,
+        used to remember dataset properties (e.g. schema) across requests.
+        The data source of the call is keyed as in the origin cache, by its arguments
+        (including pushed down projections and filters), whichever replica serves it.
+        """
+        datasets = self.con_spec.spec.output.data or {}
+        dataset = datasets.get(data_set_path)
+        if dataset is None and data_set_path in (".", ""):
+            # root datasets are keyed by their path rather than by their name
+            dataset = next((d for d in datasets.values() if d.path in (".", "")), None)
+        source = next(
+            (source for source in self.collected_apis if source.api_name == dataset.api), None
+        ) if dataset is not None else None
+        if source is None:
+            return f"{self.spec_hash}#{data_set_path}"
+        return f"{_get_data_source(source).hash_contents()}#{dataset.path}"
+
+    def _get_pushdown_params(self, api_name: str) -> dict[str, str]:
+        """
+        Plan the pushdown for the api once, removing the pushed down transforms
+        from the export pipelines, and return the query parameters to add to its calls.
+        """
+        if api_name in self.pushdown_params:
+            return self.pushdown_params[api_name]
+
+        self.pushdown_params[api_name] = {}
+        api_call = self.con_spec.spec.apicalls[api_name]
+        if not api_call.pushdown:
+            return {}
+        if self._is_referenced(api_name):
+            logger.debug(f"{api_name} feeds other api calls, its data can not be reduced")
+            return {}
+        pipelines = self._get_export_pipelines(api_name)
+        if not pipelines:
+            logger.debug(f"no exports consume the data of {api_name}, nothing to push down")
+            return {}
+
+        reserved = {
+            arg.name
+            for arg in api_call.arguments or []
+            if arg.argLocation == GinArgLocationEnum.PARAMETER
+        }
+        plan = plan_pushdown(api_call.pushdown, pipelines, reserved)
+        for _, pipeline in pipelines:
+            del pipeline[: plan.filters]
+        logger.info(f"pushing down to {api_name}: {plan.describe()}")
+
+        self.pushdown_params[api_name] = plan.query_params
+        return plan.query_params
+
+    def _is_referenced(self, api_name: str) -> bool:
+        for api_call in self.con_spec.spec.apicalls.values():
+            for arg in api_call.arguments or []:
+                if (
+                    arg.source == GinArgSourceEnum.REFERENCE
+                    and isinstance(arg.value, dict)
+                    and arg.value.get("api") == api_name
+                ):
+                    return True
+        return False
+
+    def _get_export_pipelines(self, api_name: str) -> list[tuple[str, list]]:
+        """Collect the fields and transform pipelines of the exports made from the api's datasets."""
+        spec_exports = self.con_spec.spec.output.exports
+        datasets = self.con_spec.spec.output.data
+        if not spec_exports or not datasets:
+            return []
+        # root datasets are keyed by their path rather than by their name
+        dataset_keys = {
+            dataset.path if dataset.path in (".", "") else dataset_name
+            for dataset_name, dataset in datasets.items()
+            if dataset.api == api_name
+        }
+        return [
+            (field_name, pipeline)
+            for process_data_set in spec_exports.values()
+            if process_data_set.dataframe in dataset_keys
+            for field_name, pipeline in process_data_set.fields.items()
+            # added from the dependency values after fetching
+            if not field_name.startswith("argument-")
+        ]
+
     # --------------------------------------------------
     # boundary methods from the old code,
     # methods from the ConnectorRequest and http-helper
@@ -323,6 +534,7 @@ class GinHelper:
         api_name: str,
         output_spec: dict[str, GinDataset] = None,
         timeout: int | None = None,
+        is_output: bool = True,
     ) -> dict[str, any]:
         """
         Execute an API call and returns the request output
@@ -333,6 +545,7 @@ class GinHelper:
             api_name (str): Name of the API to call.
             output_spec (dict[str, Dataset]): Dictionary of output specification.
             timeout (int | None, optional): Timeout for API call.
+            is_output (bool, optional): False when called only to resolve other calls' references.
 
         Returns:
             dict[str, any]): The output data structure for this API.
@@ -343,6 +556,12 @@ class GinHelper:
         pre_reqs = self._compute_api_prepeqs(api_call.arguments)
         logger.debug(f"api has {len(pre_reqs)} pre_reqs:{pre_reqs}")
 
+        if self.collect_only:
+            # the references are resolved once the data of the referenced apis is fetched
+            references = self._collect_prereqs(pre_reqs, timeout)
+            return self._route_to_api_call_type(
+                api_name, {}, output_spec, timeout, references=references, is_output=is_output)
+
         # Are there any pre-req apis to call?
         reference_resolution = {}
         for dep_api, dep_api_entries in pre_reqs.items():
@@ -374,6 +593,8 @@ class GinHelper:
         reference_resolution: dict[str, dict[str, any]],
         output_data: dict[str, GinDataset] = None,
         timeout: int | None = None,
+        references: dict[str, dict] | None = None,
+        is_output: bool = True,
     ) -> dict[str, any]:
         """
         Execute an API call and returns the request output
@@ -385,11 +606,15 @@ class GinHelper:
             reference_resolution: dict[str, dict[str, any]]: Dictionary of arguments for iteration
             output_data (dict[str, Dataset]): Dictionary of output specification.
             timeout (int | None, optional): Timeout for API call.
+            references (dict[str, dict], optional): reference arguments left to resolve
+                after fetching, collect only.
+            is_output (bool, optional): False when collected only to resolve other calls' references.
 
         Returns:
             dict[str, any]): The output data structure for this API.
         """
         api_call = self.con_spec.spec.apicalls[api_name]
+        pushdown_params = self._get_pushdown_params(api_name)
 
         # Accumulate the results of multiple queries into a single dataframe
         accumulated_result = {}
@@ -409,6 +634,9 @@ class GinHelper:
                 if api_call.arguments is not None:
                     # Look for argument that depends on a pre-req API call
                     for arg in api_call.arguments:
+                        if references and arg.name in references:
+                            references[arg.name]["location"] = arg.argLocation
+                            continue
                         value = arg.value
                         # Replace environment variables with their actual values
                         if arg.type == "string" and "$" in value:
@@ -428,12 +656,15 @@ class GinHelper:
                             if not isinstance(reference_values, pd.core.series.Series):
                                 reference_values = [reference_values]
                             value = reference_values[index_to_reference]
-                            # Signal to stop when we reach the last reference, or up to 20 iteration
-                            # Stopping at 20 itertaion is a temporaruy setting due to performance issues.
-                            if (
-                                index_to_reference == len(reference_values) - 1
-                                or index_to_reference > 20
-                            ):
+                            # Signal to stop when we reach the last reference, or the calls limit
+                            last_index = len(reference_values) - 1
+                            if self.max_dependent_calls:
+                                last_index = min(last_index, self.max_dependent_calls - 1)
+                            if index_to_reference >= last_index:
+                                if last_index < len(reference_values) - 1:
+                                    logger.warning(
+                                        f"{api_name} called for the first {last_index + 1} "
+                                        f"of {len(reference_values)} values of {arg.name}")
                                 stop_iterations = True
                             else:
                                 reference_resolution[api_name][arg.name]["index"] = (
@@ -446,6 +677,7 @@ class GinHelper:
                             data_arguments[arg.name] = value
                         elif arg.argLocation == GinArgLocationEnum.PARAMETER:
                             parameter_arguments[arg.name] = value
+                parameter_arguments.update(pushdown_params)
 
                 servers = []
                 for server in self.con_spec.servers:
@@ -469,6 +701,9 @@ class GinHelper:
                         url=call_url,
                         method=api_call.method.value,
                         pagination=api_call.pagination,
+                        api_name=api_name,
+                        references=references or None,
+                        is_output=is_output,
                     )
                     self.collected_apis.append(rest_api_call)
                 else:
@@ -491,6 +726,128 @@ class GinHelper:
 
         return accumulated_result
 
+    def _collect_prereqs(
+        self, pre_reqs: dict[str, list[dict]], timeout: int | None = None
+    ) -> dict[str, dict]:
+        """
+        Collect the calls of the referenced apis, once each, and return the references
+        of the dependent call's arguments, to be resolved after fetching.
+        """
+        references = {}
+        for dep_api, dep_api_entries in pre_reqs.items():
+            if not any(call.api_name == dep_api for call in self.collected_apis):
+                logger.debug(f"collecting {dep_api} to resolve references to its data")
+                dep_api_output_spec = {
+                    entry["path"]: GinDataset(api=dep_api, path=entry["path"])
+                    for entry in dep_api_entries
+                }
+                self.perform_api_call(dep_api, dep_api_output_spec, timeout, is_output=False)
+            for entry in dep_api_entries:
+                references[entry["name"]] = {
+                    "api": dep_api,
+                    "path": entry["path"],
+                    "field_name": entry["field_name"],
+                }
+        return references
+
+    async def _fetch_sources(
+        self, origin_sources: list[TempApiCall], origin_fetcher: OriginFetcher
+    ) -> dict[str, any]:
+        """
+        Fetch the sources in stages, each one once the apis it references are fetched.
+        A source with references is expanded into a call per value of the referenced fields,
+        and all the calls of a stage are fetched concurrently.
+        """
+        result = {}
+        pages_by_api: dict[str, list] = {}
+        pending = list(origin_sources)
+        while pending:
+            ready = [
+                source for source in pending
+                if all(ref["api"] in pages_by_api for ref in (source.references or {}).values())
+            ]
+            if not ready:
+                raise ValueError(
+                    f"can not resolve the references of {[source.api_name for source in pending]}")
+            pending = [source for source in pending if all(source is not r for r in ready)]
+
+            calls = [(source, self._expand_references(source, pages_by_api)) for source in ready]
+            data_sources = [data_source for _, expansions in calls for data_source, _ in expansions]
+            logger.debug(f"fetching {len(data_sources)} data sources for {len(ready)} api calls")
+            fetched = iter(await origin_fetcher.fetch_json_pages_from_sources(data_sources))
+
+            for source, expansions in calls:
+                json_pages_list = [next(fetched) or [] for _ in expansions]
+                logger.debug(
+                    f"received {sum(map(len, json_pages_list))} json pages for {source.api_name}")
+                # an api collected both as output and as a reference is fetched once
+                pages_by_api.setdefault(
+                    source.api_name,
+                    [page for json_pages in json_pages_list for page in json_pages])
+                if not source.is_output:
+                    continue
+                if not source.references:
+                    origin_data = jason_to_datasets(source.otput_spec, json_pages_list[0])
+                    result.update(self._accumulate_api_result(origin_data, source.prepend_values))
+                else:
+                    result.update(_accumulate_dependent_results(
+                        source.otput_spec,
+                        json_pages_list,
+                        [prepend_values for _, prepend_values in expansions]))
+
+        return result
+
+    def _expand_references(
+        self, source: TempApiCall, pages_by_api: dict[str, list]
+    ) -> list[tuple[RestDataSource, dict]]:
+        """
+        The data sources to fetch for the source, with the values of their reference arguments,
+        one per value of the referenced fields when the source has references.
+        """
+        if source.method.upper() not in ("GET", "POST"):
+            raise NotImplementedError(f"{source.method} method is not supported")
+        data_source = _get_data_source(source)
+        if not source.references:
+            return [(data_source, {})]
+
+        values = {
+            name: _get_reference_values(pages_by_api[ref["api"]], ref["path"], ref["field_name"])
+            for name, ref in source.references.items()
+        }
+        num_calls = min(len(arg_values) for arg_values in values.values())
+        if self.max_dependent_calls and num_calls > self.max_dependent_calls:
+            logger.warning(
+                f"{source.api_name} has {num_calls} reference values, "
+                f"calling it for the first {self.max_dependent_calls}")
+            num_calls = self.max_dependent_calls
+        logger.debug(f"expanding {source.api_name} into {num_calls} calls")
+
+        expansions = []
+        for index in range(num_calls):
+            prepend_values = {name: arg_values[index] for name, arg_values in values.items()}
+            parameter_args = dict(source.param_args or {})
+            header_args = dict(source.header_args or {})
+            data_args = dict(source.data_args or {})
+            for name, value in prepend_values.items():
+                location = source.references[name].get("location")
+                if location == GinArgLocationEnum.HEADER:
+                    header_args[name] = str(value)
+                elif location == GinArgLocationEnum.PARAMETER:
+                    parameter_args[name] = value
+                elif location == GinArgLocationEnum.DATA:
+                    data_args[name] = value
+                else:
+                    raise NotImplementedError(f"reference argument {name} in {location}")
+            expansions.append((
+                data_source.model_copy(update={
+                    "parameter_args": parameter_args,
+                    "header_args": header_args,
+                    "data_args": data_args or None,
+                }),
+                prepend_values,
+            ))
+        return expansions
+
     # extracted for code compactness
     # does not need to belong to a class
     def _accumulate_api_result(self, api_result, prepend_values):
@@ -524,20 +881,92 @@ def jason_to_datasets(
     for resp_json in json_list:
         for out_dataset, dataset_ref in output_spec.items():
             if dataset_ref.path in (".", ""):
-                if dataset_ref.path in output:
-                    if isinstance(output[dataset_ref.path], list):
-                        output[dataset_ref.path].append(resp_json)
-                    elif isinstance(output[dataset_ref.path], dict):
-                        output[dataset_ref.path].update(resp_json)
-                else:
-                    output[dataset_ref.path] = resp_json
+                _merge_page(output, dataset_ref.path, resp_json)
             else:
-                if out_dataset in output:
-                    if isinstance(output[out_dataset], list):
-                        output[out_dataset].append(resp_json[dataset_ref.path])
-                    elif isinstance(output[out_dataset], dict):
-                        output[out_dataset].update(resp_json[dataset_ref.path])
-                else:
-                    output[out_dataset] = resp_json[dataset_ref.path]
+                _merge_page(output, out_dataset, resp_json[dataset_ref.path])
 
     return output
+
+
+def _get_data_source(source: TempApiCall) -> RestDataSource:
+    # replicas of the origin share the cached data, whichever of them it came from,
+    # the nodes of a federation are all fetched
+    fan_out = source.api_call.fan_out if source.api_call and source.servers else None
+    replicated = bool(fan_out) or (source.servers and len(source.servers) > 1)
+    return RestDataSource(
+        url_template=source.api_call.endpoint if replicated else source.url,
+        parameter_args=source.param_args,
+        header_args=source.header_args,
+        timeout=source.timeout,
+        pagination = source.pagination,
+        stream_paths = [
+            dataset.path for dataset in source.otput_spec.values()
+        ] if source.otput_spec else None,
+        servers=source.servers if replicated else None,
+        fan_out=fan_out,
+        method=source.method.upper(),
+        data_args=source.data_args or None,
+    )
+
+
+def _get_reference_values(json_pages: list[any], path: str, field_name: str | None) -> list:
+    """Values of the field in the records at the path of the pages, in order."""
+    values = []
+    for page in json_pages:
+        data = page if path in (".", "") else page.get(path) if isinstance(page, dict) else None
+        if data is None:
+            continue
+        for record in data if isinstance(data, list) else [data]:
+            values.append(extract_json_path(record, field_name) if field_name else record)
+    return values
+
+
+def _accumulate_dependent_results(
+    output_spec: dict[str, GinDataset],
+    json_pages_list: list[list[any]],
+    prepend_values_list: list[dict],
+) -> dict[str, ArgumentRecords]:
+    """
+    Gather the datasets of all the calls of a dependent api into one list of records each,
+    with an argument-<name> column holding the reference value of the call behind every record.
+    The records are normalized with the other datasets, using the learned schema if any,
+    and the argument columns are assigned to the normalized dataframe.
+    """
+    dataset_keys = [
+        dataset.path if dataset.path in (".", "") else dataset_name
+        for dataset_name, dataset in output_spec.items()
+    ] if output_spec else ["data"]
+    records = {key: [] for key in dataset_keys}
+    counts = {key: [] for key in dataset_keys}
+    for json_pages in json_pages_list:
+        datasets = jason_to_datasets(output_spec, json_pages)
+        for key in dataset_keys:
+            data = datasets.get(key, [])
+            call_records = data if isinstance(data, list) else [data]
+            records[key].extend(call_records)
+            counts[key].append(len(call_records))
+
+    arg_names = prepend_values_list[0].keys() if prepend_values_list else []
+    return {
+        key: ArgumentRecords(records[key], {
+            f"argument-{name}": pd.Series(
+                [prepend_values[name] for prepend_values in prepend_values_list]
+            ).repeat(counts[key]).to_numpy()
+            for name in arg_names
+        })
+        for key in dataset_keys
+    }
+
+
+def _merge_page(output: dict, key: str, page_data: any):
+    if key not in output:
+        # copy lists, the first page may be cached and records of the following pages are added
+        output[key] = list(page_data) if isinstance(page_data, list) else page_data
+    elif isinstance(output[key], list):
+        # records of the following pages continue the list of the first one
+        if isinstance(page_data, list):
+            output[key].extend(page_data)
+        else:
+            output[key].append(page_data)
+    elif isinstance(output[key], dict):
+        output[key].update(page_data)
@@ -1,5 +1,6 @@
-from .origin_fetcher import OriginFetcher
+from .origin_fetcher import OriginFetcher, track_stale_sources
 
 __all__ = [
     "OriginFetcher",
+    "track_stale_sources",
 ]
@@ -0,0 +1,67 @@
+import time
+from enum import StrEnum
+
+from ..utils import get_logger
+
+logger = get_logger("circuit_breaker")
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one origin host.
+
+    Closed: fetches go through, failure_threshold consecutive failed fetches open the circuit.
+    Open: fetches are rejected until reset_timeout seconds have passed, then the circuit is half-open.
+    Half-open: a single probe fetch goes through, its success closes the circuit,
+    its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def allow_request(self) -> bool:
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            logger.debug("reset timeout passed, half-opening the circuit")
+            self.state = CircuitState.HALF_OPEN
+            self.probing = False
+        if self.state == CircuitState.HALF_OPEN:
+            if self.probing:
+                return False
+            self.probing = True
+        return True
+
+    def record_success(self) -> None:
+        if self.state != CircuitState.CLOSED:
+            logger.info("probe succeeded, closing the circuit")
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.probing = False
+
+    def release(self) -> None:
+        """Give up the probe without a verdict, e.g. when the fetch was cancelled."""
+        self.probing = False
+
+    def record_failure(self) -> bool:
+        """Count a failed fetch, returns True when it opens the circuit."""
+        self.failures += 1
+        self.probing = False
+        if self.state == CircuitState.OPEN:
+            return False
+        if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+            return True
+        return False
@@ -0,0 +1,136 @@
+import importlib.util
+
+import httpx
+
+from ..models import HttpSettings, RestClientStats
+from ..utils import get_logger
+from .hedging import HedgingTransport
+from .rate_limiter import RateLimitingTransport
+
+logger = get_logger("client_pool")
+
+# httpcore trace event emitted when a new connection to the origin is established
+CONNECT_COMPLETE_EVENT = "connection.connect_tcp.complete"
+# emitted by http11 and http2 connections when they start sending a request
+SEND_HEADERS_EVENT = "send_request_headers.started"
+# content codings httpx decodes, by the package it needs if any
+CONTENT_CODINGS = {"zstd": "zstandard", "br": "brotli", "gzip": None, "deflate": None}
+
+
+class PoolTrackingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper collecting the connection pool statistics of a client:
+    requests sent, connections opened, and the peaks of requests in flight
+    (including the ones waiting for a connection) and of requests in use of a connection.
+    A request is done when its response body is closed.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, stats: RestClientStats):
+        self._transport = transport
+        self.stats = stats
+        self.in_flight = 0
+        self.in_use = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        tracker = _RequestTracker(self)
+        request.extensions["trace"] = tracker.chain(request.extensions.get("trace"))
+        self.stats.pooled_requests += 1
+        self.in_flight += 1
+        self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.in_flight)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            tracker.done()
+            raise
+        response.stream = _TrackedStream(response.stream, tracker.done)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class _RequestTracker:
+    def __init__(self, transport: PoolTrackingTransport):
+        self.transport = transport
+        self.using_connection = False
+        self.finished = False
+
+    def chain(self, trace):
+        async def track(event_name: str, info: dict):
+            if event_name == CONNECT_COMPLETE_EVENT:
+                self.transport.stats.connections_opened += 1
+            elif event_name.endswith(SEND_HEADERS_EVENT) and not self.using_connection:
+                # the request got a connection from the pool
+                self.using_connection = True
+                self.transport.in_use += 1
+                self.transport.stats.peak_in_use = max(
+                    self.transport.stats.peak_in_use, self.transport.in_use)
+            if trace is not None:
+                await trace(event_name, info)
+
+        return track
+
+    def done(self) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        self.transport.in_flight -= 1
+        if self.using_connection:
+            self.transport.in_use -= 1
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._on_close()
+
+
+def get_accept_encoding(settings: HttpSettings) -> str:
+    """Accept-Encoding of the origin requests, the codings whose decoder is installed."""
+    if not settings.http_compression:
+        return "identity"
+    codings = [
+        coding for coding, package in CONTENT_CODINGS.items()
+        if package is None or importlib.util.find_spec(package) is not None
+        # brotlicffi is an alternative to brotli
+        or (coding == "br" and importlib.util.find_spec("brotlicffi") is not None)
+    ]
+    return ", ".join(codings)
+
+
+def create_pooled_client(settings: HttpSettings, stats: RestClientStats) -> httpx.AsyncClient:
+    """Create the long-lived client shared by all origin fetches."""
+    if settings.http2 and importlib.util.find_spec("h2") is None:
+        raise ImportError("The 'h2' package is required for http2, install the http2 extra.")
+
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=settings.http2)
+    stats.set_pool_size(settings.http_max_connections)
+    logger.debug(f"creating pooled client with limits={limits}, http2={settings.http2}")
+    # limits and http2 are applied by the wrapped transport,
+    # throttled requests wait outside of the pool, hedges are throttled too
+    transport = PoolTrackingTransport(transport, stats)
+    transport = RateLimitingTransport(transport, settings, stats)
+    transport = HedgingTransport(transport, settings, stats)
+    # the bodies are decoded by the client as they are read
+    accept_encoding = get_accept_encoding(settings)
+    logger.debug(f"accepting content encodings {accept_encoding}")
+    return httpx.AsyncClient(
+        timeout=settings.http_timeout,
+        transport=transport,
+        headers={"Accept-Encoding": accept_encoding},
+    )
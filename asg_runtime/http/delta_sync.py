@@ -0,0 +1,136 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from ..utils import get_logger
+from .httpx_helper import PaginationTypeEnum, extract_json_path
+
+logger = get_logger("delta_sync")
+
+ROOT_PATHS = (None, ".", "")
+
+
+def is_delta_sync(pagination: BaseModel | None) -> bool:
+    """Whether the source is time-based and tells how to fetch only its newer records."""
+    if not pagination or not getattr(pagination, "since_param", None):
+        return False
+    pagination_type = str(getattr(pagination.type, "value", pagination.type)).upper()
+    return pagination_type == PaginationTypeEnum.TIME.value and bool(pagination.watermark_path)
+
+
+def get_page_records(page: any, records_path: str | None) -> list:
+    records = page if records_path in ROOT_PATHS else extract_json_path(page, records_path)
+    return records if isinstance(records, list) else []
+
+
+def with_page_records(page: any, records_path: str | None, records: list) -> any:
+    """Copy of the page with the records at the path replaced."""
+    if records_path in ROOT_PATHS:
+        return records
+    key, _, rest = records_path.partition(".")
+    return {**page, key: with_page_records(page.get(key), rest or None, records)}
+
+
+def get_watermark(pages: list[any], pagination: BaseModel, watermark: any = None) -> any:
+    """Highest watermark of the records of the pages, starting from the given one."""
+    for page in pages:
+        for record in get_page_records(page, pagination.records_path):
+            value = extract_json_path(record, pagination.watermark_path)
+            if value is not None and (watermark is None or value > watermark):
+                watermark = value
+    return watermark
+
+
+def merge_delta(
+    cached_pages: list[any], delta_pages: list[any], pagination: BaseModel, watermark: any
+) -> tuple[list[any], int]:
+    """
+    Append the records of the delta pages newer than the cached ones to the cached pages,
+    as pages of their own. Records at the watermark are kept unless already cached,
+    for origins returning the records at or after the since value.
+    Returns the merged pages and the number of records added.
+    """
+    at_watermark = [
+        record
+        for page in cached_pages
+        for record in get_page_records(page, pagination.records_path)
+        if extract_json_path(record, pagination.watermark_path) == watermark
+    ]
+    merged = list(cached_pages)
+    added = 0
+    for page in delta_pages:
+        records = [
+            record
+            for record in get_page_records(page, pagination.records_path)
+            if _is_newer(extract_json_path(record, pagination.watermark_path), watermark)
+            or (extract_json_path(record, pagination.watermark_path) == watermark
+                and record not in at_watermark)
+        ]
+        if records:
+            merged.append(with_page_records(page, pagination.records_path, records))
+            added += len(records)
+    logger.debug(f"merged {added} new records into {len(cached_pages)} cached pages")
+    return merged, added
+
+
+def trim_pages(pages: list[any], pagination: BaseModel, watermark: any) -> tuple[list[any], int]:
+    """
+    Drop the records outside of the retention window and beyond the retention records,
+    the oldest first. Returns the remaining pages and the number of records dropped.
+    """
+    if pagination.retention_window is None and pagination.retention_records is None:
+        return pages, 0
+
+    horizon = None
+    if pagination.retention_window is not None:
+        horizon = _to_number(watermark)
+        horizon = horizon - pagination.retention_window if horizon is not None else None
+    # records of the later pages are newer, count them from the last page back
+    keep = pagination.retention_records
+    trimmed = []
+    dropped = 0
+    for page in reversed(pages):
+        records = get_page_records(page, pagination.records_path)
+        kept = [
+            record for record in records
+            if horizon is None or _within(extract_json_path(record, pagination.watermark_path), horizon)
+        ]
+        if keep is not None:
+            kept = kept[max(0, len(kept) - keep):]
+            keep -= len(kept)
+        dropped += len(records) - len(kept)
+        if kept:
+            trimmed.append(with_page_records(page, pagination.records_path, kept))
+    if not trimmed and pages:
+        # an empty dataset is still a cached one
+        trimmed.append(with_page_records(pages[0], pagination.records_path, []))
+    if dropped:
+        logger.debug(f"retention dropped {dropped} records")
+    return list(reversed(trimmed)), dropped
+
+
+def _is_newer(value: any, watermark: any) -> bool:
+    if value is None:
+        return False
+    try:
+        return value > watermark
+    except TypeError:
+        return False
+
+
+def _within(value: any, horizon: float) -> bool:
+    """Records whose watermark can not be compared are kept."""
+    number = _to_number(value)
+    return number is None or number >= horizon
+
+
+def _to_number(value: any) -> float | None:
+    """The watermark as a number, ISO-8601 timestamps in epoch seconds."""
+    if isinstance(value, int | float):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from collections import deque
+
+import httpx
+
+from ..models import HttpSettings, RestClientStats
+from ..utils import get_logger
+
+logger = get_logger("hedging")
+
+# idempotent methods, safe to send twice
+HEDGED_METHODS = ("GET", "HEAD")
+# recent latencies kept per host, and the least of them to learn the hedge delay from
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class HostLatencies:
+    """Window of the recent response latencies of one origin host."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.latencies: deque[float] = deque(maxlen=window)
+
+    def add(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    def percentile(self, percentile: float) -> float | None:
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+
+class HedgingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper hedging idempotent requests: when the response takes longer than
+    the given percentile of the recent latencies of its host, a duplicate request is sent
+    and the first response wins. Hedges are limited to a fraction of all the requests.
+    """
+
+    def __init__(
+        self, transport: httpx.AsyncBaseTransport, settings: HttpSettings, stats: RestClientStats
+    ):
+        self._transport = transport
+        self.percentile = settings.http_hedge_percentile
+        self.budget = settings.http_hedge_budget
+        self.stats = stats
+        self.requests = 0
+        self.latencies: dict[str, HostLatencies] = {}
+
+    def get_latencies(self, host: str) -> HostLatencies:
+        if host not in self.latencies:
+            self.latencies[host] = HostLatencies()
+        return self.latencies[host]
+
+    def get_hedge_delay(self, request: httpx.Request) -> float | None:
+        """Delay before hedging the request, None when it should not be hedged."""
+        if not self.percentile or request.method not in HEDGED_METHODS:
+            return None
+        if self.stats.hedges_sent >= self.budget * self.requests:
+            return None
+        return self.get_latencies(request.url.netloc.decode()).percentile(self.percentile)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        delay = self.get_hedge_delay(request)
+        if delay is None:
+            return await self.timed_request(request)
+
+        # copied before the wrapped transports add their extensions to the request
+        hedge = httpx.Request(
+            request.method,
+            request.url,
+            headers=request.headers,
+            extensions={k: v for k, v in request.extensions.items() if k != "trace"},
+        )
+        primary = asyncio.create_task(self.timed_request(request))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or self.stats.hedges_sent >= self.budget * self.requests:
+            return await primary
+
+        logger.debug(f"no response from {request.url.host} within {delay:.3f}s, hedging")
+        self.stats.hedges_sent += 1
+        secondary = asyncio.create_task(self.timed_request(hedge))
+        return await self.first_response(primary, secondary)
+
+    async def first_response(
+        self, primary: asyncio.Task, secondary: asyncio.Task
+    ) -> httpx.Response:
+        pending = {primary, secondary}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    if task is secondary:
+                        self.stats.hedges_won += 1
+                    for other in done - {task}:
+                        if other.exception() is None:
+                            await other.result().aclose()
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def timed_request(self, request: httpx.Request) -> httpx.Response:
+        start_time = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        self.get_latencies(request.url.netloc.decode()).add(time.perf_counter() - start_time)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
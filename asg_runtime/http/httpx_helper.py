@@ -1,11 +1,16 @@
 import asyncio
+import contextlib
+import email.utils
 import math
+import re
 import time
 from enum import Enum
 
 import httpx
+import orjson
 from pydantic import BaseModel
 
+from ..models import CachedHeaders
 from ..utils import get_fstring_kwords, get_logger
 
 logger = get_logger("httpx_helper")
@@ -14,6 +19,9 @@ logger = get_logger("httpx_helper")
 # Improve to the dot-path extraction function (extract_json_path)
 # Add support for cursor-based URLs with embedded tokens (next_path URLs)
 
+# pages of one origin fetched at once when the caller does not limit them
+DEFAULT_PAGE_CONCURRENCY = 8
+
 # ------------------  ENUMS ------------------
 
 class HttpMethods(str, Enum):
@@ -44,6 +52,10 @@ class HttpResponceHeaders(str, Enum):
     content_length = "content-length"
     content_type = "content-type"
     retry_after = "retry-after"
+    cache_control = "cache-control"
+    expires = "expires"
+    date = "date"
+    age = "age"
 
 class PaginationTypeEnum(str, Enum):
     PAGE = "PAGE"
@@ -67,10 +79,11 @@ class HttpPagination(BaseModel):
     next_path: str | None = None
     pagination_params: dict[str, str] | None = None
     param_translation: PagingParamDirectory | None = None
-
-class CachedHeaders(BaseModel):
-    etag: str | None = None
-    last_mod: str | None = None
+    since_param: str | None = None
+    watermark_path: str | None = None
+    records_path: str | None = None
+    retention_window: float | None = None
+    retention_records: int | None = None
 
 # ------------------ HELPERS ------------------
 
@@ -96,13 +109,18 @@ async def send_request_with_retries(
     timeout: int,
     max_retries: int = 3,
     retry_backoff: float = 0.5,
+    stream: bool = False,
 ) -> tuple[httpx.Response, int]:
+    """
+    Send the request, retrying on errors and on retry statuses.
+    With stream, the body of the good response is left unread for the caller, who closes it.
+    """
     last_exc = None
     requests_issued = 0
     for attempt in range(max_retries):
         try:
             requests_issued += 1
-            response = await client.request(
+            request_args = dict(
                 method=method,
                 url=url,
                 params=params,
@@ -110,16 +128,25 @@ async def send_request_with_retries(
                 json=json_data,
                 timeout=timeout,
             )
+            if stream:
+                response = await client.send(client.build_request(**request_args), stream=True)
+            else:
+                response = await client.request(**request_args)
 
             if response.status_code in HttpGoodStatuses:
                 return response, requests_issued
 
+            if stream:
+                await response.aclose()
             if response.status_code in HttpRetryStatuses:
-                retry_after = response.headers.get(
-                    HttpResponceHeaders.retry_after,
-                    retry_backoff * (2**attempt)
-                )
-                await asyncio.sleep(float(retry_after))
+                last_exc = httpx.HTTPStatusError(
+                    f"retry status {response.status_code}",
+                    request=response.request,
+                    response=response)
+                retry_after = get_retry_after(response.headers)
+                if retry_after is None:
+                    retry_after = retry_backoff * (2**attempt)
+                await asyncio.sleep(retry_after)
                 continue
 
             response.raise_for_status()
@@ -141,97 +168,352 @@ async def async_fetch_all_pages(
     max_pages: int = 10,
     max_retries: int = 3,
     retry_backoff: float = 0.5,
-) -> tuple[list[httpx.Response], int]:
-    all_responses = []
+    client: httpx.AsyncClient | None = None,
+    page_concurrency: asyncio.Semaphore | None = None,
+    decode_offload_bytes: int = 0,
+    method: str = HttpMethods.GET,
+    json_data: dict | None = None,
+) -> tuple[list["FetchedPage"], int]:
+    """
+    Fetch the pages on the given long-lived client, or on a client created for this call.
+    Every page is requested with the method and the json body given.
+    When the first page of PAGE or OFFSET pagination tells the total number of pages,
+    the rest of the pages are fetched concurrently, bounded by page_concurrency.
+    Otherwise, the request for the next page is issued as soon as its cursor is found
+    in the raw body of the current page, and the current page is decoded meanwhile.
+    Pages of at least decode_offload_bytes bytes are decoded off the event loop.
+    """
+    all_pages = []
     total_requests_issued = 0
     query_params = base_query_params.copy()
     page_count = 0
     estimated_total_pages = None
+    # speculative request for the next page: (url, query params, task)
+    pending = None
+
+    def send(url: str, params: dict):
+        return send_timed_request(
+            client=client,
+            method=method,
+            url=url,
+            params=params,
+            headers=header_args,
+            json_data=json_data,
+            timeout=timeout,
+            max_retries=max_retries,
+            retry_backoff=retry_backoff,
+        )
 
     logger.debug(f"async_fetch_all_pages - enter for url={url}")
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        while page_count < (estimated_total_pages or max_pages):
-            page_count += 1
-            response, requests_issued = await send_request_with_retries(
+    owned_client = httpx.AsyncClient(timeout=timeout) if client is None else None
+    async with owned_client or contextlib.nullcontext(client) as client:
+        try:
+            while page_count < min(estimated_total_pages or max_pages, max_pages):
+                page_count += 1
+                pipelined = False
+                if pending and pending[:2] == (url, query_params):
+                    logger.debug("the request for this page was issued in advance")
+                    response, requests_issued, latency = await pending[2]
+                    pipelined = True
+                else:
+                    if pending:
+                        logger.debug("the page was requested with a wrong cursor, requesting again")
+                        pending[2].cancel()
+                        total_requests_issued += 1
+                    response, requests_issued, latency = await send(url, query_params)
+                pending = None
+                total_requests_issued += requests_issued
+                logger.debug(f"page number {page_count}, status {response.status_code}")
+
+                if response.status_code == HttpGoodStatuses.NOT_MODIFIED and page_count == 1:
+                    logger.debug("not modified, the cached pages are still valid")
+                    all_pages.append(FetchedPage(response, latency=latency))
+                    break
+                if response.status_code != HttpGoodStatuses.SUCCESS:
+                    logger.debug("bad status, exiting")
+                    break
+
+                logger.debug("good status, adding to the list")
+                page = FetchedPage(response, latency=latency, pipelined=pipelined)
+                all_pages.append(page)
+
+                if not pagination:
+                    logger.debug("no pagination specified, won't look for more pages")
+                    break
+
+                logger.debug(f"pagination={pagination}")
+                if not is_addressable(pagination) and page_count < max_pages:
+                    content = response.content
+                    peeked = get_next_request(
+                        pagination, url, query_params, lambda path: peek_json_value(content, path))
+                    if peeked:
+                        logger.debug(f"requesting the next page in advance: {peeked}")
+                        pending = (*peeked, asyncio.create_task(send(*peeked)))
+                        # let the request go out before decoding the current page
+                        await asyncio.sleep(0)
+
+                try:
+                    response_json = await page.async_json(decode_offload_bytes)
+                except Exception as e:
+                    raise ValueError(f"pagination not supported non json payloads: {e}")
+
+                if pagination.param_translation and estimated_total_pages is None:
+                    logger.debug("estimate total pages, only on the first page")
+                    try:
+                        page_size = extract_json_path(response_json, pagination.param_translation.pageSizePath)
+                        total_size = extract_json_path(response_json, pagination.param_translation.totalSizePath)
+                        if isinstance(page_size, int) and isinstance(total_size, int) and page_size > 0:
+                            estimated_total_pages = math.ceil(total_size / page_size)
+                    except Exception:
+                        pass
+
+                next_request = get_next_request(
+                    pagination, url, query_params,
+                    lambda path: extract_json_path(response_json, path))
+                if not next_request:
+                    break
+                url, query_params = next_request
+                logger.debug(f"next url={url}, query_params={query_params}")
+
+                remaining_params = get_remaining_pages_params(
+                    pagination, query_params, response_json,
+                    min(estimated_total_pages or 0, max_pages) - page_count)
+                if remaining_params:
+                    logger.debug(f"fetching the remaining {len(remaining_params)} pages concurrently")
+                    pages, requests_issued = await fetch_pages_concurrently(
+                        client=client,
+                        url=url,
+                        pages_params=remaining_params,
+                        header_args=header_args,
+                        timeout=timeout,
+                        max_retries=max_retries,
+                        retry_backoff=retry_backoff,
+                        page_concurrency=page_concurrency,
+                        method=method,
+                        json_data=json_data,
+                    )
+                    total_requests_issued += requests_issued
+                    page_count += len(remaining_params)
+                    all_pages.extend(pages)
+                    break
+        finally:
+            if pending:
+                logger.debug("dropping the request issued in advance")
+                pending[2].cancel()
+                total_requests_issued += 1
+
+    logger.debug(f"on exit page_count={page_count}, num_pages={len(all_pages)}")
+    return all_pages, total_requests_issued
+
+
+async def send_timed_request(**kwargs) -> tuple[httpx.Response, int, float]:
+    """send_request_with_retries, also returning the latency of the page including the retries."""
+    start_time = time.perf_counter()
+    response, requests_issued = await send_request_with_retries(**kwargs)
+    return response, requests_issued, time.perf_counter() - start_time
+
+
+def get_next_request(
+    pagination: HttpPagination,
+    url: str,
+    query_params: dict,
+    lookup,
+) -> tuple[str, dict] | None:
+    """
+    Compose the url and the query parameters of the next page, looking up
+    the values of the pagination paths with lookup(path), None if there are no more pages.
+    """
+    try:
+        if pagination.next_path:
+            next_url = lookup(pagination.next_path)
+            if not next_url:
+                return None
+            return next_url, {}
+
+        if pagination.pagination_params:
+            new_params = {}
+            for param, json_path in pagination.pagination_params.items():
+                value = lookup(json_path)
+                if value is not None:
+                    new_params[param] = value
+            if not new_params:
+                return None
+            return url, {**query_params, **new_params}
+    except Exception:
+        return None
+    return None
+
+
+def peek_json_value(content: any, path: str) -> any:
+    """
+    Find the value of the last key of the path in the raw json body, without decoding it.
+    Raises LookupError unless the key appears exactly once with a scalar value.
+    """
+    if not isinstance(content, bytes):
+        raise LookupError("no raw content")
+    key = b'"' + path.split(".")[-1].encode() + b'"'
+    if content.count(key) != 1:
+        raise LookupError(f"{key} does not appear exactly once")
+    match = JSON_SCALAR_VALUE.match(content, content.index(key) + len(key))
+    if not match:
+        raise LookupError(f"{key} does not have a scalar value")
+    return orjson.loads(match.group(1))
+
+
+class FetchedPage:
+    """
+    A good origin response, decoded into json at most once, on first access.
+    Quacks like the response for status_code, headers, content and json().
+    """
+
+    def __init__(self, response: httpx.Response, latency: float = 0, pipelined: bool = False):
+        self.response = response
+        # time from issuing the request to receiving the response
+        self.latency = latency
+        # requested in advance, while the previous page was decoded
+        self.pipelined = pipelined
+        # time taken by the decode, and whether it ran in a worker thread
+        self.decode_time = 0.0
+        self.offloaded = False
+        self._json = _NOT_DECODED
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self.response.headers
+
+    @property
+    def content(self) -> bytes:
+        return self.response.content
+
+    def json(self) -> any:
+        if self._json is _NOT_DECODED:
+            start_time = time.perf_counter()
+            self._json = response_to_json(self.response)
+            self.decode_time = time.perf_counter() - start_time
+        return self._json
+
+    async def async_json(self, offload_bytes: int = 0) -> any:
+        """json(), decoded in a worker thread when the body has at least offload_bytes bytes."""
+        if self._json is _NOT_DECODED and offload_bytes and len(self.content) >= offload_bytes:
+            logger.debug(f"decoding {len(self.content)} bytes in a worker thread")
+            start_time = time.perf_counter()
+            self._json = await asyncio.to_thread(response_to_json, self.response)
+            self.decode_time = time.perf_counter() - start_time
+            self.offloaded = True
+        return self.json()
+
+
+_NOT_DECODED = object()
+
+# json scalar following a key: a string, a number, a literal
+JSON_SCALAR_VALUE = re.compile(
+    rb'\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?|true|false|null)')
+
+
+def is_addressable(pagination: HttpPagination) -> bool:
+    """Whether every page can be requested independently once the number of pages is known."""
+    if not pagination.param_translation or pagination.next_path:
+        return False
+    pagination_type = str(getattr(pagination.type, "value", pagination.type)).upper()
+    return pagination_type in (PaginationTypeEnum.PAGE.value, PaginationTypeEnum.OFFSET.value)
+
+
+def get_remaining_pages_params(
+    pagination: HttpPagination,
+    next_query_params: dict,
+    first_page_json: any,
+    remaining_pages: int,
+) -> list[dict] | None:
+    """
+    Compose the query parameters of all the remaining pages from the parameters of the second one,
+    returns None when the pages can not be addressed independently.
+    """
+    if remaining_pages <= 0 or not is_addressable(pagination):
+        return None
+    pagination_type = str(getattr(pagination.type, "value", pagination.type)).upper()
+
+    page_ref = pagination.param_translation.pageRef
+    try:
+        next_ref = int(next_query_params[page_ref])
+    except (KeyError, TypeError, ValueError):
+        logger.debug(f"no numeric {page_ref} in {next_query_params}, can not address the pages")
+        return None
+    if pagination_type == PaginationTypeEnum.PAGE.value:
+        step = 1
+    else:
+        step = extract_json_path(first_page_json, pagination.param_translation.pageSizePath)
+        if not isinstance(step, int) or step <= 0:
+            return None
+
+    return [
+        {**next_query_params, page_ref: next_ref + i * step}
+        for i in range(remaining_pages)
+    ]
+
+
+async def fetch_pages_concurrently(
+    client: httpx.AsyncClient,
+    url: str,
+    pages_params: list[dict],
+    header_args: dict,
+    timeout: int,
+    max_retries: int,
+    retry_backoff: float,
+    page_concurrency: asyncio.Semaphore | None = None,
+    method: str = HttpMethods.GET,
+    json_data: dict | None = None,
+) -> tuple[list[FetchedPage], int]:
+    """Fetch the pages concurrently, returns the good pages in page order up to the first bad one."""
+    semaphore = page_concurrency or asyncio.Semaphore(DEFAULT_PAGE_CONCURRENCY)
+
+    async def fetch_page(params: dict) -> tuple[httpx.Response, int, float]:
+        async with semaphore:
+            return await send_timed_request(
                 client=client,
-                method=HttpMethods.GET,
+                method=method,
                 url=url,
-                params=query_params,
+                params=params,
                 headers=header_args,
-                json_data=None,
+                json_data=json_data,
                 timeout=timeout,
                 max_retries=max_retries,
                 retry_backoff=retry_backoff,
             )
-            total_requests_issued += requests_issued
-            logger.debug(f"page number {page_count}, status {response.status_code}")
-
-            if response.status_code != HttpGoodStatuses.SUCCESS:
-                logger.debug("bad status, exiting")
-                break
-
-            logger.debug("good status, adding to the list")
-            all_responses.append(response)
-
-            if not pagination:
-                logger.debug("no pagination specified, won't look for more pages")
-                break
-
-            logger.debug(f"pagination={pagination}")
-            try: 
-                response_json = response.json()
-            except Exception as e:
-                raise ValueError(f"pagination not supported non json payloads: {e}")
-  
-            if pagination.param_translation and estimated_total_pages is None:
-                logger.debug("estimate total pages, only on the first page")
-                try:
-                    page_size = extract_json_path(response_json, pagination.param_translation.pageSizePath)
-                    total_size = extract_json_path(response_json, pagination.param_translation.totalSizePath)
-                    if isinstance(page_size, int) and isinstance(total_size, int) and page_size > 0:
-                        estimated_total_pages = math.ceil(total_size / page_size)
-                except Exception:
-                    pass
-
-            if pagination.next_path:
-                logger.debug("use next_path for cursor-style pagination")
-                try:
-                    next_url = extract_json_path(response_json, pagination.next_path)
-                    if not next_url:
-                        break
-                    url = next_url
-                    query_params = {}
-                    logger.debug(f"next_url={next_url}")
-                    continue
-                except Exception:
-                    break
 
-            elif pagination.pagination_params:
-                logger.debug("use specified parameterss to update query params")
-                try:
-                    new_params = {}
-                    for param, json_path in pagination.pagination_params.items():
-                        value = extract_json_path(response_json, json_path)
-                        if value is not None:
-                            new_params[param] = value
-                    if not new_params:
-                        break
-                    query_params.update(new_params)
-                except Exception:
-                    break
-            else:
-                break
+    results = await asyncio.gather(*(fetch_page(params) for params in pages_params))
+    pages = []
+    for response, _, latency in results:
+        if response.status_code != HttpGoodStatuses.SUCCESS:
+            logger.debug(f"page {len(pages) + 2} has bad status, dropping the rest")
+            break
+        pages.append(FetchedPage(response, latency=latency))
+    return pages, sum(requests_issued for _, requests_issued, _ in results)
 
-    logger.debug(f"on exit page_count={page_count}, num_pages={len(all_responses)}")
-    return all_responses, total_requests_issued
 
 class FromAPI(BaseModel):
     rsp_json_pages: list| None = None
     rsp_headers: dict | None = None # the first header
+    # full url and headers of every page
+    page_urls: list[str] | None = None
+    page_headers: list | None = None
     maybe_more_pages: bool | None = False
     requests_issued: int | None = 0
+    # bytes of the bodies once decoded, and as received, compressed by the origin
     bytes_received: int | None = 0
+    wire_bytes: int | None = 0
     fetching_time: float | None = 0
+    page_latencies: list[float] | None = None
+    pipelined_pages: int | None = 0
+    decode_block_time: float | None = 0
+    offloaded_decodes: int | None = 0
+    offloaded_decode_time: float | None = 0
+    # most raw body bytes held at once, all the pages unless the body was streamed
+    peak_body_bytes: int | None = 0
+    streamed_records: int | None = None
 
     def describe(self) -> dict:
         # print contents excluding the data
@@ -241,6 +523,13 @@ class FromAPI(BaseModel):
             "maybe_more_pages": self.maybe_more_pages,
             "requests_issued": self.requests_issued,
             "bytes_received": self.bytes_received,
+            "wire_bytes": self.wire_bytes,
+            "page_latencies": self.page_latencies,
+            "pipelined_pages": self.pipelined_pages,
+            "decode_block_time": self.decode_block_time,
+            "offloaded_decodes": self.offloaded_decodes,
+            "peak_body_bytes": self.peak_body_bytes,
+            "streamed_records": self.streamed_records,
         }
 
 # assumes cached headers are added by the caller
@@ -253,12 +542,17 @@ async def async_json_pages_from_api(
     max_pages: int = 10,
     max_retries: int = 3,
     retry_backoff: float = 0.5,
+    client: httpx.AsyncClient | None = None,
+    page_concurrency: asyncio.Semaphore | None = None,
+    decode_offload_bytes: int = 0,
+    method: str = HttpMethods.GET,
+    json_data: dict | None = None,
 ) -> FromAPI:
-    logger.debug(f"async_json_pages_from_api - enter for url={url}")
+    logger.debug(f"async_json_pages_from_api - enter for {method} url={url}")
     result = FromAPI()
     may_have_more_pages = False
     start_time = time.time()
-    responses, requests_issued = await async_fetch_all_pages(
+    pages, requests_issued = await async_fetch_all_pages(
         url=url,
         base_query_params=query_params,
         header_args=header_args,
@@ -266,51 +560,142 @@ async def async_json_pages_from_api(
         timeout=timeout,
         max_pages=max_pages,
         max_retries=max_retries,
-        retry_backoff=retry_backoff
+        retry_backoff=retry_backoff,
+        client=client,
+        page_concurrency=page_concurrency,
+        decode_offload_bytes=decode_offload_bytes,
+        method=method,
+        json_data=json_data,
     )
     result.fetching_time = time.time() - start_time
-    num_pages = len(responses)
+    num_pages = len(pages)
 
     logger.debug(
         f"async_fetch_all_pages issued {requests_issued} requests and got {num_pages} pages")
-    first_page_status_code = responses[0].status_code
+    first_page_status_code = pages[0].status_code
     logger.debug(f"first_page_status_code={first_page_status_code}")
     if first_page_status_code not in HttpGoodStatuses:
         raise Exception(f"Unexpected HTTP status: {first_page_status_code}")
 
     result.requests_issued = requests_issued
-    result.rsp_headers = responses[0].headers
+    result.rsp_headers = pages[0].headers
+    result.page_latencies = [page.latency for page in pages]
+    result.pipelined_pages = sum(page.pipelined for page in pages)
+    result.page_urls = [str(page.response.request.url) for page in pages]
+    result.page_headers = [page.headers for page in pages]
     if first_page_status_code == HttpGoodStatuses.NOT_MODIFIED:
         logger.debug("304 - can reuse cached data, keep the headers")
         return result  # no content, just headers and stats
 
+    logger.debug("collecting responses into a list and aggregating the size")
+    jason_pages = []
+    try:
+        for page in pages:
+            # decoded once, by the pagination if it needed the page's content
+            jason_pages.append(await page.async_json(decode_offload_bytes))
+    except Exception as e:
+        logger.error(f"failed to decode responses to json: {e}")
+        raise
+
+    result.decode_block_time = sum(page.decode_time for page in pages if not page.offloaded)
+    result.offloaded_decodes = sum(page.offloaded for page in pages)
+    result.offloaded_decode_time = sum(page.decode_time for page in pages if page.offloaded)
+
     logger.debug("checking for possibility of pages left behind")
     if num_pages == max_pages:
         logger.debug(f"num pages suggests pagination: num_pages = max_pages = {num_pages}") 
         may_have_more_pages = True
-    if has_pagination_header(responses[-1]) or has_pagination_keys(responses[-1]):
+    if has_pagination_header(pages[-1]) or has_pagination_keys(pages[-1]):
         logger.debug("last response suggests pagination") 
         may_have_more_pages = True
     result.maybe_more_pages = may_have_more_pages
-    
-    logger.debug("collecting responses into a list and aggregating the size")
-    jason_pages = []
-    bytes_received = 0
-    try:
-        for response in responses:
-            jason_page = response_to_json(response)
-            jason_pages.append(jason_page)
-            bytes_in_page = get_content_length(response.headers) or jason_page.__sizeof__()
-            bytes_received += bytes_in_page
-            
-    except Exception as e:
-        logger.error(f"failed to decode responses to json: {e}")
-        raise
-    
-    result.bytes_received = bytes_received
+
+    result.bytes_received = sum(len(page.content) for page in pages)
+    result.wire_bytes = sum(page.response.num_bytes_downloaded for page in pages)
+    result.peak_body_bytes = result.bytes_received
     result.rsp_json_pages = jason_pages
     return result
 
+
+async def async_stream_json_from_api(
+    url: str,
+    header_args: dict,
+    query_params: dict,
+    stream_paths: list[str],
+    stream_min_bytes: int,
+    timeout: int = 10,
+    max_retries: int = 3,
+    retry_backoff: float = 0.5,
+    client: httpx.AsyncClient | None = None,
+    method: str = HttpMethods.GET,
+    json_data: dict | None = None,
+) -> FromAPI:
+    """
+    Fetch a single page, parsing json bodies of at least stream_min_bytes bytes
+    (or of unknown length) incrementally as they arrive, keeping only the values at stream_paths.
+    Smaller bodies are read and decoded whole, like async_json_pages_from_api does.
+    """
+    from .json_stream import JsonPathStream
+
+    logger.debug(f"async_stream_json_from_api - enter for url={url}")
+    result = FromAPI()
+    start_time = time.time()
+    owned_client = httpx.AsyncClient(timeout=timeout) if client is None else None
+    async with owned_client or contextlib.nullcontext(client) as client:
+        response, requests_issued = await send_request_with_retries(
+            client=client,
+            method=method,
+            url=url,
+            params=query_params,
+            headers=header_args,
+            json_data=json_data,
+            timeout=timeout,
+            max_retries=max_retries,
+            retry_backoff=retry_backoff,
+            stream=True,
+        )
+        try:
+            result.requests_issued = requests_issued
+            result.rsp_headers = response.headers
+            if response.status_code == HttpGoodStatuses.NOT_MODIFIED:
+                logger.debug("304 - can reuse cached data, keep the headers")
+                return result
+
+            content_length = get_content_length(response.headers)
+            content_type = response.headers.get(HttpResponceHeaders.content_type, "").lower()
+            if "application/json" not in content_type or (
+                content_length is not None and content_length < stream_min_bytes
+            ):
+                logger.debug(f"reading the body of {content_length} bytes whole")
+                await response.aread()
+                page = FetchedPage(response)
+                result.rsp_json_pages = [page.json()]
+                result.decode_block_time = page.decode_time
+                result.bytes_received = len(page.content)
+                result.wire_bytes = response.num_bytes_downloaded
+                result.peak_body_bytes = len(page.content)
+                return result
+
+            parser = JsonPathStream(stream_paths)
+            bytes_received = 0
+            peak_body_bytes = 0
+            async for chunk in response.aiter_bytes():
+                bytes_received += len(chunk)
+                peak_body_bytes = max(peak_body_bytes, len(chunk))
+                parser.feed(chunk)
+            result.rsp_json_pages = [parser.close()]
+            logger.debug(
+                f"streamed {parser.records} records in {parser.batches} batches from {bytes_received} bytes")
+            result.bytes_received = bytes_received
+            result.wire_bytes = response.num_bytes_downloaded
+            result.peak_body_bytes = peak_body_bytes
+            result.streamed_records = parser.records
+            return result
+        finally:
+            await response.aclose()
+            result.fetching_time = time.time() - start_time
+            result.page_latencies = [result.fetching_time]
+
 def compose_http_get_params(url_template: str, parameter_args: dict | None = {}) -> tuple[str, dict]:
     logger.debug(
         f"compose_http_get_params enter for url_template={url_template}, parameter_args={parameter_args}"
@@ -335,14 +720,15 @@ def add_caching_headers(request_headers: dict, cached_headers: CachedHeaders) ->
     logger.debug(
         f"add_caching_headers enter for request_headers={request_headers}, cached_headers={cached_headers}"
     )
-    result = request_headers
+    # the source's headers are reused by later fetches
+    result = dict(request_headers)
 
     if cached_headers:
         if cached_headers.etag:
-            request_headers[HttpRequestHeaders.if_none_match] = cached_headers.etag
+            result[HttpRequestHeaders.if_none_match] = cached_headers.etag
 
         if cached_headers.last_mod:
-            request_headers[HttpRequestHeaders.if_mod_since] = cached_headers.last_mod
+            result[HttpRequestHeaders.if_mod_since] = cached_headers.last_mod
 
     logger.debug(f"fresult={result}")
     return result
@@ -351,6 +737,10 @@ def get_caching_headers(
     cached_headers: CachedHeaders,
     rsp_headers: dict,
 ) -> CachedHeaders | None:
+    """
+    Caching headers of the response to store along its data, None when there is no response.
+    A 304 response may omit the validators, the cached ones are kept then.
+    """
     logger.debug(
         f"get_caching_headers: cached_headers={cached_headers}, rsp_headers={rsp_headers}"
     )
@@ -359,29 +749,64 @@ def get_caching_headers(
     if not rsp_headers:
         return None
 
-    rsp_etag = rsp_headers.get(HttpResponceHeaders.etag)
-    rsp_last_mod = rsp_headers.get(HttpResponceHeaders.last_mod)
-    if not rsp_etag and not rsp_last_mod:
-        # no new caching headers
-        return None
-
-    # we have new caching headers
-    cached_etag = cached_headers.etag if cached_headers else None
-    cached_last_mod = cached_headers.last_mod if cached_headers else None
-
-    new_etag = rsp_etag and cached_etag and rsp_etag != cached_etag
-    new_last_mod = rsp_last_mod and cached_last_mod and rsp_last_mod != cached_last_mod
+    directives = parse_cache_control(rsp_headers.get(HttpResponceHeaders.cache_control))
+    if "no-store" in directives:
+        return CachedHeaders(no_store=True)
+
+    return CachedHeaders(
+        etag=rsp_headers.get(HttpResponceHeaders.etag) or (
+            cached_headers.etag if cached_headers else None),
+        last_mod=rsp_headers.get(HttpResponceHeaders.last_mod) or (
+            cached_headers.last_mod if cached_headers else None),
+        max_age=get_max_age(rsp_headers, directives),
+        fetched_at=time.time(),
+    )
 
-    if not new_etag and not new_last_mod:
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    """Directives of a Cache-Control header, by lowercase name, with their value if any."""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip().strip('"') or None
+    return directives
+
+def get_max_age(rsp_headers: dict, directives: dict[str, str | None]) -> float | None:
+    """
+    Freshness lifetime of the response in seconds, less its Age,
+    by s-maxage, max-age or Expires in this order, None when the origin sent none of them.
+    """
+    if "no-cache" in directives:
+        return 0.0
+    max_age = None
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                max_age = float(directives[name])
+            except (TypeError, ValueError):
+                # an invalid lifetime makes the response stale
+                max_age = 0.0
+            break
+    else:
+        expires = rsp_headers.get(HttpResponceHeaders.expires)
+        if expires is None:
+            return None
+        expires_at = parse_http_date(expires)
+        date = parse_http_date(rsp_headers.get(HttpResponceHeaders.date))
+        max_age = expires_at - (date or time.time()) if expires_at else 0.0
+    age = rsp_headers.get(HttpResponceHeaders.age)
+    if age and age.isdigit():
+        max_age -= int(age)
+    return max(0.0, max_age)
+
+def parse_http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        logger.debug(f"ignoring invalid http date {value}")
         return None
-
-    # At least one changed -> update cache
-    result = CachedHeaders(
-        etag=new_etag,
-        new_last_mod = new_last_mod
-    )
-    
-    return result
 
 def response_to_bytes(response: httpx.Response) -> bytes:
     content_type = response.headers.get(HttpResponceHeaders.content_type, "").lower()
@@ -399,10 +824,27 @@ def response_to_json(response: httpx.Response) -> any:
     logger.debug(f"response_to_json - content-type: {content_type}")
 
     if "application/json" in content_type:
-        return response.json() 
+        # orjson decodes the raw body several times faster than response.json()
+        return orjson.loads(response.content)
     else:
         raise ValueError(f"unsupported media type: {content_type}")
 
+def get_retry_after(headers: httpx.Headers) -> float | None:
+    """Seconds to wait by the Retry-After header, given in seconds or as an http date."""
+    value = headers.get(HttpResponceHeaders.retry_after)
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        logger.warning(f"ignoring invalid {HttpResponceHeaders.retry_after.value}={value}")
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
 def get_content_length(headers: httpx.Headers) -> int | None:
     if HttpResponceHeaders.content_length.value in headers:
         logger.debug(f"response has {HttpResponceHeaders.content_length.value} header")
@@ -413,7 +855,7 @@ def get_content_length(headers: httpx.Headers) -> int | None:
     return None
  
 
-def has_pagination_header(response: httpx.Response) -> bool:
+def has_pagination_header(response: "httpx.Response | FetchedPage") -> bool:
     logger.debug(f"has_pagination_header enter for headers={response.headers}")
     result = False
     link_value = response.headers.get(HttpResponceHeaders.link, "").lower()
@@ -423,11 +865,14 @@ def has_pagination_header(response: httpx.Response) -> bool:
     return result
 
 
-def has_pagination_keys(response: httpx.Response) -> bool:
+def has_pagination_keys(page: "httpx.Response | FetchedPage") -> bool:
     logger.debug("has_pagination_keys enter")
+    if not isinstance(page, FetchedPage):
+        page = FetchedPage(page)
     result = False
     try:
-        json_data = response.json()
+        # reuses the json decoded for the pagination or the results
+        json_data = page.json()
         if isinstance(json_data, dict):
             pagination_keys = {"next", "next_page", "pagination", "links"}
             found_keys = pagination_keys.intersection(json_data.keys())
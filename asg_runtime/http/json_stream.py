@@ -0,0 +1,89 @@
+try:
+    import ijson
+except ImportError:
+    raise ImportError("The 'ijson' package is required for streaming json parsing.")
+
+from ..utils import get_logger
+
+logger = get_logger("json_stream")
+
+ROOT_PATHS = (".", "")
+
+
+class JsonPathStream:
+    """
+    Incremental parser of a json body fed in chunks, keeping only the values at the dataset paths.
+
+    Records of an array at a dataset path are built one at a time as their events arrive,
+    so neither the raw body nor the parts of the document outside the paths are ever held.
+    close() returns the page projected on the paths, shaped like the decoded body:
+    the value at the root path, or a dict mapping the other paths to their values.
+    """
+
+    def __init__(self, paths: list[str]):
+        # ijson prefix of the value at each path
+        self.paths = {"" if path in ROOT_PATHS else path: path for path in paths}
+        # ijson prefix of the items of an array at each path
+        self.items = {f"{prefix}.item" if prefix else "item": prefix for prefix in self.paths}
+        self.values: dict[str, any] = {}
+        # prefixes whose value is an array, their items are the records
+        self.arrays: set[str] = set()
+        self.records = 0
+        self.batches = 0
+        self._events = ijson.sendable_list()
+        self._parser = ijson.parse_coro(self._events, use_float=True)
+        # value being built: (prefix, builder, depth)
+        self._building = None
+
+    def feed(self, chunk: bytes) -> int:
+        """Parse the next chunk of the body, returns the number of records completed by it."""
+        self._parser.send(chunk)
+        records = self.records
+        self._handle_events()
+        if self.records > records:
+            self.batches += 1
+        return self.records - records
+
+    def close(self) -> any:
+        self._parser.close()
+        self._handle_events()
+        if "" in self.paths:
+            return self.values.get("")
+        return {self.paths[prefix]: value for prefix, value in self.values.items()}
+
+    def _handle_events(self):
+        for prefix, event, value in self._events:
+            if self._building:
+                self._build(event, value)
+            elif self.items.get(prefix) in self.arrays:
+                self._start(self.items[prefix], event, value)
+            elif prefix in self.paths and prefix not in self.arrays:
+                if event == "start_array":
+                    logger.debug(f"streaming the records of {self.paths[prefix]}")
+                    self.arrays.add(prefix)
+                    self.values[prefix] = []
+                else:
+                    self._start(prefix, event, value)
+        del self._events[:]
+
+    def _start(self, prefix: str, event: str, value: any):
+        self._building = (prefix, ijson.ObjectBuilder(), 0)
+        self._build(event, value)
+
+    def _build(self, event: str, value: any):
+        prefix, builder, depth = self._building
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+        if depth:
+            self._building = (prefix, builder, depth)
+            return
+
+        self._building = None
+        if prefix in self.arrays:
+            self.values[prefix].append(builder.value)
+            self.records += 1
+        else:
+            self.values[prefix] = builder.value
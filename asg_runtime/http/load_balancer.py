@@ -0,0 +1,87 @@
+import time
+
+from ..models import BalancePolicies, HttpSettings, RestClientStats
+from ..utils import get_logger
+
+logger = get_logger("load_balancer")
+
+# weight of the latest latency in the moving average
+EWMA_ALPHA = 0.3
+
+
+class ServerState:
+    """Requests in flight, moving average latency and ejection of one origin server."""
+
+    def __init__(self):
+        self.outstanding = 0
+        self.ewma_latency: float | None = None
+        self.ejected_until = 0.0
+
+    def is_ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+
+class LoadBalancer:
+    """
+    Choice of the server of an origin listing several replicas.
+
+    least_outstanding: the server with the fewest requests in flight, the lowest latency on ties.
+    ewma: the server with the lowest moving average latency, weighted by its requests in flight.
+    A server whose request failed is ejected for eject seconds, its requests fail over
+    to the other servers; when all the servers are ejected the first one back is used.
+    """
+
+    def __init__(self, settings: HttpSettings, stats: RestClientStats):
+        self.policy = settings.http_balance_policy
+        self.eject = settings.http_server_eject
+        self.stats = stats
+        self.servers: dict[str, ServerState] = {}
+
+    def get_state(self, server: str) -> ServerState:
+        if server not in self.servers:
+            self.servers[server] = ServerState()
+        return self.servers[server]
+
+    def choose(self, servers: list[str], exclude: set[str] | None = None) -> str:
+        now = time.monotonic()
+        candidates = [server for server in servers if server not in (exclude or ())] or servers
+        available = [server for server in candidates if not self.get_state(server).is_ejected(now)]
+        if not available:
+            return min(candidates, key=lambda server: self.get_state(server).ejected_until)
+        # servers without a latency yet are tried first, the listing order breaks ties
+        return min(available, key=self.get_cost)
+
+    def get_cost(self, server: str) -> tuple:
+        state = self.get_state(server)
+        latency = state.ewma_latency if state.ewma_latency is not None else 0.0
+        if self.policy == BalancePolicies.ewma:
+            return (latency * (state.outstanding + 1),)
+        return (state.outstanding, latency)
+
+    def start(self, server: str) -> None:
+        self.get_state(server).outstanding += 1
+
+    def finish(self, server: str, latency: float | None = None, success: bool = True) -> None:
+        """Record the end of a request, latency is None when it did not complete."""
+        state = self.get_state(server)
+        state.outstanding -= 1
+        if latency is not None:
+            state.ewma_latency = latency if state.ewma_latency is None else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * state.ewma_latency)
+        if not success and self.eject:
+            logger.warning(f"ejecting server {server} for {self.eject}s")
+            state.ejected_until = time.monotonic() + self.eject
+            self.stats.server_ejections += 1
+
+
+def join_server_url(server: str, path: str) -> str:
+    return server.removesuffix("/") + "/" + path.removeprefix("/")
+
+
+def rebase_url(url: str, servers: list[str], server: str) -> str:
+    """The url of one of the servers moved to the given server."""
+    for other in servers:
+        prefix = other.removesuffix("/") + "/"
+        if url.startswith(prefix):
+            return join_server_url(server, url.removeprefix(prefix))
+    return url
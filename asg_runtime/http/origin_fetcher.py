@@ -1,4 +1,11 @@
+import asyncio
+import importlib.util
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
 
+import httpx
+from pydantic import BaseModel
 
 from ..caches import BaseCache
 from ..models import (
@@ -8,22 +15,72 @@ from ..models import (
     RestDataSource,
 )
 from ..utils import get_logger
+from .circuit_breaker import CircuitBreaker, CircuitState
+from .client_pool import create_pooled_client
+from .delta_sync import get_watermark, is_delta_sync, merge_delta, trim_pages
 from .httpx_helper import (
+    FetchedPage,
     FromAPI,
+    HttpGoodStatuses,
+    HttpMethods,
     add_caching_headers,
     async_json_pages_from_api,
+    async_stream_json_from_api,
     compose_http_get_params,
     get_caching_headers,
+    send_timed_request,
 )
+from .load_balancer import LoadBalancer, join_server_url, rebase_url
+from .page_cache import (
+    CachedPage,
+    get_manifest_headers,
+    get_manifest_key,
+    get_next_page,
+    get_page_key,
+    is_same_page,
+    split_page_url,
+)
+from .refresh_ahead import RefreshScheduler
 
 logger = get_logger("origin_fetcher")
 
+# urls of the sources served stale to the current request, None when not tracked
+stale_sources: ContextVar[list[str] | None] = ContextVar("stale_sources", default=None)
+
+
+def track_stale_sources() -> list[str]:
+    """Start collecting the urls of the sources served stale to the current request."""
+    stale = []
+    stale_sources.set(stale)
+    return stale
+
 class FetchFailure(Exception):
     def __init__(self, url: str, reason: str):
         super().__init__(f"Failed to fetch data from {url}: {reason}")
         self.url = url
         self.reason = reason
 
+class CircuitOpen(FetchFailure):
+    def __init__(self, url: str):
+        super().__init__(url, "circuit open, the origin is failing")
+
+def get_failure_class(error: BaseException) -> str:
+    """The status of the failed fetch, or timeout, or connection, or error for other failures."""
+    while error is not None:
+        if isinstance(error, httpx.HTTPStatusError):
+            return str(error.response.status_code)
+        if isinstance(error, httpx.TimeoutException):
+            return "timeout"
+        if isinstance(error, httpx.TransportError):
+            return "connection"
+        error = error.__cause__
+    return "error"
+
+
+def is_origin_failure(failure: str) -> bool:
+    """Whether the failure class tells the origin is failing, rather than rejecting the request."""
+    return failure in ("timeout", "connection", "429") or (failure.isdigit() and failure[0] == "5")
+
 class OriginFetcher:
     def __init__(
         self,
@@ -36,19 +93,154 @@ class OriginFetcher:
         self.max_pages = settings.http_max_pages
         self.retry_backoff = settings.http_retry_backoff
         self.stats = RestClientStats()
+        # long-lived client, keeps the connections to the origins alive across fetches
+        self.client = create_pooled_client(settings, self.stats)
+        self.max_concurrent_pages = settings.http_max_concurrent_pages
+        self.host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self.sources_semaphore = asyncio.Semaphore(settings.http_max_concurrent_sources)
+        # larger bodies are decoded in a worker thread
+        self.decode_offload_bytes = settings.http_decode_offload_bytes
+        # per origin host, fail fast while the origin is failing
+        self.circuit_failures = settings.http_circuit_failures
+        self.circuit_reset = settings.http_circuit_reset
+        self.circuit_breakers: dict[str, CircuitBreaker] = {}
+        # cached data of origins sending no freshness headers is served this long
+        self.min_revalidate = settings.http_min_revalidate
+        self.min_revalidate_hosts = settings.http_min_revalidate_hosts
+        # paginated data is cached page by page, only the changed pages are transferred
+        self.page_cache = settings.http_page_cache
+        # requests of origins listing several servers are spread across them
+        self.balancer = LoadBalancer(settings, self.stats)
+        # failed fetches are remembered in the origin cache, by failure class
+        self.negative_ttl = settings.http_negative_ttl
+        self.negative_ttls = settings.http_negative_ttls
+        # stale cached data is served when the origin fails, and revalidated in the background
+        self.stale_if_error = settings.http_stale_if_error
+        self.failed_revalidations: set[str] = set()
+        self.stale_revalidations: dict[str, asyncio.Task] = {}
+        # hot cached entries are revalidated in the background before they go stale
+        self.refresher = RefreshScheduler(
+            self.refresh_source, settings, self.stats
+        ) if cache and settings.http_refresh_ahead else None
+        # larger single page bodies are parsed as they arrive
+        self.stream_min_bytes = settings.http_stream_min_bytes
+        if self.stream_min_bytes and importlib.util.find_spec("ijson") is None:
+            raise ImportError("The 'ijson' package is required for streaming, install the stream extra.")
 
     # ------------------ exported methods -----------------
 
     def get_rest_client_stats(self) -> RestClientStats:
         return self.stats
 
-    async def fetch_json_pages_from_source(self, source: RestDataSource) -> list[any]:
+    async def aclose(self) -> None:
+        if self.refresher:
+            await self.refresher.aclose()
+        tasks = list(self.stale_revalidations.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.debug("closing the pooled client")
+        await self.client.aclose()
+
+    async def fetch_json_pages_from_sources(
+        self, sources: list[RestDataSource]
+    ) -> list[list[any]]:
+        """
+        Fetch the sources concurrently, a bounded number at once, results in the sources order.
+        Identical sources are fetched once.
+        """
+        async def fetch(source: RestDataSource) -> list[any]:
+            async with self.sources_semaphore:
+                return await self.fetch_json_pages_from_source(source)
+
+        unique = {repr(source): source for source in sources}
+        logger.debug(
+            f"fetch_json_pages_from_sources - enter for {len(sources)} sources, {len(unique)} unique")
+        results = dict(zip(unique, await asyncio.gather(*map(fetch, unique.values()))))
+        return [results[repr(source)] for source in sources]
+
+    async def fetch_json_pages_from_nodes(self, source: RestDataSource) -> list[any]:
+        """
+        Scatter-gather across the nodes of a federation: fetch the source from all of its servers
+        concurrently and return the union of their pages, in the servers order.
+        Nodes failing or not done by the deadline are left out with a warning,
+        fewer than min_nodes answering fails the fetch.
+        """
+        deadline = source.fan_out.deadline
+        min_nodes = source.fan_out.min_nodes
+        node_sources = {
+            server: source.model_copy(update={
+                "url_template": join_server_url(server, source.url_template),
+                "servers": None,
+                "fan_out": None,
+            })
+            for server in source.servers
+        }
+        logger.debug(f"fanning {source.url_template} out to {len(node_sources)} nodes")
+
+        async def fetch(node: str, node_source: RestDataSource) -> list[any]:
+            start_time = time.perf_counter()
+            pages = await self.fetch_json_pages_from_source(node_source)
+            self.stats.record_node_latency(node, time.perf_counter() - start_time)
+            return pages
+
+        tasks = {
+            node: asyncio.create_task(fetch(node, node_source))
+            for node, node_source in node_sources.items()
+        }
+        try:
+            _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        results = []
+        for node, task in tasks.items():
+            if task in pending:
+                logger.warning(f"node {node} missed the {deadline}s deadline, leaving it out")
+                self.stats.node_timeouts += 1
+            elif task.exception():
+                logger.warning(f"node {node} failed, leaving it out: {task.exception()}")
+                self.stats.node_failures += 1
+            else:
+                results.append(task.result() or [])
+        self.stats.fan_outs += 1
+        if len(results) < min_nodes:
+            raise FetchFailure(
+                source.url_template, f"{len(results)} of {len(tasks)} nodes answered, {min_nodes} needed")
+        if len(results) < len(tasks):
+            logger.warning(f"returning the partial results of {len(results)} of {len(tasks)} nodes")
+            self.stats.partial_results += 1
+        return [page for pages in results for page in pages]
+
+    async def refresh_source(self, source: RestDataSource) -> list[any]:
+        """Revalidate the cached data of the source even if it is still fresh."""
+        return await self.fetch_json_pages_from_source(source, revalidate=True)
+
+    async def fetch_json_pages_from_source(
+        self, source: RestDataSource, revalidate: bool = False
+    ) -> list[any]:
         logger.debug(f"fetch_json_pages_from_source - enter for source={source.model_dump()}")
+        if source.fan_out and source.servers:
+            return await self.fetch_json_pages_from_nodes(source)
         header_args = source.header_args or {}
         url, query_params = compose_http_get_params(source.url_template, source.parameter_args)
+        if source.servers:
+            # on the first server, moved to the chosen one by call_servers
+            url = join_server_url(source.servers[0], url)
         logger.debug(f"url={url}, query_params={query_params}")
-        origin_cache_key = source.hash_contents()
+        streamed = bool(self.stream_min_bytes and source.stream_paths and not source.pagination)
+        origin_cache_key = source.hash_contents(with_stream_paths=streamed)
         logger.debug(f"origin_cache_key={origin_cache_key}")
+        if self.refresher and not revalidate:
+            self.refresher.record_access(origin_cache_key, source, url)
+        if self.is_page_cached(source, streamed):
+            return await self.fetch_page_cached_source(
+                source, url, query_params, header_args, origin_cache_key, revalidate)
         cached_data, cached_headers = await self.get_from_cache(origin_cache_key)
 
         if cached_data:
@@ -56,6 +248,11 @@ class OriginFetcher:
                 logger.debug(
                     f"data in cache but not headers, returning from cache: type={type(cached_data)}")
                 return cached_data
+            if not revalidate and cached_headers.is_fresh(self.get_min_revalidate(url)):
+                logger.debug("cached data is fresh, returning from cache")
+                self.stats.fresh_hits += 1
+                self.set_expiry(origin_cache_key, url, cached_headers)
+                return cached_data
         elif cached_headers:
             logger.warning(f"cached_headers={cached_headers} with no data")
             # just diregarding the cached headers, TODO - consider removal here
@@ -65,26 +262,65 @@ class OriginFetcher:
         # 1. cached data and cached headers - try to refresh
         # 2. no cached data and no cached headers - fetch
         # in both cases, need to issue request
-        if cached_headers:
+        delta_sync = self.cache is not None and is_delta_sync(source.pagination)
+        watermark = cached_headers.watermark if cached_data and delta_sync else None
+        if watermark is not None:
+            # only the records newer than the cached ones are fetched
+            logger.debug(f"syncing the records since {watermark}")
+            query_params = {**query_params, source.pagination.since_param: watermark}
+        elif cached_headers and source.method == HttpMethods.GET:
+            # a POST is not conditional, it is sent again once the cached data is stale
             header_args = add_caching_headers(header_args, cached_headers)
 
+        failure = await self.get_failure(origin_cache_key)
+        if failure:
+            if cached_data:
+                logger.warning(f"{url} failed recently ({failure}), returning stale cached data")
+                self.stats.stale_served += 1
+                return self.serve_stale(url, cached_data)
+            raise FetchFailure(url, f"failed recently ({failure}), not retrying yet")
+        if cached_data and not revalidate and self.is_revalidating_stale(
+            origin_cache_key, url, cached_headers
+        ):
+            logger.warning(f"revalidating {url} in the background, returning stale cached data")
+            self.revalidate_in_background(origin_cache_key, source)
+            return self.serve_stale(url, cached_data)
+
         logger.debug("initiate request to origin server to collect the data")
-        from_api = await async_json_pages_from_api(
-            url = url,
-            header_args = header_args,
-            query_params=query_params,
-            pagination = source.pagination,
-            timeout=source.timeout or self.timeout,
-            max_pages = self.max_pages,
-            max_retries=self.max_retries,
-            retry_backoff=self.retry_backoff)
+        try:
+            from_api = await self.call_servers(
+                source, url,
+                lambda on_server, max_retries: self.fetch_from_api(
+                    on_server(url), header_args, query_params, source, streamed, max_retries))
+        except CircuitOpen:
+            if cached_data:
+                logger.warning(f"circuit of {url} is open, returning stale cached data")
+                self.stats.stale_served += 1
+                return self.serve_stale(url, cached_data)
+            raise
+        except Exception as e:
+            await self.remember_failure(origin_cache_key, url, e)
+            if cached_data and not revalidate and self.can_serve_stale(e, url, cached_headers):
+                logger.warning(f"revalidation of {url} failed: {e}, returning stale cached data")
+                self.failed_revalidations.add(origin_cache_key)
+                return self.serve_stale(url, cached_data)
+            raise
+        self.failed_revalidations.discard(origin_cache_key)
 
         logger.debug(f"from_api={from_api.describe()}")
         if from_api.maybe_more_pages:
             logger.warning(f"we may have left unfetched pages for url={url}")
         self.stats.update(requests_issued=from_api.requests_issued,
                           bytes_received=from_api.bytes_received,
-                          fetching_time=from_api.fetching_time)
+                          wire_bytes=from_api.wire_bytes or 0,
+                          fetching_time=from_api.fetching_time,
+                          page_latencies=from_api.page_latencies,
+                          pipelined_pages=from_api.pipelined_pages or 0,
+                          decode_block_time=from_api.decode_block_time or 0,
+                          offloaded_decodes=from_api.offloaded_decodes or 0,
+                          offloaded_decode_time=from_api.offloaded_decode_time or 0,
+                          peak_body_bytes=from_api.peak_body_bytes or 0,
+                          streamed_records=from_api.streamed_records)
           
         if not self.cache:
             logger.debug("not caching, returning fetched data (can be null)")
@@ -94,6 +330,22 @@ class OriginFetcher:
         new_data = from_api.rsp_json_pages 
         new_caching_headers = get_caching_headers(cached_headers, from_api.rsp_headers)
         logger.debug(f"new_caching_headers={new_caching_headers}")
+        if delta_sync and new_caching_headers and not new_caching_headers.no_store:
+            # the high-water mark is found in the fetched records, newer than the cached ones
+            new_caching_headers.watermark = get_watermark(
+                new_data or [], source.pagination, watermark)
+            new_data = self.sync_delta(
+                source.pagination, cached_data, new_data, watermark, new_caching_headers.watermark)
+        self.set_expiry(origin_cache_key, url, new_caching_headers)
+        if revalidate and new_data:
+            self.stats.refreshes_modified += 1
+        if new_caching_headers and new_caching_headers.no_store:
+            logger.debug("the origin forbids storing the response, not caching")
+            self.stats.no_store_responses += 1
+            if cached_data:
+                await self.cache.async_delete(key=origin_cache_key, with_headers=True)
+            return new_data or cached_data
+
         if new_data:
             logger.debug(
                 "got new data, caching new data, with headers if available")
@@ -106,6 +358,7 @@ class OriginFetcher:
         # no new data
         if cached_data:
             logger.debug("no new data but have cached data") 
+            self.stats.revalidations += 1
             if new_caching_headers:
                 logger.debug("have new headers, caching") 
                 await self.cache.async_set_headers(
@@ -118,6 +371,507 @@ class OriginFetcher:
         return None
 
 # ------------------ private methods ---------------------
+    def is_page_cached(self, source: RestDataSource, streamed: bool) -> bool:
+        """
+        Time-based sources synced incrementally keep their pages in a single entry,
+        and so do POST sources, their pages are not revalidated.
+        """
+        return bool(
+            self.page_cache and self.cache and source.pagination
+            and source.method == HttpMethods.GET
+            and not streamed and not is_delta_sync(source.pagination))
+
+    async def fetch_page_cached_source(
+        self,
+        source: RestDataSource,
+        url: str,
+        query_params: dict,
+        header_args: dict,
+        origin_cache_key: str,
+        revalidate: bool,
+    ) -> list[any]:
+        """
+        Page-granular origin cache: every page is cached under its own key with its own
+        validators, and a manifest entry lists the urls of the pages in order.
+        The cached pages are revalidated concurrently, each by its own conditional request,
+        so a refresh transfers only the pages that changed.
+        """
+        manifest, manifest_headers = await self.get_from_cache(get_manifest_key(origin_cache_key))
+        page_urls = manifest.get("pages") if isinstance(manifest, dict) else None
+        cached_pages = []
+        if page_urls:
+            cached_pages = await asyncio.gather(*(
+                self.cache.async_get(key=get_page_key(origin_cache_key, page_url), with_headers=True)
+                for page_url in page_urls))
+            if not all(data for data, _ in cached_pages):
+                logger.debug("pages of the manifest were evicted, fetching all the pages")
+                page_urls, cached_pages = None, []
+        cached_data = [data[0] for data, _ in cached_pages] or None
+
+        if cached_data and not revalidate and manifest_headers and manifest_headers.is_fresh(
+            self.get_min_revalidate(url)
+        ):
+            logger.debug("cached pages are fresh, returning from cache")
+            self.stats.fresh_hits += 1
+            self.set_expiry(origin_cache_key, url, manifest_headers)
+            return cached_data
+
+        async def fetch(on_server: Callable[[str], str], max_retries: int) -> list[CachedPage]:
+            next_request = (url, query_params)
+            pages = []
+            if cached_data:
+                pages, next_request = await self.revalidate_pages(
+                    source, header_args, page_urls, cached_pages, on_server, max_retries)
+            if next_request and len(pages) < self.max_pages:
+                pages += await self.fetch_pages(
+                    source, header_args, (on_server(next_request[0]), next_request[1]),
+                    self.max_pages - len(pages), max_retries)
+            return pages
+
+        failure = await self.get_failure(origin_cache_key)
+        if failure:
+            if cached_data:
+                logger.warning(f"{url} failed recently ({failure}), returning stale cached pages")
+                self.stats.stale_served += 1
+                return self.serve_stale(url, cached_data)
+            raise FetchFailure(url, f"failed recently ({failure}), not retrying yet")
+        if cached_data and not revalidate and self.is_revalidating_stale(
+            origin_cache_key, url, manifest_headers
+        ):
+            logger.warning(f"revalidating {url} in the background, returning stale cached pages")
+            self.revalidate_in_background(origin_cache_key, source)
+            return self.serve_stale(url, cached_data)
+
+        try:
+            pages = await self.call_servers(source, url, fetch)
+        except CircuitOpen:
+            if cached_data:
+                logger.warning(f"circuit of {url} is open, returning stale cached pages")
+                self.stats.stale_served += 1
+                return self.serve_stale(url, cached_data)
+            raise
+        except Exception as e:
+            await self.remember_failure(origin_cache_key, url, e)
+            if cached_data and not revalidate and self.can_serve_stale(e, url, manifest_headers):
+                logger.warning(f"revalidation of {url} failed: {e}, returning stale cached pages")
+                self.failed_revalidations.add(origin_cache_key)
+                return self.serve_stale(url, cached_data)
+            raise
+        self.failed_revalidations.discard(origin_cache_key)
+
+        changed = any(page.changed for page in pages)
+        if cached_data and not changed and len(pages) == len(cached_data):
+            self.stats.revalidations += 1
+        if revalidate and changed:
+            self.stats.refreshes_modified += 1
+        manifest_headers = await self.store_pages(origin_cache_key, page_urls or [], pages)
+        self.set_expiry(origin_cache_key, url, manifest_headers)
+        return [page.data for page in pages]
+
+    async def revalidate_pages(
+        self,
+        source: RestDataSource,
+        header_args: dict,
+        page_urls: list[str],
+        cached_pages: list[tuple[list, CachedHeaders | None]],
+        on_server: Callable[[str], str],
+        max_retries: int,
+    ) -> tuple[list[CachedPage], tuple[str, dict] | None]:
+        """
+        Revalidate the cached pages concurrently, bounded by the host's page concurrency.
+        A changed page may lead to other pages than before, the pages after it are dropped then.
+        Returns the pages, and the request of the next page to fetch if any.
+        """
+        semaphore = self.get_host_semaphore(on_server(page_urls[0]))
+
+        async def revalidate(page_url: str, headers: CachedHeaders | None):
+            url, query_params = split_page_url(on_server(page_url))
+            async with semaphore:
+                return await send_timed_request(
+                    client=self.client,
+                    method=HttpMethods.GET,
+                    url=url,
+                    params=query_params,
+                    headers=add_caching_headers(header_args, headers),
+                    json_data=None,
+                    timeout=source.timeout or self.timeout,
+                    max_retries=max_retries,
+                    retry_backoff=self.retry_backoff,
+                )
+
+        start_time = time.time()
+        responses = await asyncio.gather(*(
+            revalidate(page_url, headers) for page_url, (_, headers) in zip(page_urls, cached_pages)))
+
+        pages = []
+        next_request = None
+        bytes_received = 0
+        wire_bytes = 0
+        for page_url, (cached, cached_headers), (response, _, _) in zip(page_urls, cached_pages, responses):
+            headers = get_caching_headers(cached_headers, response.headers)
+            if response.status_code == HttpGoodStatuses.NOT_MODIFIED:
+                self.stats.pages_not_modified += 1
+                pages.append(CachedPage(page_url, cached[0], headers, changed=False))
+                continue
+            data = await FetchedPage(response).async_json(self.decode_offload_bytes)
+            self.stats.pages_changed += 1
+            bytes_received += len(response.content)
+            wire_bytes += response.num_bytes_downloaded
+            pages.append(CachedPage(page_url, data, headers, changed=True))
+            next_request = self.on_first_server(
+                source, get_next_page(source.pagination, page_url, data))
+            cached_next_request = self.on_first_server(
+                source, get_next_page(source.pagination, page_url, cached[0]))
+            if not is_same_page(next_request, cached_next_request):
+                logger.debug(f"the pages following {page_url} changed")
+                break
+        else:
+            next_request = None
+
+        self.stats.update(requests_issued=sum(issued for _, issued, _ in responses),
+                          bytes_received=bytes_received,
+                          wire_bytes=wire_bytes,
+                          fetching_time=time.time() - start_time,
+                          page_latencies=[latency for _, _, latency in responses])
+        return pages, next_request
+
+    async def fetch_pages(
+        self,
+        source: RestDataSource,
+        header_args: dict,
+        request: tuple[str, dict],
+        max_pages: int,
+        max_retries: int,
+    ) -> list[CachedPage]:
+        """Fetch the pages starting from the given request, unconditionally."""
+        url, query_params = request
+        from_api = await async_json_pages_from_api(
+            url=url,
+            header_args=header_args,
+            query_params=query_params,
+            pagination=source.pagination,
+            timeout=source.timeout or self.timeout,
+            max_pages=max_pages,
+            max_retries=max_retries,
+            retry_backoff=self.retry_backoff,
+            client=self.client,
+            page_concurrency=self.get_host_semaphore(url),
+            decode_offload_bytes=self.decode_offload_bytes)
+        logger.debug(f"from_api={from_api.describe()}")
+        if from_api.maybe_more_pages:
+            logger.warning(f"we may have left unfetched pages for url={url}")
+        self.stats.update(requests_issued=from_api.requests_issued,
+                          bytes_received=from_api.bytes_received,
+                          wire_bytes=from_api.wire_bytes or 0,
+                          fetching_time=from_api.fetching_time,
+                          page_latencies=from_api.page_latencies,
+                          pipelined_pages=from_api.pipelined_pages or 0,
+                          decode_block_time=from_api.decode_block_time or 0,
+                          offloaded_decodes=from_api.offloaded_decodes or 0,
+                          offloaded_decode_time=from_api.offloaded_decode_time or 0,
+                          peak_body_bytes=from_api.peak_body_bytes or 0)
+        self.stats.pages_changed += len(from_api.rsp_json_pages or [])
+        return [
+            CachedPage(
+                self.on_first_server(source, (page_url, {}))[0],
+                data, get_caching_headers(None, headers), changed=True)
+            for page_url, data, headers in zip(
+                from_api.page_urls, from_api.rsp_json_pages or [], from_api.page_headers)
+        ]
+
+    async def store_pages(
+        self, origin_cache_key: str, old_page_urls: list[str], pages: list[CachedPage]
+    ) -> CachedHeaders:
+        """
+        Store the changed pages, the validators of the revalidated ones, and the manifest.
+        Pages no longer listed are deleted.
+        """
+        manifest_key = get_manifest_key(origin_cache_key)
+        manifest_headers = get_manifest_headers(pages)
+        page_urls = [page.url for page in pages]
+        if manifest_headers.no_store:
+            logger.debug("the origin forbids storing some of the pages, not caching")
+            self.stats.no_store_responses += 1
+            await asyncio.gather(
+                self.cache.async_delete(key=manifest_key, with_headers=True),
+                *(self.cache.async_delete(key=get_page_key(origin_cache_key, page_url), with_headers=True)
+                  for page_url in {*old_page_urls, *page_urls}))
+            return manifest_headers
+
+        await asyncio.gather(*(
+            self.cache.async_set(
+                key=get_page_key(origin_cache_key, page.url), data=[page.data], headers=page.headers)
+            if page.changed else
+            self.cache.async_set_headers(
+                key=get_page_key(origin_cache_key, page.url), headers=page.headers)
+            for page in pages))
+        await asyncio.gather(*(
+            self.cache.async_delete(key=get_page_key(origin_cache_key, page_url), with_headers=True)
+            for page_url in set(old_page_urls) - set(page_urls)))
+        await self.cache.async_set(
+            key=manifest_key, data={"pages": page_urls}, headers=manifest_headers)
+        return manifest_headers
+
+    async def fetch_from_api(
+        self,
+        url: str,
+        header_args: dict,
+        query_params: dict,
+        source: RestDataSource,
+        streamed: bool,
+        max_retries: int,
+    ) -> FromAPI:
+        if streamed:
+            return await async_stream_json_from_api(
+                url=url,
+                header_args=header_args,
+                query_params=query_params,
+                stream_paths=source.stream_paths,
+                stream_min_bytes=self.stream_min_bytes,
+                timeout=source.timeout or self.timeout,
+                max_retries=max_retries,
+                retry_backoff=self.retry_backoff,
+                client=self.client,
+                method=source.method,
+                json_data=source.data_args,
+            )
+        return await async_json_pages_from_api(
+            url = url,
+            header_args = header_args,
+            query_params=query_params,
+            pagination = source.pagination,
+            timeout=source.timeout or self.timeout,
+            max_pages = self.max_pages,
+            max_retries=max_retries,
+            retry_backoff=self.retry_backoff,
+            client=self.client,
+            page_concurrency=self.get_host_semaphore(url),
+            decode_offload_bytes=self.decode_offload_bytes,
+            method=source.method,
+            json_data=source.data_args)
+
+    def sync_delta(
+        self,
+        pagination: BaseModel,
+        cached_data: list | None,
+        new_data: list | None,
+        watermark: any,
+        new_watermark: any,
+    ) -> list | None:
+        """
+        The cached pages with the records of the delta fetched since the watermark,
+        trimmed to the retention, None when nothing changed.
+        On a full fetch (no watermark yet) the fetched pages are only trimmed.
+        """
+        if not new_data:
+            return None
+        if watermark is None:
+            pages, added = new_data, 0
+        else:
+            pages, added = merge_delta(cached_data, new_data, pagination, watermark)
+            self.stats.delta_syncs += 1
+            self.stats.delta_records += added
+        pages, dropped = trim_pages(pages, pagination, new_watermark)
+        self.stats.trimmed_records += dropped
+        if watermark is not None and not added and not dropped:
+            logger.debug("no new records since the watermark")
+            return None
+        return pages
+
+    async def call_servers(
+        self,
+        source: RestDataSource,
+        url: str,
+        fetch: Callable[[Callable[[str], str], int], Awaitable[any]],
+    ) -> any:
+        """
+        fetch(on_server, max_retries) on one of the source's servers, chosen by the balancer,
+        on_server moving the urls of the first server to the chosen one.
+        A fetch failing by a timeout, a connection error or a 5xx is retried on the other
+        servers, the last failure is raised. Other failures are the request's, raised at once.
+        """
+        if not source.servers:
+            return await self.call_guarded(url, lambda max_retries: fetch(lambda u: u, max_retries))
+
+        tried = set()
+        while True:
+            server = self.balancer.choose(source.servers, exclude=tried)
+            tried.add(server)
+
+            def on_server(u: str, server: str = server) -> str:
+                return rebase_url(u, source.servers, server)
+
+            self.balancer.start(server)
+            start_time = time.perf_counter()
+            try:
+                result = await self.call_guarded(
+                    on_server(url), lambda max_retries: fetch(on_server, max_retries))
+            except asyncio.CancelledError:
+                self.balancer.finish(server)
+                raise
+            except Exception as e:
+                failure = get_failure_class(e)
+                if not isinstance(e, CircuitOpen) and not is_origin_failure(failure):
+                    # the server answered, the request would fail on the other servers too
+                    self.balancer.finish(server, time.perf_counter() - start_time)
+                    raise
+                # a server rejected by its open circuit is failing already
+                self.balancer.finish(server, success=isinstance(e, CircuitOpen))
+                if len(tried) == len(set(source.servers)):
+                    raise
+                logger.warning(f"fetching from {server} failed: {e}, failing over")
+                self.stats.server_failovers += 1
+                continue
+            self.balancer.finish(server, time.perf_counter() - start_time)
+            return result
+
+    async def call_guarded(self, url: str, fetch: Callable[[int], Awaitable[any]]) -> any:
+        """fetch(max_retries) through the circuit breaker of the url's origin host."""
+        breaker = self.get_circuit_breaker(url)
+        if breaker and not breaker.allow_request():
+            self.stats.circuit_rejections += 1
+            raise CircuitOpen(url)
+
+        # a half-open circuit probes the origin with a single attempt
+        probing = breaker is not None and breaker.state == CircuitState.HALF_OPEN
+        try:
+            result = await fetch(1 if probing else self.max_retries)
+        except asyncio.CancelledError:
+            if breaker:
+                breaker.release()
+            raise
+        except Exception as e:
+            if breaker:
+                failure = get_failure_class(e)
+                if is_origin_failure(failure):
+                    self.record_circuit_result(url, breaker, success=False)
+                elif failure.isdigit():
+                    # the origin answered, it rejected the request
+                    self.record_circuit_result(url, breaker, success=True)
+                else:
+                    breaker.release()
+            raise
+        if breaker:
+            self.record_circuit_result(url, breaker, success=True)
+        return result
+
+    async def get_failure(self, origin_cache_key: str) -> str | None:
+        """Class of the recent failure to fetch the source, None if it did not fail recently."""
+        if not self.cache or not (self.negative_ttl or self.negative_ttls):
+            return None
+        return await self.cache.async_get_negative(origin_cache_key)
+
+    async def remember_failure(self, origin_cache_key: str, url: str, error: Exception) -> None:
+        if not self.cache or isinstance(error, FetchFailure):
+            return
+        failure = get_failure_class(error)
+        ttl = self.get_negative_ttl(failure)
+        if ttl:
+            logger.warning(f"fetching {url} failed ({failure}), not retrying it for {ttl}s")
+            await self.cache.async_set_negative(origin_cache_key, failure, ttl)
+
+    def can_serve_stale(self, error: Exception, url: str, headers: CachedHeaders | None) -> bool:
+        """Stale cached data is served when the origin times out or fails with a 5xx, within the window."""
+        failure = get_failure_class(error)
+        if failure != "timeout" and not (failure.isdigit() and failure.startswith("5")):
+            return False
+        if not self.is_within_stale_if_error(url, headers):
+            return False
+        self.stats.stale_if_error += 1
+        return True
+
+    def is_within_stale_if_error(self, url: str, headers: CachedHeaders | None) -> bool:
+        return bool(headers) and headers.is_stale_usable(self.stale_if_error, self.get_min_revalidate(url))
+
+    def is_revalidating_stale(
+        self, origin_cache_key: str, url: str, headers: CachedHeaders | None
+    ) -> bool:
+        """The last revalidation of the entry failed and its stale data can still be served."""
+        if origin_cache_key not in self.failed_revalidations:
+            return False
+        if not self.is_within_stale_if_error(url, headers):
+            # past the window the requests wait for the origin again
+            self.failed_revalidations.discard(origin_cache_key)
+            return False
+        self.stats.stale_if_error += 1
+        return True
+
+    def revalidate_in_background(self, origin_cache_key: str, source: RestDataSource) -> None:
+        if origin_cache_key in self.stale_revalidations:
+            return
+        task = asyncio.create_task(self.revalidate_stale(source))
+        self.stale_revalidations[origin_cache_key] = task
+        task.add_done_callback(lambda _: self.stale_revalidations.pop(origin_cache_key, None))
+
+    async def revalidate_stale(self, source: RestDataSource) -> None:
+        # not part of the request that started it
+        stale_sources.set(None)
+        self.stats.stale_revalidations += 1
+        try:
+            await self.refresh_source(source)
+        except Exception as e:
+            logger.warning(f"background revalidation of {source.url_template} failed: {e}")
+
+    def serve_stale(self, url: str, cached_data: list[any]) -> list[any]:
+        """Flag the stale cached data of the url in the metadata of the request's response."""
+        stale = stale_sources.get()
+        if stale is not None:
+            stale.append(url)
+        return cached_data
+
+    def get_negative_ttl(self, failure: str) -> float:
+        """Seconds the failure is remembered, by its status, its status class, or for all failures."""
+        if failure in self.negative_ttls:
+            return self.negative_ttls[failure]
+        status_class = f"{failure[0]}xx" if failure.isdigit() else None
+        return self.negative_ttls.get(status_class, self.negative_ttl)
+
+    def on_first_server(
+        self, source: RestDataSource, request: tuple[str, dict] | None
+    ) -> tuple[str, dict] | None:
+        """The request moved to the first server, page urls are cached independently of the server."""
+        if not request or not source.servers:
+            return request
+        return rebase_url(request[0], source.servers, source.servers[0]), request[1]
+
+    def get_circuit_breaker(self, url: str) -> CircuitBreaker | None:
+        """Circuit breaker of the url's origin host, None when the breakers are disabled."""
+        if not self.circuit_failures:
+            return None
+        host = httpx.URL(url).netloc.decode()
+        if host not in self.circuit_breakers:
+            self.circuit_breakers[host] = CircuitBreaker(self.circuit_failures, self.circuit_reset)
+        return self.circuit_breakers[host]
+
+    def record_circuit_result(self, url: str, breaker: CircuitBreaker, success: bool) -> None:
+        if success:
+            breaker.record_success()
+        elif breaker.record_failure():
+            logger.warning(f"origin of {url} keeps failing, opening its circuit")
+            self.stats.circuit_opens += 1
+        self.stats.set_circuit_state(httpx.URL(url).netloc.decode(), breaker.state)
+
+    def get_min_revalidate(self, url: str) -> float:
+        """Seconds the cached data of the url's origin host is fresh when it sent no freshness headers."""
+        netloc = httpx.URL(url).netloc.decode()
+        return self.min_revalidate_hosts.get(netloc, self.min_revalidate)
+
+    def set_expiry(self, origin_cache_key: str, url: str, headers: CachedHeaders | None) -> None:
+        """Tell the refresh-ahead scheduler when the cached entry goes stale."""
+        if not self.refresher:
+            return
+        expires_at = None
+        if headers and not headers.no_store:
+            expires_at = headers.expires_at(self.get_min_revalidate(url))
+        self.refresher.set_expiry(origin_cache_key, expires_at)
+
+    def get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """Limit of the pages fetched at once from the url's origin host, shared by all fetches."""
+        host = httpx.URL(url).netloc.decode()
+        if host not in self.host_semaphores:
+            self.host_semaphores[host] = asyncio.Semaphore(self.max_concurrent_pages)
+        return self.host_semaphores[host]
+
     async def get_from_cache(self, origin_cache_key) -> tuple[any, any]:
         if self.cache:
             logger.debug(f"looking up the origin cache for origin_cache_key={origin_cache_key}")
@@ -0,0 +1,67 @@
+import hashlib
+
+import httpx
+
+from ..models import CachedHeaders
+from ..utils import get_logger
+from .httpx_helper import HttpPagination, extract_json_path, get_next_request
+
+logger = get_logger("page_cache")
+
+
+class CachedPage:
+    """One page of a page-cached source, with its own validators."""
+
+    def __init__(self, url: str, data: any, headers: CachedHeaders | None, changed: bool):
+        self.url = url
+        self.data = data
+        self.headers = headers
+        # transferred by this fetch, rather than revalidated by a 304
+        self.changed = changed
+
+
+def get_manifest_key(origin_cache_key: str) -> str:
+    return f"{origin_cache_key}::manifest"
+
+
+def get_page_key(origin_cache_key: str, page_url: str) -> str:
+    """Pages are keyed by their url, a page keeps its entry when the pages before it change."""
+    return f"{origin_cache_key}::page::{hashlib.sha256(page_url.encode()).hexdigest()}"
+
+
+def get_page_url(url: str, query_params: dict | None) -> str:
+    """Full url of the page, as sent by the client."""
+    return str(httpx.URL(url).copy_merge_params(query_params or {}))
+
+
+def split_page_url(page_url: str) -> tuple[str, dict]:
+    """Url and query parameters of the page, the client replaces the query of the url by the parameters."""
+    url = httpx.URL(page_url)
+    return str(url.copy_with(query=None)), dict(url.params)
+
+
+def get_next_page(pagination: HttpPagination, page_url: str, page: any) -> tuple[str, dict] | None:
+    """Url and query parameters of the page following the given one, None if it is the last."""
+    return get_next_request(
+        pagination, *split_page_url(page_url), lambda path: extract_json_path(page, path))
+
+
+def is_same_page(request: tuple[str, dict] | None, other: tuple[str, dict] | None) -> bool:
+    if request is None or other is None:
+        return request is other
+    return get_page_url(*request) == get_page_url(*other)
+
+
+def get_manifest_headers(pages: list[CachedPage]) -> CachedHeaders:
+    """
+    The manifest is fresh while all of its pages are, and is not stored
+    if any of the pages may not be.
+    """
+    headers = [page.headers for page in pages if page.headers]
+    if any(page_headers.no_store for page_headers in headers):
+        return CachedHeaders(no_store=True)
+    max_ages = [page_headers.max_age for page_headers in headers]
+    return CachedHeaders(
+        max_age=min(max_ages) if max_ages and None not in max_ages else None,
+        fetched_at=min((page_headers.fetched_at for page_headers in headers), default=None),
+    )
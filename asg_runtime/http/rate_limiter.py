@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import httpx
+
+from ..models import HttpSettings, RestClientStats
+from ..utils import get_logger
+from .httpx_helper import get_retry_after
+
+logger = get_logger("rate_limiter")
+
+# statuses whose Retry-After pauses all the requests to the host
+THROTTLE_STATUSES = (429, 503)
+
+
+class HostRateLimiter:
+    """
+    Token bucket of one origin host, with a pause shared by all the requests to the host.
+    A rate of 0 does not limit the requests, only the pauses apply.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        # waiters are served in arrival order
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Wait for the pause to end and for a token, returns the time waited."""
+        start = time.monotonic()
+        # the lock is only held across the sleeps, queued behind a throttled request
+        throttled = self._lock.locked()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                delay = self.paused_until - now
+                if delay <= 0:
+                    if not self.rate:
+                        break
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    delay = (1 - self.tokens) / self.rate
+                throttled = True
+                await asyncio.sleep(delay)
+        return time.monotonic() - start if throttled else 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Hold all the requests to the host for the given time, no burst when they resume."""
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0.0
+        self.updated = self.paused_until
+
+
+class RateLimitingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper limiting the rate of the requests per origin host,
+    and pausing all the requests to a host when one of them is told to Retry-After.
+    """
+
+    def __init__(
+        self, transport: httpx.AsyncBaseTransport, settings: HttpSettings, stats: RestClientStats
+    ):
+        self._transport = transport
+        self.rate = settings.http_rate_limit
+        self.burst = settings.http_rate_burst
+        self.stats = stats
+        self.limiters: dict[str, HostRateLimiter] = {}
+
+    def get_limiter(self, host: str) -> HostRateLimiter:
+        if host not in self.limiters:
+            self.limiters[host] = HostRateLimiter(self.rate, self.burst)
+        return self.limiters[host]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.netloc.decode()
+        limiter = self.get_limiter(host)
+        waited = await limiter.acquire()
+        if waited:
+            logger.debug(f"request to {host} throttled for {waited:.3f}s")
+            self.stats.throttled_requests += 1
+            self.stats.throttle_wait_time += waited
+
+        response = await self._transport.handle_async_request(request)
+        if response.status_code in THROTTLE_STATUSES:
+            retry_after = get_retry_after(response.headers)
+            if retry_after:
+                logger.info(f"{host} asked to retry after {retry_after:.3f}s, pausing its requests")
+                limiter.pause(retry_after)
+                self.stats.retry_after_pauses += 1
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+import httpx
+
+from ..models import HttpSettings, RestClientStats, RestDataSource
+from ..utils import get_logger
+
+logger = get_logger("refresh_ahead")
+
+# accesses older than this do not make an entry hot, entries not accessed for this long are dropped
+HOT_WINDOW = 300.0
+# period of the budget of refreshes per host
+BUDGET_PERIOD = 60.0
+# longest time between two scans of the entries
+MAX_TICK = 1.0
+
+
+class RefreshEntry:
+    """Access times and expiry of one origin cache entry."""
+
+    def __init__(self, source: RestDataSource, host: str, min_hits: int):
+        self.source = source
+        self.host = host
+        self.accesses: deque[float] = deque(maxlen=min_hits)
+        self.expires_at: float | None = None
+        self.refreshing = False
+
+    def is_hot(self, now: float) -> bool:
+        return len(self.accesses) == self.accesses.maxlen and now - self.accesses[0] <= HOT_WINDOW
+
+
+class RefreshScheduler:
+    """
+    Background refresh-ahead of hot origin cache entries.
+
+    Entries accessed at least min_hits times within HOT_WINDOW are hot, and are revalidated
+    by the refresh callback once they are due to go stale within refresh_ahead seconds,
+    so the requests keep finding them fresh. Refreshes run a bounded number at once
+    and each origin host gets a budget of refreshes per BUDGET_PERIOD.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[RestDataSource], Awaitable[any]],
+        settings: HttpSettings,
+        stats: RestClientStats,
+    ):
+        self.refresh = refresh
+        self.refresh_ahead = settings.http_refresh_ahead
+        self.min_hits = settings.http_refresh_min_hits
+        self.host_budget = settings.http_refresh_host_budget
+        self.stats = stats
+        self.entries: dict[str, RefreshEntry] = {}
+        # refreshes per host in the current budget period
+        self.host_refreshes: dict[str, int] = {}
+        self.budget_start = time.monotonic()
+        self.semaphore = asyncio.Semaphore(settings.http_refresh_concurrency)
+        self.tasks: set[asyncio.Task] = set()
+        self._loop_task: asyncio.Task | None = None
+
+    def record_access(self, key: str, source: RestDataSource, url: str) -> None:
+        if key not in self.entries:
+            host = httpx.URL(url).netloc.decode()
+            self.entries[key] = RefreshEntry(source, host, self.min_hits)
+        self.entries[key].accesses.append(time.time())
+        # started on first use, the scheduler may be created outside of the event loop
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self.run())
+
+    def set_expiry(self, key: str, expires_at: float | None) -> None:
+        """Time the entry goes stale, None when it is stale right away."""
+        if key in self.entries:
+            self.entries[key].expires_at = expires_at
+
+    async def run(self):
+        tick = min(MAX_TICK, self.refresh_ahead / 2)
+        logger.debug(f"refresh-ahead scheduler started, scanning every {tick}s")
+        while True:
+            await asyncio.sleep(tick)
+            self.schedule_due()
+
+    def schedule_due(self) -> None:
+        now = time.time()
+        if time.monotonic() - self.budget_start >= BUDGET_PERIOD:
+            self.host_refreshes.clear()
+            self.budget_start = time.monotonic()
+
+        for key, entry in list(self.entries.items()):
+            if now - entry.accesses[-1] > HOT_WINDOW:
+                logger.debug(f"dropping cold entry {key}")
+                del self.entries[key]
+                continue
+            if entry.refreshing or entry.expires_at is None or not entry.is_hot(now):
+                continue
+            if entry.expires_at - now > self.refresh_ahead:
+                continue
+            if self.host_refreshes.get(entry.host, 0) >= self.host_budget:
+                self.stats.refresh_budget_skips += 1
+                continue
+            self.host_refreshes[entry.host] = self.host_refreshes.get(entry.host, 0) + 1
+            entry.refreshing = True
+            task = asyncio.create_task(self.refresh_entry(key, entry))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def refresh_entry(self, key: str, entry: RefreshEntry) -> None:
+        try:
+            async with self.semaphore:
+                logger.debug(f"refreshing {key} ahead of its expiry")
+                self.stats.refreshes += 1
+                await self.refresh(entry.source)
+        except Exception as e:
+            logger.warning(f"refresh-ahead of {entry.source.url_template} failed: {e}")
+            self.stats.refresh_failures += 1
+            # retried once the entry is accessed again
+            entry.expires_at = None
+        finally:
+            entry.refreshing = False
+
+    async def aclose(self) -> None:
+        tasks = [*self.tasks, *([self._loop_task] if self._loop_task else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
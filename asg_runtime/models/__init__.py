@@ -8,6 +8,7 @@ from .http import (
     RestDataSource,
 )
 from .settings import (
+    BalancePolicies,
     CacheBackends,
     CacheConfigDisk,
     CacheConfigLru,
@@ -18,13 +19,16 @@ from .settings import (
     LogFlavors,
     LoggingSettings,
     Settings,
+    TransformSettings,
 )
 from .stats import (
     AppStats,
     CacheStats,
+    NormalizerStats,
     RestClientStats,
     SerializerStats,
     Stats,
+    TransformStats,
 )
 
 __all__ = [
@@ -38,12 +42,16 @@ __all__ = [
     "CacheConfigDisk",
     "CacheConfigRedis",
     "HttpSettings",
+    "BalancePolicies",
+    "TransformSettings",
     "Encodings",
     "RestDataSource",
     # Stats
     "CacheStats",
     "AppStats",
     "RestClientStats",
+    "NormalizerStats",
+    "TransformStats",
     "Stats",
     "SerializerStats",
     # Endpoint Spec
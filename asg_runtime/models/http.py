@@ -1,4 +1,6 @@
 import hashlib
+import json
+import time
 from enum import Enum
 from urllib.parse import urlencode
 
@@ -80,10 +82,28 @@ class RestDataSource(BaseModel):
     header_args: dict | None = {}
     timeout: int | None = None
     pagination: BaseModel | None = None
-
-    def hash_contents(self):
+    # paths of the datasets in the response, the rest of a streamed response is dropped
+    stream_paths: list[str] | None = None
+    # replicas of the origin, the url_template is relative to them when given
+    servers: list[str] | None = None
+    # the servers are federated nodes instead, fetched all at once (deadline, min_nodes)
+    fan_out: BaseModel | None = None
+    # POST sources send the data arguments as their json body
+    method: str = "GET"
+    data_args: dict | None = None
+
+    def hash_contents(self, with_stream_paths: bool = False):
         sorted_params = urlencode(sorted(self.parameter_args.items()))
         raw_key = f"{self.url_template}?{sorted_params}"
+        if self.method != "GET" or self.data_args:
+            raw_key = f"{self.method} {raw_key} " + json.dumps(
+                self.data_args or {}, sort_keys=True, default=str)
+        if self.servers:
+            # independent of the server the data is fetched from, the replicas share it
+            raw_key = ",".join(sorted(self.servers)) + "|" + raw_key
+        if with_stream_paths and self.stream_paths:
+            # streamed responses keep only these paths
+            raw_key += "#" + ",".join(sorted(self.stream_paths))
         return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
 
 
@@ -98,3 +118,36 @@ class HttpHeaders(Enum):
 class CachedHeaders(BaseModel):
     etag: str | None = None
     last_mod: str | None = None
+    # freshness lifetime set by Cache-Control or Expires, None when the origin sent neither
+    max_age: float | None = None
+    # the origin forbids storing the response
+    no_store: bool = False
+    # epoch time the response was received or last revalidated
+    fetched_at: float | None = None
+    # high-water mark of the records of a time-based source synced incrementally
+    watermark: int | float | str | None = None
+
+    def expires_at(self, default_max_age: float = 0.0) -> float | None:
+        """
+        Epoch time the cached data goes stale, None when it is stale right away,
+        default_max_age applies when the origin did not tell the freshness lifetime.
+        """
+        max_age = self.max_age if self.max_age is not None else default_max_age
+        if not max_age or self.fetched_at is None:
+            return None
+        return self.fetched_at + max_age
+
+    def is_fresh(self, default_max_age: float = 0.0) -> bool:
+        """Whether the cached data can be served without contacting the origin."""
+        expires_at = self.expires_at(default_max_age)
+        return expires_at is not None and time.time() < expires_at
+
+    def is_stale_usable(self, stale_if_error: float, default_max_age: float = 0.0) -> bool:
+        """
+        Whether the stale cached data can be served when the origin fails,
+        up to stale_if_error seconds past its expiry.
+        """
+        if not stale_if_error or self.fetched_at is None:
+            return False
+        expires_at = self.expires_at(default_max_age) or self.fetched_at
+        return time.time() < expires_at + stale_if_error
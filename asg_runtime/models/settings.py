@@ -3,7 +3,7 @@ from pathlib import Path
 from dotenv import dotenv_values
 from typing import Annotated
 from pydantic import BaseModel, Field, ValidationError, model_validator
-from enum import Enum
+from enum import Enum, StrEnum
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import logging
 logger = logging.getLogger("settings")
@@ -19,12 +19,63 @@ class LoggingSettings(BaseModel):
     log_level: str
     logging_flavor: LogFlavors
 
+class BalancePolicies(StrEnum):
+    least_outstanding = "least_outstanding"
+    ewma = "ewma"
+
 # HTTP settings
 class HttpSettings(BaseModel):
     http_timeout: Annotated[int, Field(strict=True, ge=0)]
     http_max_pages: Annotated[int, Field(strict=True, ge=0)]
     http_max_retries: Annotated[int, Field(strict=True, ge=0)]
     http_retry_backoff: Annotated[float, Field(strict=True, ge=0.0)]
+    http_max_connections: Annotated[int, Field(strict=True, ge=1)] = 100
+    http_max_keepalive_connections: Annotated[int, Field(strict=True, ge=0)] = 20
+    http_keepalive_expiry: Annotated[float, Field(strict=True, ge=0.0)] = 5.0
+    http2: bool = False
+    http_max_concurrent_pages: Annotated[int, Field(strict=True, ge=1)] = 8
+    http_decode_offload_bytes: Annotated[int, Field(strict=True, ge=0)] = 1048576
+    http_stream_min_bytes: Annotated[int, Field(strict=True, ge=0)] = 0
+    http_rate_limit: Annotated[float, Field(strict=True, ge=0.0)] = 0.0
+    http_rate_burst: Annotated[int, Field(strict=True, ge=1)] = 10
+    http_circuit_failures: Annotated[int, Field(strict=True, ge=0)] = 5
+    http_circuit_reset: Annotated[float, Field(strict=True, ge=0.0)] = 30.0
+    http_hedge_percentile: Annotated[float, Field(strict=True, ge=0.0, le=100.0)] = 0.0
+    http_hedge_budget: Annotated[float, Field(strict=True, ge=0.0, le=1.0)] = 0.05
+    http_max_concurrent_sources: Annotated[int, Field(strict=True, ge=1)] = 8
+    http_max_dependent_calls: Annotated[int, Field(strict=True, ge=0)] = 1000
+    http_min_revalidate: Annotated[float, Field(strict=True, ge=0.0)] = 0.0
+    http_min_revalidate_hosts: dict[str, float] = {}
+    http_refresh_ahead: Annotated[float, Field(strict=True, ge=0.0)] = 0.0
+    http_refresh_min_hits: Annotated[int, Field(strict=True, ge=1)] = 3
+    http_refresh_concurrency: Annotated[int, Field(strict=True, ge=1)] = 2
+    http_refresh_host_budget: Annotated[int, Field(strict=True, ge=0)] = 30
+    http_page_cache: bool = False
+    http_balance_policy: BalancePolicies = BalancePolicies.least_outstanding
+    http_server_eject: Annotated[float, Field(strict=True, ge=0.0)] = 30.0
+    http_compression: bool = True
+    http_negative_ttl: Annotated[float, Field(strict=True, ge=0.0)] = 0.0
+    http_negative_ttls: dict[str, float] = {}
+    http_stale_if_error: Annotated[float, Field(strict=True, ge=0.0)] = 0.0
+
+# Transform settings
+class TransformSettings(BaseModel):
+    transform_chunk_rows: Annotated[int, Field(strict=True, ge=0)]
+    transform_memory_budget_mb: Annotated[int, Field(strict=True, ge=1)]
+    transform_spill_dir: Path | None = None
+    transform_workers: Annotated[int, Field(strict=True, ge=0)] = 0
+
+    @property
+    def chunked(self) -> bool:
+        return self.transform_chunk_rows > 0
+
+    @property
+    def parallel(self) -> bool:
+        return self.transform_workers > 0
+
+    @property
+    def memory_budget(self) -> int:
+        return self.transform_memory_budget_mb * 1024 * 1024
 
 class Encodings(str, Enum):
     noop = "noop"
@@ -88,6 +139,78 @@ class Settings(MyBaseSettings):
     http_max_pages: Annotated[int, Field(strict=True, ge=0)] = 11
     http_max_retries: Annotated[int, Field(strict=True, ge=0)] = 11
     http_retry_backoff: Annotated[float, Field(strict=True, ge=0.0)] = 0.1
+    # connection pool of the client shared by all origin fetches
+    http_max_connections: Annotated[int, Field(strict=True, ge=1)] = 100
+    http_max_keepalive_connections: Annotated[int, Field(strict=True, ge=0)] = 20
+    http_keepalive_expiry: Annotated[float, Field(strict=True, ge=0.0)] = 5.0
+    # requires the http2 extra
+    http2: bool = False
+    # pages fetched at once from one origin host, when the number of pages is known
+    http_max_concurrent_pages: Annotated[int, Field(strict=True, ge=1)] = 8
+    # bodies of at least this many bytes are decoded in a worker thread, 0 decodes all inline
+    http_decode_offload_bytes: Annotated[int, Field(strict=True, ge=0)] = 1048576
+    # single page bodies of at least this many bytes are parsed as they arrive,
+    # 0 disables streaming, requires the stream extra
+    http_stream_min_bytes: Annotated[int, Field(strict=True, ge=0)] = 0
+    # requests per second to one origin host, 0 does not limit the rate,
+    # Retry-After of any request pauses all the requests to its host either way
+    http_rate_limit: Annotated[float, Field(strict=True, ge=0.0)] = 0.0
+    http_rate_burst: Annotated[int, Field(strict=True, ge=1)] = 10
+    # consecutive failed fetches opening the circuit of an origin host (0 disables the breakers),
+    # and seconds before an open circuit lets a probe fetch through
+    http_circuit_failures: Annotated[int, Field(strict=True, ge=0)] = 5
+    http_circuit_reset: Annotated[float, Field(strict=True, ge=0.0)] = 30.0
+    # GETs slower than this percentile of their host's recent latencies are sent again,
+    # the first response wins, 0 disables hedging;
+    # the budget is the most hedges as a fraction of all the requests
+    http_hedge_percentile: Annotated[float, Field(strict=True, ge=0.0, le=100.0)] = 0.0
+    http_hedge_budget: Annotated[float, Field(strict=True, ge=0.0, le=1.0)] = 0.05
+    # origin sources fetched at once, e.g. the calls of an api depending on another api's values
+    http_max_concurrent_sources: Annotated[int, Field(strict=True, ge=1)] = 8
+    # calls made for the values of a dependent api's reference arguments, 0 does not limit
+    http_max_dependent_calls: Annotated[int, Field(strict=True, ge=0)] = 1000
+    # seconds cached origin data is served without revalidation when the origin
+    # sends no Cache-Control or Expires, by origin host (host:port) or for all hosts
+    http_min_revalidate: Annotated[float, Field(strict=True, ge=0.0)] = 0.0
+    http_min_revalidate_hosts: dict[str, float] = {}
+    # hot origin cache entries (min_hits accesses in the last 5 minutes) are revalidated
+    # in the background this many seconds before they go stale, 0 disables;
+    # a bounded number at once, and at most host_budget per origin host per minute
+    http_refresh_ahead: Annotated[float, Field(strict=True, ge=0.0)] = 0.0
+    http_refresh_min_hits: Annotated[int, Field(strict=True, ge=1)] = 3
+    http_refresh_concurrency: Annotated[int, Field(strict=True, ge=1)] = 2
+    http_refresh_host_budget: Annotated[int, Field(strict=True, ge=0)] = 30
+    # paginated origin data is cached page by page, each page revalidated on its own
+    # and only the changed pages transferred, a manifest entry lists the pages
+    http_page_cache: bool = False
+    # requests to an origin listing several servers go to the one with the least
+    # requests in flight or the lowest latency (ewma), a failing server is skipped
+    # for this many seconds and its requests fail over to the other servers
+    http_balance_policy: BalancePolicies = BalancePolicies.least_outstanding
+    http_server_eject: Annotated[float, Field(strict=True, ge=0.0)] = 30.0
+    # ask the origins for compressed bodies, with the codecs installed (gzip and deflate,
+    # br and zstd with the compression extra)
+    http_compression: bool = True
+    # seconds a failed origin fetch is remembered in the origin cache, the fetches of the
+    # source fail right away meanwhile (or serve stale data); by failure class: a status
+    # (404), a status class (4xx, 5xx), timeout, connection or error, or for all failures;
+    # 0 disables
+    http_negative_ttl: Annotated[float, Field(strict=True, ge=0.0)] = 0.0
+    http_negative_ttls: dict[str, float] = {}
+    # seconds past its expiry the cached origin data is served, flagged stale, when its
+    # revalidation fails with a timeout or a 5xx, the origin is then revalidated in the
+    # background; 0 disables
+    http_stale_if_error: Annotated[float, Field(strict=True, ge=0.0)] = 0.0
+
+    # 0 disables the chunked transform mode
+    transform_chunk_rows: Annotated[int, Field(strict=True, ge=0)] = 0
+    transform_memory_budget_mb: Annotated[int, Field(strict=True, ge=1)] = 256
+    transform_spill_dir: Path | None = None
+    # 0 transforms the exports sequentially
+    transform_workers: Annotated[int, Field(strict=True, ge=0)] = 0
+
+    schema_hints_enabled: bool = False
+    schema_hints_path: Path | None = None
 
     enable_metrics: bool = True
     response_encoding: Encodings = Encodings.orjson
@@ -190,8 +313,45 @@ class Settings(MyBaseSettings):
             http_max_pages=self.http_max_pages,
             http_max_retries=self.http_max_retries,
             http_retry_backoff=self.http_retry_backoff,
+            http_max_connections=self.http_max_connections,
+            http_max_keepalive_connections=self.http_max_keepalive_connections,
+            http_keepalive_expiry=self.http_keepalive_expiry,
+            http2=self.http2,
+            http_max_concurrent_pages=self.http_max_concurrent_pages,
+            http_decode_offload_bytes=self.http_decode_offload_bytes,
+            http_stream_min_bytes=self.http_stream_min_bytes,
+            http_rate_limit=self.http_rate_limit,
+            http_rate_burst=self.http_rate_burst,
+            http_circuit_failures=self.http_circuit_failures,
+            http_circuit_reset=self.http_circuit_reset,
+            http_hedge_percentile=self.http_hedge_percentile,
+            http_hedge_budget=self.http_hedge_budget,
+            http_max_concurrent_sources=self.http_max_concurrent_sources,
+            http_max_dependent_calls=self.http_max_dependent_calls,
+            http_min_revalidate=self.http_min_revalidate,
+            http_min_revalidate_hosts=self.http_min_revalidate_hosts,
+            http_refresh_ahead=self.http_refresh_ahead,
+            http_refresh_min_hits=self.http_refresh_min_hits,
+            http_refresh_concurrency=self.http_refresh_concurrency,
+            http_refresh_host_budget=self.http_refresh_host_budget,
+            http_page_cache=self.http_page_cache,
+            http_balance_policy=self.http_balance_policy,
+            http_server_eject=self.http_server_eject,
+            http_compression=self.http_compression,
+            http_negative_ttl=self.http_negative_ttl,
+            http_negative_ttls=self.http_negative_ttls,
+            http_stale_if_error=self.http_stale_if_error,
         )
     
+    @property
+    def transform(self) -> TransformSettings:
+        return TransformSettings(
+            transform_chunk_rows=self.transform_chunk_rows,
+            transform_memory_budget_mb=self.transform_memory_budget_mb,
+            transform_spill_dir=self.transform_spill_dir,
+            transform_workers=self.transform_workers,
+        )
+
     @property
     def origin_cache(self) -> CacheConfig:
         return CacheConfig(
@@ -225,6 +385,11 @@ class Settings(MyBaseSettings):
             or self.response_encoding == Encodings.orjson
         )
     
+    @property
+    def executor_chunks_transforms(self) -> bool:
+        # chunks are encoded incrementally, which is only supported for orjson
+        return self.transform.chunked and self.derived_rsp_serializer == Encodings.orjson
+
     @property
     def derived_rsp_cache_serializer(self) -> Encodings:
         return Encodings.noop if self.executor_encodes_responses else self.response_encoding
@@ -273,6 +438,47 @@ class Settings(MyBaseSettings):
                 "max_pages": self.http.http_max_pages,
                 "max_retries": self.http.http_max_retries,
                 "retry_backoff": self.http.http_retry_backoff,
+                "max_connections": self.http.http_max_connections,
+                "max_keepalive_connections": self.http.http_max_keepalive_connections,
+                "keepalive_expiry": self.http.http_keepalive_expiry,
+                "http2": self.http.http2,
+                "max_concurrent_pages": self.http.http_max_concurrent_pages,
+                "decode_offload_bytes": self.http.http_decode_offload_bytes,
+                "stream_min_bytes": self.http.http_stream_min_bytes,
+                "rate_limit": self.http.http_rate_limit,
+                "rate_burst": self.http.http_rate_burst,
+                "circuit_failures": self.http.http_circuit_failures,
+                "circuit_reset": self.http.http_circuit_reset,
+                "hedge_percentile": self.http.http_hedge_percentile,
+                "hedge_budget": self.http.http_hedge_budget,
+                "max_concurrent_sources": self.http.http_max_concurrent_sources,
+                "max_dependent_calls": self.http.http_max_dependent_calls,
+                "min_revalidate": self.http.http_min_revalidate,
+                "min_revalidate_hosts": self.http.http_min_revalidate_hosts,
+                "refresh_ahead": self.http.http_refresh_ahead,
+                "refresh_min_hits": self.http.http_refresh_min_hits,
+                "refresh_concurrency": self.http.http_refresh_concurrency,
+                "refresh_host_budget": self.http.http_refresh_host_budget,
+                "page_cache": self.http.http_page_cache,
+                "balance_policy": self.http.http_balance_policy,
+                "server_eject": self.http.http_server_eject,
+                "compression": self.http.http_compression,
+                "negative_ttl": self.http.http_negative_ttl,
+                "negative_ttls": self.http.http_negative_ttls,
+                "stale_if_error": self.http.http_stale_if_error,
+            },
+
+            "transform": {
+                "chunk_rows": self.transform_chunk_rows,
+                "memory_budget_mb": self.transform_memory_budget_mb,
+                "spill_dir": str(self.transform_spill_dir) if self.transform_spill_dir else None,
+                "chunked": self.executor_chunks_transforms,
+                "workers": self.transform_workers,
+            },
+
+            "schema_hints": {
+                "enabled": self.schema_hints_enabled,
+                "path": str(self.schema_hints_path) if self.schema_hints_path else None,
             },
 
             "metrics_enabled": self.enable_metrics,
@@ -2,6 +2,7 @@ from pydantic import (
     BaseModel,
     ConfigDict,
     Field,
+    PrivateAttr,
     field_validator,
     model_validator
 )
@@ -100,6 +101,9 @@ class CacheStats(BaseStatsModel):
     set_ops: int = Field(0, ge=0)
     get_ops: int = Field(0, ge=0)
     del_ops: int = Field(0, ge=0)
+    # lookups finding a recent origin failure, and the failures remembered
+    negative_hits: int = Field(0, ge=0)
+    negative_sets: int = Field(0, ge=0)
     serializer_stats: SerializerStats | None = None
 
     def is_zero(self) -> bool:
@@ -124,13 +128,172 @@ class AppStats(BaseStatsModel):
 
 class RestClientStats(BaseStatsModel):
     requests_issued: int = Field(0, ge=0)
+    # bytes of the origin bodies once decoded, and on the wire, compressed by the origin
     bytes_received: int = Field(0, ge=0)
+    wire_bytes: int = Field(0, ge=0)
     fetching_time: float = Field(0, ge=0)
+    # sum of the latencies of the pages, above fetching_time when requests overlap
+    pages: int = Field(0, ge=0)
+    page_latency: float = Field(0, ge=0)
+    pipelined_pages: int = Field(0, ge=0)
+    # time the event loop was blocked decoding bodies inline,
+    # vs. bodies decoded in a worker thread and the time they took there
+    decode_block_time: float = Field(0, ge=0)
+    offloaded_decodes: int = Field(0, ge=0)
+    offloaded_decode_time: float = Field(0, ge=0)
+    # responses parsed as they arrived, and the most raw body bytes held by a fetch
+    streamed_fetches: int = Field(0, ge=0)
+    streamed_records: int = Field(0, ge=0)
+    peak_body_bytes: int = Field(0, ge=0)
+    # requests held by the per-host rate limit or a Retry-After pause, and for how long
+    throttled_requests: int = Field(0, ge=0)
+    throttle_wait_time: float = Field(0, ge=0)
+    retry_after_pauses: int = Field(0, ge=0)
+    # circuit breakers of the origin hosts
+    circuit_opens: int = Field(0, ge=0)
+    circuit_rejections: int = Field(0, ge=0)
+    stale_served: int = Field(0, ge=0)
+    # stale cached data served on failed revalidations, and the background revalidations then run
+    stale_if_error: int = Field(0, ge=0)
+    stale_revalidations: int = Field(0, ge=0)
+    # duplicates of slow requests, and the ones answered before the original
+    hedges_sent: int = Field(0, ge=0)
+    hedges_won: int = Field(0, ge=0)
+    # cached origin data served while fresh, revalidated by a 304, and responses not to store
+    fresh_hits: int = Field(0, ge=0)
+    revalidations: int = Field(0, ge=0)
+    no_store_responses: int = Field(0, ge=0)
+    # background revalidations of hot entries ahead of their staleness
+    refreshes: int = Field(0, ge=0)
+    refreshes_modified: int = Field(0, ge=0)
+    refresh_failures: int = Field(0, ge=0)
+    refresh_budget_skips: int = Field(0, ge=0)
+    # incremental fetches of time-based sources, the records they added and retention dropped
+    delta_syncs: int = Field(0, ge=0)
+    delta_records: int = Field(0, ge=0)
+    trimmed_records: int = Field(0, ge=0)
+    # pages of page-cached sources revalidated by a 304, and transferred again when changed
+    pages_not_modified: int = Field(0, ge=0)
+    pages_changed: int = Field(0, ge=0)
+    # requests of multi-server origins retried on another server, and servers ejected
+    server_failovers: int = Field(0, ge=0)
+    server_ejections: int = Field(0, ge=0)
+    # fetches fanned out to the nodes of a federation, the nodes that failed or missed
+    # the deadline, and the fetches returning the results of only some of the nodes
+    fan_outs: int = Field(0, ge=0)
+    node_failures: int = Field(0, ge=0)
+    node_timeouts: int = Field(0, ge=0)
+    partial_results: int = Field(0, ge=0)
+    # connection pool of the shared client
+    pooled_requests: int = Field(0, ge=0)
+    connections_opened: int = Field(0, ge=0)
+    peak_in_flight: int = Field(0, ge=0)
+    peak_in_use: int = Field(0, ge=0)
+    _pool_size: int = PrivateAttr(0)
+    _circuit_states: dict[str, str] = PrivateAttr(default_factory=dict)
+    # fetches and their total latency, by federated node
+    _node_latencies: dict[str, list] = PrivateAttr(default_factory=dict)
 
-    def update(self, requests_issued: int, bytes_received: int, fetching_time: float):
+    def update(
+        self,
+        requests_issued: int,
+        bytes_received: int,
+        fetching_time: float,
+        page_latencies: list[float] | None = None,
+        pipelined_pages: int = 0,
+        decode_block_time: float = 0,
+        offloaded_decodes: int = 0,
+        offloaded_decode_time: float = 0,
+        peak_body_bytes: int = 0,
+        streamed_records: int | None = None,
+        wire_bytes: int = 0,
+    ):
         self.requests_issued += requests_issued
         self.bytes_received += bytes_received
+        self.wire_bytes += wire_bytes
         self.fetching_time += fetching_time
+        if page_latencies:
+            self.pages += len(page_latencies)
+            self.page_latency += sum(page_latencies)
+        self.pipelined_pages += pipelined_pages
+        self.decode_block_time += decode_block_time
+        self.offloaded_decodes += offloaded_decodes
+        self.offloaded_decode_time += offloaded_decode_time
+        self.peak_body_bytes = max(self.peak_body_bytes, peak_body_bytes)
+        if streamed_records is not None:
+            self.streamed_fetches += 1
+            self.streamed_records += streamed_records
+
+    def set_pool_size(self, pool_size: int):
+        self._pool_size = pool_size
+
+    def set_circuit_state(self, host: str, state: str):
+        self._circuit_states[host] = str(state)
+
+    @property
+    def circuit_states(self) -> dict[str, str]:
+        return dict(self._circuit_states)
+
+    def record_node_latency(self, node: str, latency: float):
+        fetches, total = self._node_latencies.get(node, [0, 0.0])
+        self._node_latencies[node] = [fetches + 1, total + latency]
+
+    @property
+    def node_latencies(self) -> dict[str, float]:
+        """Average latency of the fetches of each federated node."""
+        return {node: total / fetches for node, (fetches, total) in self._node_latencies.items()}
+
+    @property
+    def connection_reuse_rate(self) -> float:
+        if not self.pooled_requests:
+            return 0
+        return max(0, 1 - self.connections_opened / self.pooled_requests)
+
+    @property
+    def compression_savings(self) -> float:
+        """Share of the origin bytes compression saved on the wire."""
+        if not self.bytes_received:
+            return 0
+        return max(0, 1 - self.wire_bytes / self.bytes_received)
+
+    @property
+    def pool_utilization(self) -> float:
+        if not self._pool_size:
+            return 0
+        return self.peak_in_use / self._pool_size
+
+    def describe(self) -> dict:
+        result = super().describe()
+        result["connection_reuse_rate"] = round(self.connection_reuse_rate, 2)
+        result["pool_utilization"] = round(self.pool_utilization, 2)
+        result["compression_savings"] = round(self.compression_savings, 2)
+        result["circuit_states"] = self.circuit_states
+        result["node_latencies"] = {
+            node: round(latency, 3) for node, latency in self.node_latencies.items()}
+        return result
+
+class NormalizerStats(BaseStatsModel):
+    fast_normalizations: int = Field(0, ge=0)
+    full_normalizations: int = Field(0, ge=0)
+    fallbacks: int = Field(0, ge=0)
+    schemas_learned: int = Field(0, ge=0)
+
+
+class TransformStats(BaseStatsModel):
+    transforms: int = Field(0, ge=0)
+    parallel_transforms: int = Field(0, ge=0)
+    exports: int = Field(0, ge=0)
+    # wall time of whole transform stages vs. sum of the wall times of their exports,
+    # export_time / transform_time is the speedup of running the exports in parallel
+    transform_time: float = Field(0, ge=0)
+    export_time: float = Field(0, ge=0)
+
+    def update(self, export_times: dict[str, float], transform_time: float, parallel: bool):
+        self.transforms += 1
+        self.parallel_transforms += int(parallel)
+        self.exports += len(export_times)
+        self.transform_time += transform_time
+        self.export_time += sum(export_times.values())
 
 
 class Stats(BaseStatsModel):
@@ -139,3 +302,5 @@ class Stats(BaseStatsModel):
     response_cache: CacheStats | None = None
     origin_cache: CacheStats | None  = None
     responce_encoder: SerializerStats | None  = None
+    normalizer: NormalizerStats | None = None
+    transform: TransformStats | None = None
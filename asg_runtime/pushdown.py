@@ -0,0 +1,133 @@
+from pydantic import BaseModel
+
+from .gin.common.con_spec.spec_helper_models import Pushdown, TransformFunction
+from .utils import get_logger
+
+logger = get_logger("pushdown")
+
+# Registry of the columns read and written by transform functions,
+# maps function name to the names of its params holding the input columns
+# and the names of its params holding the output columns.
+# Projections can only be pushed down when all the transforms are registered here.
+TRANSFORM_COLUMNS: dict[str, tuple[list[str], list[str]]] = {
+    "map_field": (["source"], ["target"]),
+    "multiply_by_value": (["column"], ["output"]),
+    "substract_columns": (["from_col", "other_col"], ["output"]),
+    "concatenate_fields": (["col1", "col2"], ["output"]),
+    "operator": (["col1", "col2"], ["output"]),
+}
+
+
+def register_transform_columns(function: str, inputs: list[str], outputs: list[str]) -> None:
+    TRANSFORM_COLUMNS[function] = (inputs, outputs)
+
+
+class PushdownPlan(BaseModel):
+    query_params: dict[str, str] = {}
+    # number of leading transforms of every pipeline applied by the origin
+    filters: int = 0
+    projection: list[str] | None = None
+
+    def describe(self) -> dict:
+        return self.model_dump()
+
+
+def plan_pushdown(
+    pushdown: Pushdown,
+    pipelines: list[tuple[str, list[TransformFunction]]],
+    reserved_params: set[str] | None = None,
+) -> PushdownPlan:
+    """
+    Plan which parts of the transform pipelines can be served by the origin API.
+
+    Leading filter transforms shared by all the pipelines are pushed down when the API
+    declares support for them, and the projection lists the fields read by the rest
+    of the pipelines when all of them are known.
+
+    Args:
+        pushdown (Pushdown): pushdown capabilities declared for the API call.
+        pipelines (list[tuple[str, list[TransformFunction]]]): export field names and
+            their transform pipelines, for all the exports consuming the API's data.
+        reserved_params (set[str], optional): query parameters already set for the API call.
+    Returns:
+        PushdownPlan: query parameters to add and the number of leading transforms they replace.
+    """
+    plan = PushdownPlan()
+    if not pipelines:
+        return plan
+
+    reserved = reserved_params or set()
+    filters = pushdown.filters or {}
+    while True:
+        leading = [
+            pipeline[plan.filters] if len(pipeline) > plan.filters else None
+            for _, pipeline in pipelines
+        ]
+        first = leading[0]
+        if first is None or first.function not in filters:
+            break
+        if any(
+            transform is None
+            or transform.function != first.function
+            or transform.params != first.params
+            for transform in leading
+        ):
+            logger.debug(f"{first.function} does not lead all the pipelines, can not push it down")
+            break
+
+        params = first.params or {}
+        try:
+            filter_params = {
+                key.format(**params): str(value).format(**params)
+                for key, value in filters[first.function].items()
+            }
+        except (KeyError, IndexError, ValueError) as e:
+            logger.warning(f"can not format the pushdown of {first.function}: {e}")
+            break
+        if any(
+            key in reserved or plan.query_params.get(key, value) != value
+            for key, value in filter_params.items()
+        ):
+            logger.debug(f"pushdown of {first.function} collides with other query parameters")
+            break
+
+        plan.query_params.update(filter_params)
+        plan.filters += 1
+
+    if pushdown.projection_param and pushdown.projection_param not in reserved:
+        remaining = [(field, pipeline[plan.filters:]) for field, pipeline in pipelines]
+        plan.projection = get_projection(remaining)
+        if plan.projection:
+            plan.query_params[pushdown.projection_param] = pushdown.projection_separator.join(
+                plan.projection
+            )
+
+    return plan
+
+
+def get_projection(pipelines: list[tuple[str, list[TransformFunction]]]) -> list[str] | None:
+    """Collect the top-level fields read by the pipelines, None if any transform is unknown."""
+    fields = set()
+    for field_name, pipeline in pipelines:
+        produced = set()
+        for transform in pipeline:
+            columns = TRANSFORM_COLUMNS.get(transform.function)
+            if columns is None:
+                logger.debug(f"columns of {transform.function} are unknown, can not project")
+                return None
+            inputs, outputs = columns
+            params = transform.params or {}
+            for name in inputs:
+                column = params.get(name)
+                if not isinstance(column, str):
+                    return None
+                if column not in produced:
+                    fields.add(column)
+            for name in outputs:
+                if isinstance(params.get(name), str):
+                    produced.add(params[name])
+        if field_name not in produced:
+            fields.add(field_name)
+
+    # nested fields are flattened by the normalization, the origin projects top-level keys
+    return sorted({field.split(".")[0] for field in fields})
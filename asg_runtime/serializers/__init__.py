@@ -2,8 +2,10 @@ from .serializer import (
     Serializer,
     get_serializer_class,
 )
+from .spooled_writer import SpooledJsonWriter
 
 __all__ = [
     "Serializer",
     "get_serializer_class",
+    "SpooledJsonWriter",
 ]
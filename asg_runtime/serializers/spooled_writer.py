@@ -0,0 +1,111 @@
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import orjson
+
+from ..utils import get_logger
+from .serializer import Serializer
+from .serializer_orjson import OrjsonSerializer
+
+logger = get_logger("spooled_writer")
+
+# bytes read at a time when streaming the encoded document
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class SpooledJsonWriter:
+    """
+    Incrementally encodes a dict of record lists into a json document.
+
+    Chunks of records are encoded as they are produced and appended to a spooled
+    temporary file, which stays in memory up to max_size bytes and spills to a
+    temporary file in spill_dir beyond that. The result is byte-identical to encoding
+    the whole dict at once with the orjson serializer. A spilled document is meant to be
+    streamed with iter_blocks, reading it back with getvalue loads it into memory whole.
+    """
+
+    def __init__(
+        self,
+        serializer: Serializer,
+        max_size: int,
+        spill_dir: Path | None = None,
+    ):
+        if not isinstance(serializer, OrjsonSerializer):
+            raise ValueError(f"{serializer.__class__.__name__} can not encode incrementally")
+        self.serializer = serializer
+        self.max_size = max_size
+        self._file = tempfile.SpooledTemporaryFile(
+            max_size=max_size, mode="w+b", dir=str(spill_dir) if spill_dir else None
+        )
+        self._datasets = 0
+        self._chunks = 0
+        self._in_dataset = False
+        self._file.write(b"{")
+
+    def __enter__(self) -> "SpooledJsonWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def spilled(self) -> bool:
+        return bool(getattr(self._file, "_rolled", False))
+
+    def begin_dataset(self, name: str) -> None:
+        if self._in_dataset:
+            raise RuntimeError("begin_dataset called before end_dataset")
+        if self._datasets:
+            self._file.write(b",")
+        self._file.write(orjson.dumps(name))
+        self._file.write(b":[")
+        self._datasets += 1
+        self._chunks = 0
+        self._in_dataset = True
+
+    def write_records(self, records: list[dict]) -> None:
+        if not self._in_dataset:
+            raise RuntimeError("write_records called outside of a dataset")
+        if not records:
+            return
+        encoded = self.serializer.encode(records)
+        # strip the list brackets, the records are spliced into the open list
+        body = memoryview(encoded)[1:-1]
+        if self._chunks:
+            self._file.write(b",")
+        self._file.write(body)
+        self._chunks += 1
+
+    def end_dataset(self) -> None:
+        if not self._in_dataset:
+            raise RuntimeError("end_dataset called before begin_dataset")
+        self._file.write(b"]")
+        self._in_dataset = False
+
+    def getvalue(self) -> bytes:
+        self._finish()
+        return self._file.read()
+
+    def iter_blocks(self, block_size: int = STREAM_BLOCK_SIZE) -> Iterator[bytes]:
+        """The encoded document in blocks of block_size bytes, the writer is closed once read."""
+        self._finish()
+        return self._read_blocks(block_size)
+
+    def _finish(self) -> None:
+        if self._in_dataset:
+            raise RuntimeError("the document is read before end_dataset")
+        self._file.write(b"}")
+        if self.spilled:
+            logger.debug(f"encoded response exceeded {self.max_size} bytes and was spilled to disk")
+        self._file.seek(0)
+
+    def _read_blocks(self, block_size: int) -> Iterator[bytes]:
+        try:
+            while block := self._file.read(block_size):
+                yield block
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,82 @@
+"""A minimal local origin server for the http client tests."""
+
+import threading
+from collections.abc import Callable
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import orjson
+
+# route handler: (query, headers) -> (status, headers, body)
+Route = Callable[[dict, dict], tuple[int, dict, bytes]]
+
+
+def json_route(payload: any, headers: dict | None = None) -> Route:
+    def route(query: dict, request_headers: dict):
+        return 200, {"content-type": "application/json", **(headers or {})}, orjson.dumps(payload)
+
+    return route
+
+
+class OriginServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, routes: dict[str, Route]):
+        self.routes = routes
+        self.connections = 0
+        self.requests = []
+        # bodies of the POST requests
+        self.bodies = []
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), OriginHandler)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self, body: bytes | None = None):
+        parts = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        with self.server.lock:
+            self.server.requests.append((parts.path, query))
+            if body is not None:
+                self.server.bodies.append(body)
+        route = self.server.routes.get(parts.path)
+        if route is None:
+            status, headers, body = 404, {}, b""
+        else:
+            status, headers, body = route(query, dict(self.headers))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.do_GET(self.rfile.read(int(self.headers.get("content-length", 0))))
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def run_origin_server(routes: dict[str, Route]):
+    server = OriginServer(routes)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,142 @@
+import email.utils
+import time
+
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.caches import async_create_cache
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.httpx_helper import get_caching_headers
+from asg_runtime.models import (
+    CacheBackends,
+    CacheConfig,
+    CacheConfigLru,
+    CachedHeaders,
+    Encodings,
+    HttpSettings,
+    RestDataSource,
+)
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_cache_freshness")
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5, http_max_pages=5, http_max_retries=1, http_retry_backoff=0.0, **kwargs)
+
+
+async def make_cache():
+    config = CacheConfig(
+        enabled=True, backend=CacheBackends.lru, backend_cfg=CacheConfigLru(lru_max_items=100))
+    return await async_create_cache(config, Encodings.orjson)
+
+
+class CachingOrigin:
+    """Answers with the given caching headers, and 304 when the etag matches."""
+
+    def __init__(self, headers: dict):
+        self.headers = headers
+        self.calls = 0
+        self.not_modified = 0
+
+    def __call__(self, query: dict, headers: dict):
+        self.calls += 1
+        headers = {name.lower(): value for name, value in headers.items()}
+        if headers.get("if-none-match") == '"v1"':
+            self.not_modified += 1
+            return 304, {"etag": '"v1"', **self.headers}, b""
+        return 200, {"content-type": "application/json", "etag": '"v1"', **self.headers}, b'[{"id": 1}]'
+
+
+async def fetch_times(origin: CachingOrigin, times: int, **kwargs):
+    cache = await make_cache()
+    with run_origin_server({"/persons": origin}) as server:
+        source = RestDataSource(url_template=f"{server.url}/persons")
+        fetcher = OriginFetcher(settings=make_settings(**kwargs), cache=cache)
+        try:
+            results = [await fetcher.fetch_json_pages_from_source(source) for _ in range(times)]
+        finally:
+            await fetcher.aclose()
+    return results, fetcher.get_rest_client_stats()
+
+
+def test_caching_headers_freshness():
+    now = time.time()
+    headers = get_caching_headers(None, {"cache-control": "public, max-age=60, s-maxage=30", "age": "10"})
+    assert headers.max_age == 20
+    assert headers.is_fresh()
+
+    expires = {
+        "expires": email.utils.formatdate(now + 100, usegmt=True),
+        "date": email.utils.formatdate(now, usegmt=True),
+    }
+    assert 99 <= get_caching_headers(None, expires).max_age <= 100
+    assert get_caching_headers(None, {"expires": "0"}).max_age == 0
+    assert get_caching_headers(None, {"cache-control": "no-cache, max-age=60"}).max_age == 0
+    assert get_caching_headers(None, {"cache-control": "no-store"}).no_store
+
+    # no freshness headers, the minimum revalidation interval applies
+    headers = get_caching_headers(CachedHeaders(etag='"v1"'), {"content-type": "application/json"})
+    assert headers.etag == '"v1"'
+    assert headers.max_age is None
+    assert not headers.is_fresh()
+    assert headers.is_fresh(default_max_age=10)
+
+
+@pytest.mark.asyncio
+async def test_fresh_data_served_without_origin_traffic():
+    origin = CachingOrigin({"cache-control": "max-age=60"})
+    results, stats = await fetch_times(origin, 3)
+    logger.debug(f"stats={stats.describe()}")
+    assert results == [[[{"id": 1}]]] * 3
+    assert origin.calls == 1
+    assert stats.fresh_hits == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_data_revalidated():
+    origin = CachingOrigin({"cache-control": "max-age=0"})
+    results, stats = await fetch_times(origin, 3)
+    assert results == [[[{"id": 1}]]] * 3
+    assert origin.calls == 3
+    assert origin.not_modified == 2
+    assert stats.revalidations == 2
+    assert stats.fresh_hits == 0
+
+
+@pytest.mark.asyncio
+async def test_min_revalidate_without_freshness_headers():
+    origin = CachingOrigin({})
+    _, stats = await fetch_times(origin, 3, http_min_revalidate=60)
+    assert origin.calls == 1
+    assert stats.fresh_hits == 2
+
+
+@pytest.mark.asyncio
+async def test_min_revalidate_per_host():
+    origin = CachingOrigin({})
+    cache = await make_cache()
+    with run_origin_server({"/persons": origin}) as server:
+        source = RestDataSource(url_template=f"{server.url}/persons")
+        host = server.url.removeprefix("http://")
+        settings = make_settings(http_min_revalidate=60, http_min_revalidate_hosts={host: 0})
+        fetcher = OriginFetcher(settings=settings, cache=cache)
+        try:
+            for _ in range(3):
+                await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+    # revalidated every time by the etag
+    assert origin.calls == 3
+    assert origin.not_modified == 2
+
+
+@pytest.mark.asyncio
+async def test_no_store_not_cached():
+    origin = CachingOrigin({"cache-control": "no-store"})
+    results, stats = await fetch_times(origin, 2)
+    assert results == [[[{"id": 1}]]] * 2
+    assert origin.calls == 2
+    assert origin.not_modified == 0
+    assert stats.no_store_responses == 2
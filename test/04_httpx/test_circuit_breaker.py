@@ -0,0 +1,158 @@
+import time
+
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.circuit_breaker import CircuitBreaker, CircuitState
+from asg_runtime.http.origin_fetcher import FetchFailure
+from asg_runtime.models import CachedHeaders, HttpSettings, RestDataSource
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_circuit_breaker")
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5,
+        http_max_pages=5,
+        http_max_retries=2,
+        http_retry_backoff=0.0,
+        **{"http_circuit_failures": 2, **kwargs},
+    )
+
+
+class FlakyOrigin:
+    def __init__(self):
+        self.down = True
+        self.calls = 0
+
+    def __call__(self, query: dict, headers: dict):
+        self.calls += 1
+        if self.down:
+            return 500, {}, b""
+        return 200, {"content-type": "application/json"}, b'[{"id": 1}]'
+
+
+class StaleCache:
+    """Origin cache holding revalidatable data for every key."""
+
+    async def async_get(self, key: str, with_headers: bool = False):
+        return [[{"id": 0}]], CachedHeaders(etag='"v1"')
+
+
+def test_breaker_transitions():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.allow_request()
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    # a single probe goes through the half-open circuit
+    assert breaker.allow_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allow_request()
+    assert breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_then_probes():
+    origin = FlakyOrigin()
+    with run_origin_server({"/persons": origin}) as server:
+        source = RestDataSource(url_template=f"{server.url}/persons")
+        fetcher = OriginFetcher(settings=make_settings(http_circuit_reset=0.2), cache=None)
+        try:
+            for _ in range(2):
+                with pytest.raises(RuntimeError):
+                    await fetcher.fetch_json_pages_from_source(source)
+            calls = origin.calls
+            with pytest.raises(FetchFailure):
+                await fetcher.fetch_json_pages_from_source(source)
+            # rejected without reaching the origin
+            assert origin.calls == calls
+            stats = fetcher.get_rest_client_stats()
+            assert list(stats.circuit_states.values()) == ["open"]
+
+            origin.down = False
+            time.sleep(0.25)
+            pages = await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+
+    logger.debug(f"stats={stats.describe()}")
+    assert pages == [[{"id": 1}]]
+    assert stats.circuit_opens == 1
+    assert stats.circuit_rejections == 1
+    assert list(stats.circuit_states.values()) == ["closed"]
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_serves_stale_cached_data():
+    origin = FlakyOrigin()
+    with run_origin_server({"/persons": origin}) as server:
+        source = RestDataSource(url_template=f"{server.url}/persons")
+        fetcher = OriginFetcher(settings=make_settings(), cache=StaleCache())
+        try:
+            for _ in range(2):
+                with pytest.raises(RuntimeError):
+                    await fetcher.fetch_json_pages_from_source(source)
+            pages = await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+
+    stats = fetcher.get_rest_client_stats()
+    assert pages == [[{"id": 0}]]
+    assert stats.stale_served == 1
+    assert stats.circuit_rejections == 1
+
+
+def missing_route(query: dict, headers: dict):
+    return 404, {}, b""
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_open_the_circuit():
+    origin = FlakyOrigin()
+    origin.down = False
+    with run_origin_server({"/missing": missing_route, "/persons": origin}) as server:
+        fetcher = OriginFetcher(settings=make_settings(), cache=None)
+        try:
+            for _ in range(5):
+                with pytest.raises(RuntimeError):
+                    await fetcher.fetch_json_pages_from_source(
+                        RestDataSource(url_template=f"{server.url}/missing"))
+            # the other endpoints of the host are still fetched
+            pages = await fetcher.fetch_json_pages_from_source(
+                RestDataSource(url_template=f"{server.url}/persons"))
+        finally:
+            await fetcher.aclose()
+
+    stats = fetcher.get_rest_client_stats()
+    assert pages == [[{"id": 1}]]
+    assert stats.circuit_opens == 0
+    assert list(stats.circuit_states.values()) == ["closed"]
+
+
+@pytest.mark.asyncio
+async def test_zero_failures_disables_the_breaker():
+    origin = FlakyOrigin()
+    with run_origin_server({"/persons": origin}) as server:
+        source = RestDataSource(url_template=f"{server.url}/persons")
+        fetcher = OriginFetcher(settings=make_settings(http_circuit_failures=0), cache=None)
+        try:
+            for _ in range(3):
+                with pytest.raises(RuntimeError):
+                    await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+
+    assert fetcher.get_rest_client_stats().circuit_rejections == 0
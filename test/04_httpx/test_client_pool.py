@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from origin_server import json_route, run_origin_server
+
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.httpx_helper import async_fetch_all_pages
+from asg_runtime.models import HttpSettings, RestClientStats, RestDataSource
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_client_pool")
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5,
+        http_max_pages=5,
+        http_max_retries=1,
+        http_retry_backoff=0.0,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_fetches_reuse_connections():
+    with run_origin_server({"/persons": json_route([{"id": 1}])}) as server:
+        fetcher = OriginFetcher(settings=make_settings(), cache=None)
+        try:
+            for _ in range(5):
+                pages = await fetcher.fetch_json_pages_from_source(
+                    RestDataSource(url_template=f"{server.url}/persons"))
+                assert pages == [[{"id": 1}]]
+        finally:
+            await fetcher.aclose()
+
+        stats = fetcher.get_rest_client_stats()
+        logger.debug(f"stats={stats.describe()}")
+        assert server.connections == 1
+        assert stats.pooled_requests == 5
+        assert stats.connections_opened == 1
+        assert stats.connection_reuse_rate == pytest.approx(0.8)
+        assert stats.peak_in_flight == 1
+        assert stats.peak_in_use == 1
+        assert fetcher.client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_pool_limits_concurrent_connections():
+    with run_origin_server({"/persons": json_route([{"id": 1}])}) as server:
+        fetcher = OriginFetcher(settings=make_settings(http_max_connections=2), cache=None)
+        try:
+            sources = [
+                RestDataSource(url_template=f"{server.url}/persons", parameter_args={"n": i})
+                for i in range(6)
+            ]
+            await asyncio.gather(*(fetcher.fetch_json_pages_from_source(s) for s in sources))
+        finally:
+            await fetcher.aclose()
+
+        stats = fetcher.get_rest_client_stats()
+        assert stats.pooled_requests == 6
+        assert stats.connections_opened <= 2
+        assert stats.peak_in_use <= 2
+        assert stats.pool_utilization == 1
+        # the rest of the requests waited for a connection
+        assert stats.peak_in_flight > stats.peak_in_use
+        assert server.connections <= 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_without_shared_client():
+    with run_origin_server({"/persons": json_route({"data": [1]})}) as server:
+        pages, requests = await async_fetch_all_pages(
+            url=f"{server.url}/persons", base_query_params={}, header_args={}, pagination=None)
+    assert requests == 1
+    assert pages[0].json() == {"data": [1]}
+
+
+def test_http2_requires_h2(monkeypatch):
+    import importlib.util
+
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(ImportError):
+        OriginFetcher(settings=make_settings(http2=True), cache=None)
+
+
+def test_stats_describe_rates():
+    stats = RestClientStats(pooled_requests=10, connections_opened=2, peak_in_use=3)
+    stats.set_pool_size(6)
+    described = stats.describe()
+    assert described["connection_reuse_rate"] == 0.8
+    assert described["pool_utilization"] == 0.5
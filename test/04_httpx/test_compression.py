@@ -0,0 +1,72 @@
+import gzip
+
+import orjson
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.client_pool import get_accept_encoding
+from asg_runtime.models import HttpSettings, RestDataSource
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_compression")
+
+RECORDS = [{"id": i, "name": f"person {i}", "city": "Haifa"} for i in range(1000)]
+BODY = orjson.dumps(RECORDS)
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5, http_max_pages=5, http_max_retries=1, http_retry_backoff=0.0, **kwargs)
+
+
+class CompressingOrigin:
+    """Gzips the body when the client accepts it."""
+
+    def __init__(self):
+        self.accept_encodings = []
+
+    def __call__(self, query: dict, headers: dict):
+        headers = {name.lower(): value for name, value in headers.items()}
+        accept_encoding = headers.get("accept-encoding", "")
+        self.accept_encodings.append(accept_encoding)
+        if "gzip" in accept_encoding:
+            return 200, {"content-type": "application/json", "content-encoding": "gzip"}, gzip.compress(BODY)
+        return 200, {"content-type": "application/json"}, BODY
+
+
+async def fetch(**kwargs):
+    origin = CompressingOrigin()
+    with run_origin_server({"/persons": origin}) as server:
+        source = RestDataSource(url_template=f"{server.url}/persons")
+        fetcher = OriginFetcher(settings=make_settings(**kwargs), cache=None)
+        try:
+            result = await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+    return result, origin, fetcher.get_rest_client_stats()
+
+
+@pytest.mark.asyncio
+async def test_compressed_body_decoded():
+    result, origin, stats = await fetch()
+    logger.debug(f"stats={stats.describe()}")
+    assert result == [RECORDS]
+    assert "gzip" in origin.accept_encodings[0]
+    assert stats.bytes_received == len(BODY)
+    assert stats.wire_bytes == len(gzip.compress(BODY))
+    assert stats.compression_savings > 0.5
+
+
+@pytest.mark.asyncio
+async def test_compression_disabled():
+    result, origin, stats = await fetch(http_compression=False)
+    assert result == [RECORDS]
+    assert origin.accept_encodings == ["identity"]
+    assert stats.wire_bytes == stats.bytes_received == len(BODY)
+    assert stats.compression_savings == 0
+
+
+def test_accept_encoding_of_installed_codecs():
+    codings = get_accept_encoding(make_settings()).split(", ")
+    assert {"gzip", "deflate"} <= set(codings)
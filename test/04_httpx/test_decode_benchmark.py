@@ -0,0 +1,69 @@
+import time
+
+import httpx
+import orjson
+
+from asg_runtime.http.httpx_helper import FetchedPage, has_pagination_keys, response_to_json
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_decode_benchmark")
+
+# a fifth of the ~47 MB /persons origin payload
+RECORDS = 20_000
+
+
+def make_persons_response() -> httpx.Response:
+    records = [
+        {
+            "person_id": i,
+            "gender_concept_id": 100 + i % 3,
+            "year_of_birth": 1940 + i % 60,
+            "month_of_birth": 1 + i % 12,
+            "day_of_birth": 1 + i % 28,
+            "birth_datetime": "1991-10-19T00:00:00",
+            "race_concept_id": 200 + i % 5,
+            "ethnicity_concept_id": 300 + i % 4,
+            "location_id": 400 + i % 50,
+            "provider_id": 500 + i % 70,
+            "care_site_id": 600 + i % 7,
+            "person_source_value": f"PSV{i:06d}",
+            "gender_source_value": f"GSV{i % 3:03d}",
+            "gender_source_concept_id": 700 + i % 3,
+            "race_source_value": f"RSV{i % 5:03d}",
+            "race_source_concept_id": 800 + i % 5,
+            "ethnicity_source_value": f"ESV{i % 4:03d}",
+            "ethnicity_source_concept_id": 900 + i % 4,
+        }
+        for i in range(RECORDS)
+    ]
+    return httpx.Response(
+        200, content=orjson.dumps(records), headers={"content-type": "application/json"})
+
+
+def best_of(runs: int, func) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def test_benchmark_orjson_decoding():
+    response = make_persons_response()
+    assert response_to_json(response) == response.json()
+
+    stdlib_time = best_of(3, response.json)
+    orjson_time = best_of(3, lambda: response_to_json(response))
+    logger.info(
+        f"decoding {len(response.content)} bytes: stdlib={stdlib_time:.3f}s, "
+        f"orjson={orjson_time:.3f}s, speedup={stdlib_time / orjson_time:.1f}x"
+    )
+    assert orjson_time < stdlib_time
+
+
+def test_page_is_decoded_once():
+    page = FetchedPage(make_persons_response())
+    data = page.json()
+    assert has_pagination_keys(page) is False
+    assert page.json() is data
@@ -0,0 +1,87 @@
+import threading
+
+import orjson
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.http import httpx_helper
+from asg_runtime.http.httpx_helper import async_json_pages_from_api
+from asg_runtime.models import RestClientStats
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_decode_offload")
+
+SMALL_BODY = orjson.dumps({"data": [{"id": 0}]})
+LARGE_BODY = orjson.dumps({"data": [{"id": i, "name": f"person {i}"} for i in range(5000)]})
+OFFLOAD_BYTES = 10000
+
+
+def json_body(body: bytes):
+    def route(query: dict, headers: dict):
+        return 200, {"content-type": "application/json"}, body
+    return route
+
+
+@pytest.fixture
+def decode_threads(monkeypatch):
+    threads = []
+    decode = httpx_helper.response_to_json
+
+    def recording_decode(response):
+        threads.append(threading.get_ident())
+        return decode(response)
+
+    monkeypatch.setattr(httpx_helper, "response_to_json", recording_decode)
+    return threads
+
+
+async def fetch(server, path: str, offload_bytes: int):
+    return await async_json_pages_from_api(
+        url=f"{server.url}{path}",
+        header_args={},
+        query_params={},
+        pagination=None,
+        decode_offload_bytes=offload_bytes,
+    )
+
+
+@pytest.mark.asyncio
+async def test_large_body_is_decoded_off_loop(decode_threads):
+    routes = {"/small": json_body(SMALL_BODY), "/large": json_body(LARGE_BODY)}
+    with run_origin_server(routes) as server:
+        small = await fetch(server, "/small", OFFLOAD_BYTES)
+        large = await fetch(server, "/large", OFFLOAD_BYTES)
+
+    loop_thread = threading.get_ident()
+    assert decode_threads[0] == loop_thread
+    assert decode_threads[1] != loop_thread
+    assert small.rsp_json_pages == [orjson.loads(SMALL_BODY)]
+    assert large.rsp_json_pages == [orjson.loads(LARGE_BODY)]
+
+    assert small.offloaded_decodes == 0
+    assert small.decode_block_time > 0
+    assert large.offloaded_decodes == 1
+    assert large.offloaded_decode_time > 0
+    assert large.decode_block_time == 0
+
+
+@pytest.mark.asyncio
+async def test_zero_threshold_decodes_inline(decode_threads):
+    with run_origin_server({"/large": json_body(LARGE_BODY)}) as server:
+        from_api = await fetch(server, "/large", 0)
+
+    assert decode_threads == [threading.get_ident()]
+    assert from_api.offloaded_decodes == 0
+    assert from_api.decode_block_time > 0
+
+
+def test_stats_accumulate_decode_times():
+    stats = RestClientStats()
+    stats.update(requests_issued=1, bytes_received=10, fetching_time=0.1, decode_block_time=0.01)
+    stats.update(requests_issued=1, bytes_received=10, fetching_time=0.1,
+                 offloaded_decodes=1, offloaded_decode_time=0.2)
+
+    logger.debug(f"stats={stats.describe()}")
+    assert stats.decode_block_time == pytest.approx(0.01)
+    assert stats.offloaded_decodes == 1
+    assert stats.offloaded_decode_time == pytest.approx(0.2)
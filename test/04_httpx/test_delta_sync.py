@@ -0,0 +1,124 @@
+import orjson
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.caches import async_create_cache
+from asg_runtime.gin.common.con_spec.spec_helper_models import Pagination
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.delta_sync import merge_delta, trim_pages
+from asg_runtime.models import (
+    CacheBackends,
+    CacheConfig,
+    CacheConfigLru,
+    Encodings,
+    HttpSettings,
+    RestDataSource,
+)
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_delta_sync")
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5, http_max_pages=5, http_max_retries=1, http_retry_backoff=0.0, **kwargs)
+
+
+async def make_cache():
+    config = CacheConfig(
+        enabled=True, backend=CacheBackends.lru, backend_cfg=CacheConfigLru(lru_max_items=100))
+    return await async_create_cache(config, Encodings.orjson)
+
+
+def make_pagination(**kwargs) -> Pagination:
+    return Pagination(
+        **{"type": "time", "sinceParam": "since", "watermarkPath": "ts", "recordsPath": "events", **kwargs})
+
+
+class EventsOrigin:
+    """Append-only events, the ones at or after the since value when given."""
+
+    def __init__(self, events: int):
+        self.events = [{"ts": ts, "value": f"e{ts}"} for ts in range(events)]
+        self.queries = []
+
+    def append(self, events: int):
+        start = len(self.events)
+        self.events += [{"ts": ts, "value": f"e{ts}"} for ts in range(start, start + events)]
+
+    def __call__(self, query: dict, headers: dict):
+        self.queries.append(query)
+        since = int(query["since"]) if "since" in query else None
+        events = [event for event in self.events if since is None or event["ts"] >= since]
+        return 200, {"content-type": "application/json"}, orjson.dumps({"events": events, "total": len(events)})
+
+
+async def sync_rounds(origin: EventsOrigin, appends: list[int], pagination: Pagination):
+    """Fetch once, then again after each append, returns the results and the stats."""
+    cache = await make_cache()
+    results = []
+    with run_origin_server({"/events": origin}) as server:
+        source = RestDataSource(url_template=f"{server.url}/events", pagination=pagination)
+        fetcher = OriginFetcher(settings=make_settings(), cache=cache)
+        try:
+            results.append(await fetcher.fetch_json_pages_from_source(source))
+            for events in appends:
+                origin.append(events)
+                results.append(await fetcher.fetch_json_pages_from_source(source))
+        finally:
+            await fetcher.aclose()
+    return results, fetcher.get_rest_client_stats()
+
+
+def all_events(pages: list) -> list:
+    return [event["ts"] for page in pages for event in page["events"]]
+
+
+@pytest.mark.asyncio
+async def test_refresh_fetches_only_the_delta():
+    origin = EventsOrigin(100)
+    results, stats = await sync_rounds(origin, [5, 0, 3], make_pagination())
+    logger.debug(f"stats={stats.describe()}")
+
+    assert origin.queries == [{}, {"since": "99"}, {"since": "104"}, {"since": "104"}]
+    assert all_events(results[1]) == list(range(105))
+    assert all_events(results[2]) == list(range(105))
+    assert all_events(results[3]) == list(range(108))
+    # the other keys of the page are kept
+    assert results[3][-1] == {"events": [{"ts": ts, "value": f"e{ts}"} for ts in range(105, 108)], "total": 4}
+    assert stats.delta_syncs == 3
+    assert stats.delta_records == 8
+    # a full fetch, then deltas of a few records each
+    full_bytes = len(orjson.dumps({"events": origin.events[:100], "total": 100}))
+    assert stats.bytes_received < full_bytes + 4 * 400
+
+
+@pytest.mark.asyncio
+async def test_retention_trims_old_records():
+    origin = EventsOrigin(10)
+    pagination = make_pagination(retentionRecords=12, retentionWindow=8)
+    results, stats = await sync_rounds(origin, [5], pagination)
+    # the window keeps ts >= 14 - 8 of the 15 records
+    assert all_events(results[1]) == list(range(6, 15))
+    # ts 0 on the first fetch, ts 1-5 after the append
+    assert stats.trimmed_records == 1 + 5
+
+
+def test_merge_delta_at_watermark():
+    pagination = make_pagination(recordsPath=None)
+    cached = [[{"ts": 1}, {"ts": 2, "id": "a"}]]
+    delta = [[{"ts": 2, "id": "a"}, {"ts": 2, "id": "b"}, {"ts": 3}]]
+    merged, added = merge_delta(cached, delta, pagination, 2)
+    assert merged == [cached[0], [{"ts": 2, "id": "b"}, {"ts": 3}]]
+    assert added == 2
+
+
+def test_trim_pages_iso_timestamps():
+    pagination = make_pagination(recordsPath=None, retentionWindow=3600)
+    pages = [
+        [{"ts": "2024-01-01T00:00:00+00:00"}],
+        [{"ts": "2024-01-01T01:30:00+00:00"}, {"ts": "2024-01-01T02:00:00+00:00"}],
+    ]
+    trimmed, dropped = trim_pages(pages, pagination, "2024-01-01T02:00:00+00:00")
+    assert trimmed == [[{"ts": "2024-01-01T01:30:00+00:00"}, {"ts": "2024-01-01T02:00:00+00:00"}]]
+    assert dropped == 1
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+from origin_server import json_route, run_origin_server
+
+from asg_runtime.gin.common.con_spec.spec_helper_models import FanOut
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.origin_fetcher import FetchFailure
+from asg_runtime.models import HttpSettings, RestDataSource
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_fan_out")
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5, http_max_pages=5, http_max_retries=1, http_retry_backoff=0.0, **kwargs)
+
+
+def failing_route(query: dict, headers: dict):
+    return 500, {}, b""
+
+
+def slow_route(query: dict, headers: dict):
+    time.sleep(1)
+    return 200, {"content-type": "application/json"}, b'[{"node": "slow"}]'
+
+
+async def fan_out(fan_out: FanOut):
+    """Fan out to two healthy nodes, a slow one and a failing one."""
+    with run_origin_server({"/items": json_route([{"node": "a"}])}) as first, \
+            run_origin_server({"/items": json_route([{"node": "b"}])}) as second, \
+            run_origin_server({"/items": slow_route}) as slow, \
+            run_origin_server({"/items": failing_route}) as failing:
+        nodes = [first.url, second.url, slow.url, failing.url]
+        source = RestDataSource(url_template="/items", servers=nodes, fan_out=fan_out)
+        fetcher = OriginFetcher(settings=make_settings(), cache=None)
+        start_time = time.perf_counter()
+        try:
+            pages = await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+        elapsed = time.perf_counter() - start_time
+    return pages, elapsed, fetcher.get_rest_client_stats(), nodes
+
+
+@pytest.mark.asyncio
+async def test_partial_results_by_the_deadline():
+    pages, elapsed, stats, nodes = await fan_out(FanOut(deadline=0.5))
+    logger.debug(f"stats={stats.describe()}")
+    assert elapsed < 1
+    # the union of the nodes that answered, in the servers order
+    assert pages == [[{"node": "a"}], [{"node": "b"}]]
+    assert stats.fan_outs == 1
+    assert stats.node_timeouts == 1
+    assert stats.node_failures == 1
+    assert stats.partial_results == 1
+    assert set(stats.node_latencies) == set(nodes[:2])
+
+
+@pytest.mark.asyncio
+async def test_too_few_nodes_fail():
+    with pytest.raises(FetchFailure):
+        await fan_out(FanOut(deadline=0.5, minNodes=3))
+
+
+@pytest.mark.asyncio
+async def test_waits_for_all_nodes_without_deadline():
+    pages, _, stats, _ = await fan_out(FanOut())
+    assert [page[0]["node"] for page in pages] == ["a", "b", "slow"]
+    assert stats.node_timeouts == 0
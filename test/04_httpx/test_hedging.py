@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.hedging import MIN_LATENCY_SAMPLES, HostLatencies
+from asg_runtime.models import HttpSettings
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_hedging")
+
+WARMUP = 30
+SLOW_SECONDS = 1.0
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5,
+        http_max_pages=5,
+        http_max_retries=1,
+        http_retry_backoff=0.0,
+        **kwargs,
+    )
+
+
+class SlowOnceOrigin:
+    """Answers at once, except the first request after the warmup."""
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, query: dict, headers: dict):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        if call == WARMUP + 1:
+            time.sleep(SLOW_SECONDS)
+        return 200, {"content-type": "application/json"}, f'{{"call": {call}}}'.encode()
+
+
+async def warm_up_and_fetch_slow(settings: HttpSettings):
+    origin = SlowOnceOrigin()
+    with run_origin_server({"/persons": origin}) as server:
+        fetcher = OriginFetcher(settings=settings, cache=None)
+        try:
+            for _ in range(WARMUP):
+                await fetcher.client.get(f"{server.url}/persons")
+            start = time.monotonic()
+            response = await fetcher.client.get(f"{server.url}/persons")
+            elapsed = time.monotonic() - start
+        finally:
+            await fetcher.aclose()
+    logger.debug(f"stats={fetcher.get_rest_client_stats().describe()}")
+    return response, elapsed, fetcher.get_rest_client_stats()
+
+
+def test_latency_percentile():
+    latencies = HostLatencies()
+    for i in range(MIN_LATENCY_SAMPLES - 1):
+        latencies.add(i)
+    assert latencies.percentile(95) is None
+
+    for i in range(MIN_LATENCY_SAMPLES - 1, 100):
+        latencies.add(i)
+    assert latencies.percentile(95) == 95
+    assert latencies.percentile(100) == 99
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged():
+    response, elapsed, stats = await warm_up_and_fetch_slow(
+        make_settings(http_hedge_percentile=90.0, http_hedge_budget=0.5))
+
+    assert response.status_code == 200
+    # the duplicate answered
+    assert response.json() == {"call": WARMUP + 2}
+    assert elapsed < SLOW_SECONDS / 2
+    assert stats.hedges_sent == 1
+    assert stats.hedges_won == 1
+
+
+@pytest.mark.asyncio
+async def test_hedges_are_limited_by_the_budget():
+    response, elapsed, stats = await warm_up_and_fetch_slow(
+        make_settings(http_hedge_percentile=90.0, http_hedge_budget=0.0))
+
+    assert response.json() == {"call": WARMUP + 1}
+    assert elapsed >= SLOW_SECONDS * 0.9
+    assert stats.hedges_sent == 0
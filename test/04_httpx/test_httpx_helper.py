@@ -1,6 +1,7 @@
 from unittest.mock import AsyncMock, patch
 
 import httpx
+import orjson
 import pytest
 
 from asg_runtime.utils import get_logger
@@ -20,7 +21,8 @@ def make_response(json_data, status_code=200, headers=None):
     mock = AsyncMock(spec=httpx.Response)
     mock.status_code = status_code
     mock.json.return_value = json_data
-    mock.headers = headers or {}
+    mock.content = orjson.dumps(json_data)
+    mock.headers = headers or {"content-type": "application/json"}
     return mock
 
 @pytest.mark.asyncio
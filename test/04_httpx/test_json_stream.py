@@ -0,0 +1,105 @@
+import orjson
+import pytest
+
+# streaming needs the stream extra
+pytest.importorskip("ijson")
+
+from origin_server import json_route, run_origin_server  # noqa: E402
+
+from asg_runtime.http import OriginFetcher  # noqa: E402
+from asg_runtime.http.httpx_helper import async_stream_json_from_api  # noqa: E402
+from asg_runtime.http.json_stream import JsonPathStream  # noqa: E402
+from asg_runtime.models import HttpSettings, RestDataSource  # noqa: E402
+from asg_runtime.utils import get_logger  # noqa: E402
+
+logger = get_logger("test_json_stream")
+
+RECORDS = [{"id": i, "name": f"person {i}", "scores": [i, i / 2]} for i in range(20000)]
+PAYLOAD = {"meta": {"total": len(RECORDS)}, "data": RECORDS, "links": [{"rel": "self"}]}
+STREAM_MIN_BYTES = 64 * 1024
+
+
+def feed_in_chunks(parser: JsonPathStream, body: bytes, size: int):
+    for start in range(0, len(body), size):
+        parser.feed(body[start:start + size])
+    return parser.close()
+
+
+def test_records_are_collected_across_chunks():
+    parser = JsonPathStream(["data"])
+    page = feed_in_chunks(parser, orjson.dumps(PAYLOAD), 1000)
+
+    assert page == {"data": RECORDS}
+    assert parser.records == len(RECORDS)
+    assert parser.batches > 1
+
+
+def test_non_array_and_root_paths():
+    parser = JsonPathStream(["meta", "data"])
+    page = feed_in_chunks(parser, orjson.dumps(PAYLOAD), 7)
+    assert page == {"meta": PAYLOAD["meta"], "data": RECORDS}
+
+    parser = JsonPathStream(["."])
+    assert feed_in_chunks(parser, orjson.dumps(RECORDS[:3]), 5) == RECORDS[:3]
+
+
+@pytest.mark.asyncio
+async def test_large_body_is_streamed():
+    body_size = len(orjson.dumps(PAYLOAD))
+    with run_origin_server({"/persons": json_route(PAYLOAD)}) as server:
+        from_api = await async_stream_json_from_api(
+            url=f"{server.url}/persons",
+            header_args={},
+            query_params={},
+            stream_paths=["data"],
+            stream_min_bytes=STREAM_MIN_BYTES,
+        )
+
+    logger.debug(f"from_api={from_api.describe()}")
+    assert from_api.rsp_json_pages == [{"data": RECORDS}]
+    assert from_api.streamed_records == len(RECORDS)
+    assert from_api.bytes_received == body_size
+    # the raw body is never held whole
+    assert 0 < from_api.peak_body_bytes < body_size
+
+
+@pytest.mark.asyncio
+async def test_small_body_is_read_whole():
+    payload = {"data": RECORDS[:10], "meta": {}}
+    with run_origin_server({"/persons": json_route(payload)}) as server:
+        from_api = await async_stream_json_from_api(
+            url=f"{server.url}/persons",
+            header_args={},
+            query_params={},
+            stream_paths=["data"],
+            stream_min_bytes=STREAM_MIN_BYTES,
+        )
+
+    assert from_api.rsp_json_pages == [payload]
+    assert from_api.streamed_records is None
+    assert from_api.peak_body_bytes == len(orjson.dumps(payload))
+
+
+@pytest.mark.asyncio
+async def test_fetcher_streams_single_page_sources():
+    settings = HttpSettings(
+        http_timeout=5,
+        http_max_pages=5,
+        http_max_retries=1,
+        http_retry_backoff=0.0,
+        http_stream_min_bytes=STREAM_MIN_BYTES,
+    )
+    with run_origin_server({"/persons": json_route(PAYLOAD)}) as server:
+        fetcher = OriginFetcher(settings=settings, cache=None)
+        try:
+            pages = await fetcher.fetch_json_pages_from_source(
+                RestDataSource(url_template=f"{server.url}/persons", stream_paths=["data"]))
+        finally:
+            await fetcher.aclose()
+
+    stats = fetcher.get_rest_client_stats()
+    logger.debug(f"stats={stats.describe()}")
+    assert pages == [{"data": RECORDS}]
+    assert stats.streamed_fetches == 1
+    assert stats.streamed_records == len(RECORDS)
+    assert 0 < stats.peak_body_bytes < len(orjson.dumps(PAYLOAD))
@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import pytest
+from origin_server import json_route, run_origin_server
+
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.load_balancer import LoadBalancer, rebase_url
+from asg_runtime.models import BalancePolicies, HttpSettings, RestClientStats, RestDataSource
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_load_balancer")
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5, http_max_pages=5, http_max_retries=1, http_retry_backoff=0.0, **kwargs)
+
+
+def failing_route(query: dict, headers: dict):
+    return 500, {}, b""
+
+
+def slow_route(query: dict, headers: dict):
+    time.sleep(0.2)
+    return 200, {"content-type": "application/json"}, b'[{"id": 1}]'
+
+
+@pytest.mark.asyncio
+async def test_failover_to_healthy_server():
+    with run_origin_server({"/items": failing_route}) as bad, \
+            run_origin_server({"/items": json_route([{"id": 1}])}) as good:
+        source = RestDataSource(url_template="/items", servers=[bad.url, good.url])
+        fetcher = OriginFetcher(settings=make_settings(), cache=None)
+        try:
+            results = [await fetcher.fetch_json_pages_from_source(source) for _ in range(3)]
+        finally:
+            await fetcher.aclose()
+    stats = fetcher.get_rest_client_stats()
+    logger.debug(f"stats={stats.describe()}")
+    assert results == [[[{"id": 1}]]] * 3
+    # the failing server is ejected after its first failure
+    assert len(bad.requests) == 1
+    assert len(good.requests) == 3
+    assert stats.server_failovers == 1
+    assert stats.server_ejections == 1
+
+
+def missing_route(query: dict, headers: dict):
+    return 404, {}, b""
+
+
+@pytest.mark.asyncio
+async def test_client_error_neither_ejects_nor_fails_over():
+    with run_origin_server({"/items": missing_route}) as first, \
+            run_origin_server({"/items": json_route([{"id": 1}])}) as second:
+        source = RestDataSource(url_template="/items", servers=[first.url, second.url])
+        fetcher = OriginFetcher(settings=make_settings(), cache=None)
+        try:
+            with pytest.raises(RuntimeError):
+                await fetcher.fetch_json_pages_from_source(source)
+            ejected = fetcher.balancer.get_state(first.url).is_ejected(time.monotonic())
+        finally:
+            await fetcher.aclose()
+    stats = fetcher.get_rest_client_stats()
+    assert len(first.requests) == 1
+    assert second.requests == []
+    assert not ejected
+    assert stats.server_failovers == 0
+    assert stats.server_ejections == 0
+
+
+def throttled_route(query: dict, headers: dict):
+    return 429, {}, b""
+
+
+@pytest.mark.asyncio
+async def test_failover_from_throttled_server():
+    with run_origin_server({"/items": throttled_route}) as throttled, \
+            run_origin_server({"/items": json_route([{"id": 1}])}) as good:
+        source = RestDataSource(url_template="/items", servers=[throttled.url, good.url])
+        fetcher = OriginFetcher(settings=make_settings(), cache=None)
+        try:
+            result = await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+    assert result == [[{"id": 1}]]
+    assert fetcher.get_rest_client_stats().server_failovers == 1
+
+
+@pytest.mark.asyncio
+async def test_requests_spread_across_servers():
+    with run_origin_server({"/items": slow_route}) as first, \
+            run_origin_server({"/items": slow_route}) as second:
+        source = RestDataSource(url_template="/items", servers=[first.url, second.url])
+        fetcher = OriginFetcher(settings=make_settings(), cache=None)
+        try:
+            await asyncio.gather(*(fetcher.fetch_json_pages_from_source(source) for _ in range(4)))
+        finally:
+            await fetcher.aclose()
+    assert len(first.requests) == 2
+    assert len(second.requests) == 2
+
+
+def test_ewma_prefers_faster_server():
+    balancer = LoadBalancer(make_settings(http_balance_policy=BalancePolicies.ewma), RestClientStats())
+    servers = ["http://a", "http://b"]
+    for server, latency in (("http://a", 0.5), ("http://b", 0.1)):
+        balancer.start(server)
+        balancer.finish(server, latency)
+    assert balancer.choose(servers) == "http://b"
+    # weighted by the requests in flight
+    for _ in range(5):
+        balancer.start("http://b")
+    assert balancer.choose(servers) == "http://a"
+
+
+def test_cache_key_independent_of_server():
+    first = RestDataSource(url_template="/items", servers=["http://a", "http://b"])
+    second = RestDataSource(url_template="/items", servers=["http://b", "http://a"])
+    assert first.hash_contents() == second.hash_contents()
+    assert rebase_url("http://a/items?page=2", ["http://a/", "http://b"], "http://b") == "http://b/items?page=2"
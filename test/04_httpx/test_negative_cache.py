@@ -0,0 +1,124 @@
+import asyncio
+
+import httpx
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.caches import async_create_cache
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.origin_fetcher import FetchFailure, get_failure_class
+from asg_runtime.models import (
+    CacheBackends,
+    CacheConfig,
+    CacheConfigLru,
+    Encodings,
+    HttpSettings,
+    RestDataSource,
+)
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_negative_cache")
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5, http_max_pages=5, http_max_retries=1, http_retry_backoff=0.0, **kwargs)
+
+
+async def make_cache():
+    config = CacheConfig(
+        enabled=True, backend=CacheBackends.lru, backend_cfg=CacheConfigLru(lru_max_items=100))
+    return await async_create_cache(config, Encodings.orjson)
+
+
+def missing_route(query: dict, headers: dict):
+    return 404, {}, b""
+
+
+class FailingOrigin:
+    """Serves the items with max-age=0, then fails with the given status."""
+
+    def __init__(self, status: int):
+        self.status = status
+        self.served = False
+
+    def __call__(self, query: dict, headers: dict):
+        if self.served:
+            return self.status, {}, b""
+        self.served = True
+        return 200, {"content-type": "application/json", "cache-control": "max-age=0"}, b'[{"id": 1}]'
+
+
+@pytest.mark.asyncio
+async def test_failure_is_not_retried_within_ttl():
+    cache = await make_cache()
+    with run_origin_server({"/items": missing_route}) as server:
+        source = RestDataSource(url_template=f"{server.url}/items")
+        fetcher = OriginFetcher(settings=make_settings(http_negative_ttls={"4xx": 60}), cache=cache)
+        try:
+            with pytest.raises(RuntimeError):
+                await fetcher.fetch_json_pages_from_source(source)
+            requests = len(server.requests)
+            for _ in range(3):
+                with pytest.raises(FetchFailure, match="failed recently \\(404\\)"):
+                    await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+    stats = cache.get_stats()
+    logger.debug(f"stats={stats}")
+    assert len(server.requests) == requests
+    assert stats.negative_sets == 1
+    assert stats.negative_hits == 3
+
+
+@pytest.mark.asyncio
+async def test_negative_entry_serves_stale_data():
+    cache = await make_cache()
+    with run_origin_server({"/items": FailingOrigin(500)}) as server:
+        source = RestDataSource(url_template=f"{server.url}/items")
+        fetcher = OriginFetcher(settings=make_settings(http_negative_ttls={"5xx": 60}), cache=cache)
+        try:
+            first = await fetcher.fetch_json_pages_from_source(source)
+            with pytest.raises(RuntimeError):
+                await fetcher.fetch_json_pages_from_source(source)
+            requests = len(server.requests)
+            stale = await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+    assert stale == first == [[{"id": 1}]]
+    assert len(server.requests) == requests
+    assert fetcher.get_rest_client_stats().stale_served == 1
+
+
+@pytest.mark.asyncio
+async def test_failure_retried_after_ttl():
+    cache = await make_cache()
+    with run_origin_server({"/items": missing_route}) as server:
+        source = RestDataSource(url_template=f"{server.url}/items")
+        fetcher = OriginFetcher(settings=make_settings(http_negative_ttl=0.2), cache=cache)
+        try:
+            for _ in range(2):
+                with pytest.raises(RuntimeError):
+                    await fetcher.fetch_json_pages_from_source(source)
+                await asyncio.sleep(0.3)
+        finally:
+            await fetcher.aclose()
+    assert cache.get_stats().negative_sets == 2
+    assert cache.get_stats().negative_hits == 0
+
+
+def test_negative_ttl_by_failure_class():
+    fetcher = OriginFetcher(
+        settings=make_settings(http_negative_ttl=1, http_negative_ttls={"404": 30, "4xx": 10, "5xx": 5}),
+        cache=None)
+    assert [fetcher.get_negative_ttl(failure) for failure in ("404", "410", "503", "timeout")] == [30, 10, 5, 1]
+
+    request = httpx.Request("GET", "http://origin/items")
+    error = httpx.HTTPStatusError("gone", request=request, response=httpx.Response(410, request=request))
+    try:
+        raise RuntimeError("max retries reached") from error
+    except RuntimeError as e:
+        assert get_failure_class(e) == "410"
+    assert get_failure_class(httpx.ReadTimeout("slow", request=request)) == "timeout"
+    assert get_failure_class(httpx.ConnectError("refused", request=request)) == "connection"
+    assert get_failure_class(ValueError()) == "error"
@@ -0,0 +1,134 @@
+import orjson
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.caches import async_create_cache
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.httpx_helper import HttpPagination
+from asg_runtime.models import (
+    CacheBackends,
+    CacheConfig,
+    CacheConfigLru,
+    Encodings,
+    HttpSettings,
+    RestDataSource,
+)
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_page_cache")
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5,
+        http_max_pages=10,
+        http_max_retries=1,
+        http_retry_backoff=0.0,
+        **{"http_page_cache": True, **kwargs},
+    )
+
+
+async def make_cache():
+    config = CacheConfig(
+        enabled=True, backend=CacheBackends.lru, backend_cfg=CacheConfigLru(lru_max_items=100))
+    return await async_create_cache(config, Encodings.orjson)
+
+
+class PagedOrigin:
+    """Numbered pages, each with the etag of its own version."""
+
+    def __init__(self, pages: int, max_age: int = 0):
+        self.versions = [1] * pages
+        self.max_age = max_age
+        self.sent = []
+        self.not_modified = []
+
+    def page(self, number: int) -> dict:
+        next_page = number + 1 if number + 1 < len(self.versions) else None
+        return {"items": [f"p{number}v{self.versions[number]}"], "next_page": next_page}
+
+    def __call__(self, query: dict, headers: dict):
+        headers = {name.lower(): value for name, value in headers.items()}
+        number = int(query.get("page", 0))
+        etag = f'"p{number}v{self.versions[number]}"'
+        caching = {"etag": etag, "cache-control": f"max-age={self.max_age}"}
+        if headers.get("if-none-match") == etag:
+            self.not_modified.append(number)
+            return 304, caching, b""
+        self.sent.append(number)
+        return 200, {"content-type": "application/json", **caching}, orjson.dumps(self.page(number))
+
+
+async def fetch_rounds(origin: PagedOrigin, changes: list, **kwargs):
+    """Fetch once, then again after each change to the origin, returns the results and the stats."""
+    cache = await make_cache()
+    results = []
+    with run_origin_server({"/items": origin}) as server:
+        source = RestDataSource(
+            url_template=f"{server.url}/items",
+            pagination=HttpPagination(pagination_params={"page": "next_page"}))
+        fetcher = OriginFetcher(settings=make_settings(**kwargs), cache=cache)
+        try:
+            results.append(await fetcher.fetch_json_pages_from_source(source))
+            for change in changes:
+                change(origin)
+                results.append(await fetcher.fetch_json_pages_from_source(source))
+        finally:
+            await fetcher.aclose()
+    return results, fetcher.get_rest_client_stats()
+
+
+def items(pages: list) -> list:
+    return [item for page in pages for item in page["items"]]
+
+
+def no_change(origin: PagedOrigin):
+    pass
+
+
+def change_page(number: int):
+    def change(origin: PagedOrigin):
+        origin.versions[number] += 1
+    return change
+
+
+def append_page(origin: PagedOrigin):
+    origin.versions[-1] += 1
+    origin.versions.append(1)
+
+
+@pytest.mark.asyncio
+async def test_refresh_transfers_only_changed_pages():
+    origin = PagedOrigin(4)
+    results, stats = await fetch_rounds(origin, [change_page(2), no_change])
+    logger.debug(f"stats={stats.describe()}")
+
+    assert items(results[0]) == ["p0v1", "p1v1", "p2v1", "p3v1"]
+    assert items(results[1]) == ["p0v1", "p1v1", "p2v2", "p3v1"]
+    assert results[2] == results[1]
+    # all the pages once, then only the changed one
+    assert origin.sent == [0, 1, 2, 3, 2]
+    assert sorted(origin.not_modified) == [0, 0, 1, 1, 2, 3, 3]
+    assert stats.pages_changed == 5
+    assert stats.pages_not_modified == 7
+    assert stats.revalidations == 1
+
+
+@pytest.mark.asyncio
+async def test_changed_last_page_leads_to_new_pages():
+    origin = PagedOrigin(3)
+    results, stats = await fetch_rounds(origin, [append_page])
+    assert items(results[1]) == ["p0v1", "p1v1", "p2v2", "p3v1"]
+    # the new page is fetched after the changed last page
+    assert origin.sent == [0, 1, 2, 2, 3]
+    assert stats.pages_not_modified == 2
+
+
+@pytest.mark.asyncio
+async def test_fresh_pages_served_without_origin_traffic():
+    origin = PagedOrigin(3, max_age=60)
+    results, stats = await fetch_rounds(origin, [no_change, change_page(1)])
+    assert results[0] == results[1] == results[2]
+    assert origin.sent == [0, 1, 2]
+    assert origin.not_modified == []
+    assert stats.fresh_hits == 2
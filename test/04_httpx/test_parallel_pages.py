@@ -0,0 +1,139 @@
+import threading
+import time
+
+import orjson
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.gin import Dataset
+from asg_runtime.gin_helper import jason_to_datasets
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.httpx_helper import (
+    HttpPagination,
+    PaginationTypeEnum,
+    PagingParamDirectory,
+    async_fetch_all_pages,
+)
+from asg_runtime.models import HttpSettings, RestDataSource
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_parallel_pages")
+
+TOTAL = 95
+PAGE_SIZE = 5
+DELAY = 0.05
+
+
+class PagedRoute:
+    """Serves TOTAL records in pages addressed by page number or offset, tracking concurrency."""
+
+    def __init__(self, by_offset: bool = False):
+        self.by_offset = by_offset
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, query: dict, headers: dict):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(DELAY)
+        if self.by_offset:
+            start = int(query.get("offset", 0))
+            next_ref = {"next_offset": start + PAGE_SIZE}
+        else:
+            page = int(query.get("page", 1))
+            start = (page - 1) * PAGE_SIZE
+            next_ref = {"next_page": page + 1}
+        body = {
+            "data": [{"id": i} for i in range(start, min(start + PAGE_SIZE, TOTAL))],
+            "meta": {"page_size": PAGE_SIZE, "total": TOTAL, **next_ref},
+        }
+        with self.lock:
+            self.active -= 1
+        return 200, {"content-type": "application/json"}, orjson.dumps(body)
+
+
+def make_pagination(by_offset: bool = False) -> HttpPagination:
+    ref = "offset" if by_offset else "page"
+    return HttpPagination(
+        type=PaginationTypeEnum.OFFSET if by_offset else PaginationTypeEnum.PAGE,
+        pagination_params={ref: f"meta.next_{ref}"},
+        param_translation=PagingParamDirectory(
+            pageRef=ref, pageSizePath="meta.page_size", totalSizePath="meta.total"
+        ),
+    )
+
+
+def page_ids(responses) -> list[int]:
+    return [record["id"] for response in responses for record in response.json()["data"]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("by_offset", [False, True])
+async def test_remaining_pages_fetched_concurrently(by_offset):
+    route = PagedRoute(by_offset)
+    with run_origin_server({"/persons": route}) as server:
+        start = time.perf_counter()
+        pages, requests = await async_fetch_all_pages(
+            url=f"{server.url}/persons",
+            base_query_params={},
+            header_args={},
+            pagination=make_pagination(by_offset),
+            max_pages=100,
+        )
+        elapsed = time.perf_counter() - start
+
+    logger.debug(f"fetched {len(pages)} pages in {elapsed:.3f}s, peak concurrency {route.peak}")
+    assert len(pages) == 19
+    assert requests == 19
+    assert page_ids(pages) == list(range(TOTAL))
+    assert route.peak > 1
+    # sequential fetching would take 19 round trips
+    assert elapsed < 19 * DELAY / 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_pages_respect_max_pages():
+    with run_origin_server({"/persons": PagedRoute()}) as server:
+        pages, requests = await async_fetch_all_pages(
+            url=f"{server.url}/persons",
+            base_query_params={},
+            header_args={},
+            pagination=make_pagination(),
+            max_pages=4,
+        )
+    assert len(pages) == 4
+    assert page_ids(pages) == list(range(4 * PAGE_SIZE))
+
+
+@pytest.mark.asyncio
+async def test_fetcher_limits_pages_per_host():
+    route = PagedRoute()
+    settings = HttpSettings(
+        http_timeout=5,
+        http_max_pages=100,
+        http_max_retries=1,
+        http_retry_backoff=0.0,
+        http_max_concurrent_pages=3,
+    )
+    with run_origin_server({"/persons": route}) as server:
+        fetcher = OriginFetcher(settings=settings, cache=None)
+        try:
+            json_pages = await fetcher.fetch_json_pages_from_source(
+                RestDataSource(url_template=f"{server.url}/persons", pagination=make_pagination()))
+        finally:
+            await fetcher.aclose()
+
+    assert len(json_pages) == 19
+    assert route.peak <= 3
+    origin_data = jason_to_datasets({"Persons": Dataset(api="GetPersons", path="data")}, json_pages)
+    assert [record["id"] for record in origin_data["Persons"]] == list(range(TOTAL))
+
+
+def test_root_pages_are_concatenated():
+    pages = [[{"id": 1}, {"id": 2}], [{"id": 3}]]
+    origin_data = jason_to_datasets({"Persons": Dataset(api="GetPersons", path=".")}, pages)
+    assert origin_data["."] == [{"id": 1}, {"id": 2}, {"id": 3}]
+    # the first page is not modified
+    assert pages[0] == [{"id": 1}, {"id": 2}]
@@ -0,0 +1,91 @@
+import orjson
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.http import httpx_helper
+from asg_runtime.http.httpx_helper import (
+    HttpPagination,
+    PaginationTypeEnum,
+    async_json_pages_from_api,
+    peek_json_value,
+)
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_pipelined_pages")
+
+PAGES = 6
+
+
+def cursor_route(query: dict, headers: dict):
+    page = int(query.get("cursor", 0))
+    body = {"data": [{"id": page}], "meta": {"cursor": str(page + 1) if page + 1 < PAGES else None}}
+    return 200, {"content-type": "application/json"}, orjson.dumps(body)
+
+
+def misleading_route(query: dict, headers: dict):
+    # the only "cursor" key is inside the records, the real cursor is missing
+    body = {"data": [{"id": 0, "cursor": "bogus"}], "meta": {}}
+    return 200, {"content-type": "application/json"}, orjson.dumps(body)
+
+
+@pytest.fixture
+def decode_counter(monkeypatch):
+    calls = []
+    decode = httpx_helper.response_to_json
+
+    def counting_decode(response):
+        calls.append(response)
+        return decode(response)
+
+    monkeypatch.setattr(httpx_helper, "response_to_json", counting_decode)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_are_pipelined_and_decoded_once(decode_counter):
+    pagination = HttpPagination(
+        type=PaginationTypeEnum.CURSOR, pagination_params={"cursor": "meta.cursor"})
+    with run_origin_server({"/persons": cursor_route}) as server:
+        from_api = await async_json_pages_from_api(
+            url=f"{server.url}/persons",
+            header_args={},
+            query_params={},
+            pagination=pagination,
+            max_pages=PAGES + 1,
+        )
+
+    logger.debug(f"from_api={from_api.describe()}")
+    assert [page["data"][0]["id"] for page in from_api.rsp_json_pages] == list(range(PAGES))
+    assert len(decode_counter) == PAGES
+    assert from_api.requests_issued == PAGES
+    assert from_api.pipelined_pages == PAGES - 1
+    assert len(from_api.page_latencies) == PAGES
+    assert all(latency > 0 for latency in from_api.page_latencies)
+
+
+@pytest.mark.asyncio
+async def test_wrong_cursor_guess_is_dropped():
+    pagination = HttpPagination(
+        type=PaginationTypeEnum.CURSOR, pagination_params={"cursor": "meta.cursor"})
+    with run_origin_server({"/persons": misleading_route}) as server:
+        from_api = await async_json_pages_from_api(
+            url=f"{server.url}/persons",
+            header_args={},
+            query_params={},
+            pagination=pagination,
+        )
+
+    assert len(from_api.rsp_json_pages) == 1
+    assert from_api.pipelined_pages == 0
+    # the request issued in advance is accounted for
+    assert from_api.requests_issued == 2
+
+
+def test_peek_json_value():
+    assert peek_json_value(b'{"a": 1, "meta": {"next": "http://x/2"}}', "meta.next") == "http://x/2"
+    assert peek_json_value(b'{"next":null}', "next") is None
+    assert peek_json_value(b'{"cursor": 42}', "cursor") == 42
+    with pytest.raises(LookupError):
+        peek_json_value(b'[{"next": 1}, {"next": 2}]', "next")
+    with pytest.raises(LookupError):
+        peek_json_value(b'{"next": {"page": 2}}', "next")
@@ -0,0 +1,49 @@
+import orjson
+import pytest
+from origin_server import json_route, run_origin_server
+
+from asg_runtime.caches import async_create_cache
+from asg_runtime.http import OriginFetcher
+from asg_runtime.models import (
+    CacheBackends,
+    CacheConfig,
+    CacheConfigLru,
+    Encodings,
+    HttpSettings,
+    RestDataSource,
+)
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5, http_max_pages=5, http_max_retries=1, http_retry_backoff=0.0, **kwargs)
+
+
+async def make_cache():
+    config = CacheConfig(
+        enabled=True, backend=CacheBackends.lru, backend_cfg=CacheConfigLru(lru_max_items=100))
+    return await async_create_cache(config, Encodings.orjson)
+
+
+@pytest.mark.asyncio
+async def test_post_sends_data_arguments():
+    route = json_route([{"id": 1}], {"etag": '"v1"', "cache-control": "max-age=0"})
+    with run_origin_server({"/search": route}) as server:
+        fetcher = OriginFetcher(settings=make_settings(), cache=await make_cache())
+        try:
+            for year in (2020, 2021, 2021):
+                source = RestDataSource(
+                    url_template=f"{server.url}/search", method="POST", data_args={"year": year})
+                assert await fetcher.fetch_json_pages_from_source(source) == [[{"id": 1}]]
+        finally:
+            await fetcher.aclose()
+    assert [orjson.loads(body) for body in server.bodies] == [{"year": 2020}, {"year": 2021}, {"year": 2021}]
+
+
+def test_cache_key_covers_the_body():
+    get = RestDataSource(url_template="/search")
+    post = RestDataSource(url_template="/search", method="POST", data_args={"year": 2020, "city": "Haifa"})
+    same = RestDataSource(url_template="/search", method="POST", data_args={"city": "Haifa", "year": 2020})
+    other = RestDataSource(url_template="/search", method="POST", data_args={"year": 2021})
+    assert post.hash_contents() == same.hash_contents()
+    assert len({get.hash_contents(), post.hash_contents(), other.hash_contents()}) == 3
@@ -0,0 +1,98 @@
+import asyncio
+import email.utils
+import time
+
+import httpx
+import pytest
+from origin_server import json_route, run_origin_server
+
+from asg_runtime.http import OriginFetcher
+from asg_runtime.http.httpx_helper import get_retry_after
+from asg_runtime.http.rate_limiter import HostRateLimiter
+from asg_runtime.models import HttpSettings
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_rate_limiter")
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5,
+        http_max_pages=5,
+        http_max_retries=1,
+        http_retry_backoff=0.0,
+        **kwargs,
+    )
+
+
+def throttled_once_route():
+    calls = []
+
+    def route(query: dict, headers: dict):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return 429, {"retry-after": "1"}, b""
+        return 200, {"content-type": "application/json"}, b"[]"
+
+    return route
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_the_rate():
+    limiter = HostRateLimiter(rate=20, burst=2)
+    start = time.monotonic()
+    waits = [await limiter.acquire() for _ in range(6)]
+    elapsed = time.monotonic() - start
+
+    # the burst goes through at once, the rest at the rate
+    assert waits[:2] == [0, 0]
+    assert elapsed >= 4 / 20 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_all_requests_to_the_host():
+    with run_origin_server({"/persons": throttled_once_route()}) as server:
+        fetcher = OriginFetcher(settings=make_settings(), cache=None)
+        try:
+            throttled = await fetcher.client.get(f"{server.url}/persons")
+            start = time.monotonic()
+            responses = await asyncio.gather(
+                *(fetcher.client.get(f"{server.url}/persons") for _ in range(3)))
+            elapsed = time.monotonic() - start
+        finally:
+            await fetcher.aclose()
+
+    stats = fetcher.get_rest_client_stats()
+    logger.debug(f"stats={stats.describe()}")
+    assert throttled.status_code == 429
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert elapsed >= 0.9
+    assert stats.retry_after_pauses == 1
+    assert stats.throttled_requests == 3
+    assert stats.throttle_wait_time >= 3 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_fetcher_limits_the_rate_per_host():
+    with run_origin_server({"/persons": json_route([])}) as server:
+        fetcher = OriginFetcher(
+            settings=make_settings(http_rate_limit=20.0, http_rate_burst=1), cache=None)
+        try:
+            start = time.monotonic()
+            await asyncio.gather(*(fetcher.client.get(f"{server.url}/persons") for _ in range(5)))
+            elapsed = time.monotonic() - start
+        finally:
+            await fetcher.aclose()
+
+    stats = fetcher.get_rest_client_stats()
+    assert elapsed >= 4 / 20 * 0.9
+    assert stats.throttled_requests == 4
+    assert stats.throttle_wait_time > 0
+
+
+def test_retry_after_formats():
+    assert get_retry_after(httpx.Headers({"retry-after": "2"})) == 2
+    assert get_retry_after(httpx.Headers({})) is None
+    assert get_retry_after(httpx.Headers({"retry-after": "soon"})) is None
+    in_a_minute = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 < get_retry_after(httpx.Headers({"retry-after": in_a_minute})) <= 60
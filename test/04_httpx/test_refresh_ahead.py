@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.caches import async_create_cache
+from asg_runtime.http import OriginFetcher
+from asg_runtime.models import (
+    CacheBackends,
+    CacheConfig,
+    CacheConfigLru,
+    Encodings,
+    HttpSettings,
+    RestDataSource,
+)
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_refresh_ahead")
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5,
+        http_max_pages=5,
+        http_max_retries=1,
+        http_retry_backoff=0.0,
+        **{"http_refresh_ahead": 0.4, "http_refresh_min_hits": 2, **kwargs},
+    )
+
+
+async def make_cache():
+    config = CacheConfig(
+        enabled=True, backend=CacheBackends.lru, backend_cfg=CacheConfigLru(lru_max_items=100))
+    return await async_create_cache(config, Encodings.orjson)
+
+
+class VersionedOrigin:
+    """Fresh for one second, revalidated by the etag of the current version."""
+
+    def __init__(self):
+        self.version = 1
+        self.calls = 0
+
+    def __call__(self, query: dict, headers: dict):
+        self.calls += 1
+        headers = {name.lower(): value for name, value in headers.items()}
+        etag = f'"v{self.version}"'
+        caching = {"etag": etag, "cache-control": "max-age=1"}
+        if headers.get("if-none-match") == etag:
+            return 304, caching, b""
+        body = f'[{{"version": {self.version}}}]'.encode()
+        return 200, {"content-type": "application/json", **caching}, body
+
+
+async def fetch_over(origin: VersionedOrigin, seconds: float, change_at: float | None = None, **kwargs):
+    """Fetch every 0.1s for the given time, returns the results and the stats."""
+    cache = await make_cache()
+    results = []
+    with run_origin_server({"/data": origin}) as server:
+        source = RestDataSource(url_template=f"{server.url}/data")
+        fetcher = OriginFetcher(settings=make_settings(**kwargs), cache=cache)
+        try:
+            for tick in range(int(seconds * 10)):
+                if change_at is not None and tick == int(change_at * 10):
+                    origin.version = 2
+                results.append(await fetcher.fetch_json_pages_from_source(source))
+                await asyncio.sleep(0.1)
+        finally:
+            await fetcher.aclose()
+    return results, fetcher.get_rest_client_stats()
+
+
+@pytest.mark.asyncio
+async def test_hot_entry_refreshed_before_stale():
+    origin = VersionedOrigin()
+    results, stats = await fetch_over(origin, 2.5)
+    logger.debug(f"stats={stats.describe()}")
+    assert stats.refreshes >= 2
+    assert stats.refresh_failures == 0
+    # the requests always found the entry fresh after the first fetch
+    assert stats.fresh_hits == len(results) - 1
+    assert stats.revalidations == stats.refreshes
+    assert origin.calls == 1 + stats.refreshes
+
+
+@pytest.mark.asyncio
+async def test_refresh_picks_up_changed_data():
+    origin = VersionedOrigin()
+    results, stats = await fetch_over(origin, 2.5, change_at=0.3)
+    assert results[-1] == [[{"version": 2}]]
+    assert stats.refreshes_modified == 1
+    assert stats.fresh_hits == len(results) - 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_host_budget():
+    origin = VersionedOrigin()
+    _, stats = await fetch_over(origin, 2.5, http_refresh_host_budget=1)
+    assert stats.refreshes == 1
+    assert stats.refresh_budget_skips > 0
+
+
+@pytest.mark.asyncio
+async def test_cold_entry_not_refreshed():
+    origin = VersionedOrigin()
+    _, stats = await fetch_over(origin, 1.5, http_refresh_min_hits=100)
+    assert stats.refreshes == 0
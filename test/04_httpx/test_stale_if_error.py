@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import orjson
+import pytest
+from origin_server import run_origin_server
+
+from asg_runtime.caches import async_create_cache
+from asg_runtime.http import OriginFetcher, track_stale_sources
+from asg_runtime.models import (
+    CacheBackends,
+    CacheConfig,
+    CacheConfigLru,
+    CachedHeaders,
+    Encodings,
+    HttpSettings,
+    RestDataSource,
+)
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_stale_if_error")
+
+
+def make_settings(**kwargs) -> HttpSettings:
+    return HttpSettings(
+        http_timeout=5, http_max_pages=5, http_max_retries=1, http_retry_backoff=0.0, **kwargs)
+
+
+async def make_cache():
+    config = CacheConfig(
+        enabled=True, backend=CacheBackends.lru, backend_cfg=CacheConfigLru(lru_max_items=100))
+    return await async_create_cache(config, Encodings.orjson)
+
+
+class FlakyOrigin:
+    """Sends the version of its items, stale right away, or fails with the status when set."""
+
+    def __init__(self):
+        self.version = 1
+        self.status = None
+
+    def __call__(self, query: dict, headers: dict):
+        if self.status:
+            return self.status, {}, b""
+        return 200, {"content-type": "application/json", "cache-control": "max-age=0"}, \
+            orjson.dumps([{"version": self.version}])
+
+
+@pytest.mark.asyncio
+async def test_stale_data_served_and_revalidated_in_background():
+    origin = FlakyOrigin()
+    cache = await make_cache()
+    with run_origin_server({"/items": origin}) as server:
+        source = RestDataSource(url_template=f"{server.url}/items")
+        fetcher = OriginFetcher(settings=make_settings(http_stale_if_error=60), cache=cache)
+        try:
+            first = await fetcher.fetch_json_pages_from_source(source)
+            origin.status = 503
+            stale = track_stale_sources()
+            failed = await fetcher.fetch_json_pages_from_source(source)
+            assert stale == [f"{server.url}/items"]
+
+            # the next request does not wait for the origin, it is revalidated in the background
+            origin.status, origin.version = None, 2
+            requests = len(server.requests)
+            served = await fetcher.fetch_json_pages_from_source(source)
+            assert len(server.requests) == requests
+            await asyncio.gather(*fetcher.stale_revalidations.values())
+            stale = track_stale_sources()
+            revalidated = await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+    stats = fetcher.get_rest_client_stats()
+    logger.debug(f"stats={stats.describe()}")
+    assert first == failed == served == [[{"version": 1}]]
+    assert revalidated == [[{"version": 2}]]
+    assert stale == []
+    assert stats.stale_if_error == 2
+    assert stats.stale_revalidations == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_past_the_window():
+    origin = FlakyOrigin()
+    cache = await make_cache()
+    with run_origin_server({"/items": origin}) as server:
+        source = RestDataSource(url_template=f"{server.url}/items")
+        fetcher = OriginFetcher(settings=make_settings(http_stale_if_error=0.2), cache=cache)
+        try:
+            await fetcher.fetch_json_pages_from_source(source)
+            origin.status = 500
+            await asyncio.sleep(0.3)
+            with pytest.raises(RuntimeError):
+                await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+    assert fetcher.get_rest_client_stats().stale_if_error == 0
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_served_stale():
+    origin = FlakyOrigin()
+    cache = await make_cache()
+    with run_origin_server({"/items": origin}) as server:
+        source = RestDataSource(url_template=f"{server.url}/items")
+        fetcher = OriginFetcher(settings=make_settings(http_stale_if_error=60), cache=cache)
+        try:
+            await fetcher.fetch_json_pages_from_source(source)
+            origin.status = 404
+            with pytest.raises(RuntimeError):
+                await fetcher.fetch_json_pages_from_source(source)
+        finally:
+            await fetcher.aclose()
+
+
+def test_stale_usable_past_expiry():
+    headers = CachedHeaders(max_age=10, fetched_at=time.time() - 15)
+    assert headers.is_stale_usable(10)
+    assert not headers.is_stale_usable(3)
+    assert not headers.is_stale_usable(0)
+    # the default freshness lifetime of origins not sending one
+    assert CachedHeaders(fetched_at=time.time() - 15).is_stale_usable(10, default_max_age=10)
@@ -0,0 +1,159 @@
+from pathlib import Path
+
+import orjson
+import pytest
+
+from asg_runtime.gin import (
+    apply_transformations_json,
+    apply_transformations_json_chunked,
+    is_row_local,
+)
+from asg_runtime.gin.common.con_spec.spec_helper_models import ProcessDataSet
+from asg_runtime.models import Encodings
+from asg_runtime.serializers import Serializer, SpooledJsonWriter
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_chunked_transform")
+
+TRANSFORMS_PATH = Path(__file__).parent.parent / "transforms"
+
+records = [
+    {"person_id": i, "year_of_birth": 1940 + i % 60, "care_site_id": 600 + i % 7}
+    for i in range(1000)
+]
+
+row_local_export = ProcessDataSet(
+    dataframe=".",
+    fields={
+        "person_ID": [
+            {"function": "map_field", "params": {"source": "person_id", "target": "person_ID"}}
+        ],
+        "birth_year": [
+            {"function": "filter_by_year", "params": {"year_col": "year_of_birth", "input_year": 1970}},
+            {"function": "map_field", "params": {"source": "year_of_birth", "target": "birth_year"}},
+        ],
+        "site": [
+            {"function": "pd.DataFrame.eval", "params": {"expr": "site = care_site_id * 10"}}
+        ],
+    },
+)
+
+global_export = ProcessDataSet(
+    dataframe=".",
+    fields={
+        "first": [{"function": "pd.DataFrame.head", "params": {"n": 3}}],
+    },
+)
+
+
+def test_is_row_local():
+    assert is_row_local(row_local_export, TRANSFORMS_PATH)
+    assert not is_row_local(global_export, TRANSFORMS_PATH)
+
+
+@pytest.mark.parametrize("function,params,row_local", [
+    ("dropna", {}, True),
+    ("dropna", {"axis": 1}, False),
+    ("fillna", {"value": 0}, True),
+    ("fillna", {"value": 0, "limit": 1}, False),
+    ("fillna", {"method": "ffill"}, False),
+    ("filter", {"like": "year"}, True),
+    ("filter", {"items": [0, 1], "axis": 0}, False),
+])
+def test_is_row_local_depends_on_params(function, params, row_local):
+    export = ProcessDataSet(
+        dataframe=".",
+        fields={"x": [{"function": f"pd.DataFrame.{function}", "params": params}]},
+    )
+    assert is_row_local(export, TRANSFORMS_PATH) == row_local
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 100, 5000])
+def test_chunks_match_whole(chunk_rows):
+    whole = apply_transformations_json(records, row_local_export, TRANSFORMS_PATH)
+    chunks = list(
+        apply_transformations_json_chunked(
+            records, row_local_export, TRANSFORMS_PATH, chunk_rows=chunk_rows
+        )
+    )
+    assert len(chunks) == -(-len(records) // chunk_rows)
+    assert [r for chunk in chunks for r in chunk] == whole
+
+
+mixed_records = [
+    {
+        "id": i,
+        # an int column with one null, inferred as float when normalized at once
+        "score": None if i == 5 else i,
+        # ints and strings mix into an object column
+        "code": "x" if i == 8 else i,
+        # a string column missing from some records
+        **({"name": f"n{i}"} if i % 3 else {}),
+    }
+    for i in range(10)
+]
+
+mixed_export = ProcessDataSet(
+    dataframe=".",
+    fields={
+        field: [{"function": "map_field", "params": {"source": field, "target": field}}]
+        for field in ("id", "score", "code", "name")
+    },
+)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 3, 7])
+def test_chunks_match_whole_with_nulls_and_mixed_types(chunk_rows):
+    whole = apply_transformations_json(mixed_records, mixed_export, TRANSFORMS_PATH)
+    chunks = apply_transformations_json_chunked(
+        mixed_records, mixed_export, TRANSFORMS_PATH, chunk_rows=chunk_rows)
+    chunked = [r for chunk in chunks for r in chunk]
+    # compared through json, the way the response encodes them
+    assert orjson.dumps(chunked) == orjson.dumps(whole)
+
+
+def test_memory_budget_shrinks_chunks():
+    chunks = list(
+        apply_transformations_json_chunked(
+            records, row_local_export, TRANSFORMS_PATH, chunk_rows=500, memory_budget=20000
+        )
+    )
+    logger.debug(f"got {len(chunks)} chunks")
+    assert len(chunks) > 2
+
+
+@pytest.mark.parametrize("max_size", [10, 1024 * 1024])
+def test_spooled_writer_matches_orjson(tmp_path, max_size):
+    serializer = Serializer.create(Encodings.orjson)
+    data = {"A": records[:10], "B": [], "C": records[10:25]}
+
+    with SpooledJsonWriter(serializer, max_size=max_size, spill_dir=tmp_path) as writer:
+        for name, dataset in data.items():
+            writer.begin_dataset(name)
+            writer.write_records(dataset[:4])
+            writer.write_records(dataset[4:])
+            writer.end_dataset()
+        assert writer.spilled == (max_size == 10)
+        encoded = writer.getvalue()
+
+    assert encoded == orjson.dumps(data)
+
+
+def test_spilled_writer_streams_blocks(tmp_path):
+    serializer = Serializer.create(Encodings.orjson)
+    writer = SpooledJsonWriter(serializer, max_size=100, spill_dir=tmp_path)
+    writer.begin_dataset("A")
+    writer.write_records(records[:50])
+    writer.end_dataset()
+    assert writer.spilled
+
+    blocks = list(writer.iter_blocks(block_size=256))
+    assert max(map(len, blocks)) == 256
+    assert b"".join(blocks) == orjson.dumps({"A": records[:50]})
+    # closed once read, the spilled file is gone
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spooled_writer_requires_json():
+    with pytest.raises(ValueError):
+        SpooledJsonWriter(Serializer.create(Encodings.pickle), max_size=100)
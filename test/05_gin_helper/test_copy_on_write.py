@@ -0,0 +1,98 @@
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from asg_runtime.gin.common.con_spec.spec_helper_models import TransformFunction
+from asg_runtime.gin.executor.transform.transform_exec import _apply_transformations
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_copy_on_write")
+
+TRANSFORMS_PATH = Path(__file__).parent.parent / "transforms"
+
+
+def make_df(rows: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "person_id": np.arange(rows),
+            "year_of_birth": 1940 + np.arange(rows) % 60,
+            "month_of_birth": 1 + np.arange(rows) % 12,
+            "day_of_birth": 1 + np.arange(rows) % 28,
+            "weight": np.arange(rows) * 0.5,
+            "name": [f"name{i}" for i in range(rows)],
+        }
+    )
+
+
+pipelines = {
+    "map_field": [{"function": "map_field", "params": {"source": "person_id", "target": "out"}}],
+    "multiply_by_value": [
+        {"function": "multiply_by_value", "params": {"column": "weight", "value": 2, "output": "out"}}
+    ],
+    "substract_columns": [
+        {"function": "substract_columns", "params": {"from_col": "weight", "other_col": "person_id", "output": "out"}}
+    ],
+    "concatenate_fields": [
+        {"function": "concatenate_fields", "params": {"col1": "name", "col2": "person_id", "output": "out"}}
+    ],
+    "operator": [
+        {"function": "operator", "params": {"operator": "add", "col1": "weight", "col2": "person_id", "output": "out"}}
+    ],
+    "pandas_eval": [{"function": "pd.DataFrame.eval", "params": {"expr": "out = weight * 3"}}],
+    "user_filter": [
+        {"function": "filter_by_year", "params": {"year_col": "year_of_birth", "input_year": 1970}},
+        {"function": "map_field", "params": {"source": "name", "target": "out"}},
+    ],
+    "user_age": [{"function": "persons_above_age", "params": {"age": 60, "target": "out"}}],
+}
+
+
+@pytest.mark.parametrize("name", pipelines)
+def test_pipeline_does_not_mutate_input(name):
+    df = make_df(100)
+    expected = df.copy(deep=True)
+    transforms = [TransformFunction(**t) for t in pipelines[name]]
+
+    result = _apply_transformations(df, transforms, "out", TRANSFORMS_PATH)
+
+    assert len(result) > 0
+    assert "out" not in df.columns
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_mapped_column_shares_input_data():
+    df = make_df(1000)
+    transforms = [TransformFunction(**t) for t in pipelines["map_field"]]
+    result = _apply_transformations(df, transforms, "out")
+    assert np.shares_memory(result.to_numpy(), df["person_id"].to_numpy())
+
+
+def test_benchmark_copy_free_pipeline():
+    """The pipeline allocates its output column only, not copies of the input frame."""
+    df = make_df(200_000).drop(columns=["name"])
+    frame_size = int(df.memory_usage(index=False).sum())
+    column_size = df["weight"].nbytes
+    transforms = [
+        TransformFunction(**t)
+        for t in pipelines["map_field"] + pipelines["multiply_by_value"]
+    ]
+
+    def peak_allocation(input_df) -> int:
+        tracemalloc.start()
+        try:
+            _apply_transformations(input_df, transforms, "out")
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    copy_free = peak_allocation(df)
+    # what a defensively copying function would pay on top
+    defensive = peak_allocation(df.copy(deep=True)) + frame_size
+    logger.info(
+        f"frame_size={frame_size}, peak allocation copy_free={copy_free}, defensive={defensive}"
+    )
+    assert copy_free < 2 * column_size
+    assert copy_free < defensive / 2
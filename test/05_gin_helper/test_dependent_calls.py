@@ -0,0 +1,186 @@
+import asyncio
+import copy
+import logging
+from pathlib import Path
+
+import httpx
+import numpy as np
+import orjson
+import pytest
+
+from asg_runtime.gin import ArgumentRecords, SchemaHints, normalize_json
+from asg_runtime.gin_helper import GinHelper
+from asg_runtime.http import OriginFetcher
+from asg_runtime.models import HttpSettings
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_dependent_calls")
+
+TRANSFORMS_PATH = Path(__file__).parent.parent / "transforms"
+NUM_PERSONS = 30
+
+persons = [{"person_id": i, "name": f"p{i}"} for i in range(NUM_PERSONS)]
+
+base_spec = {
+    "apiVersion": "connector/v1",
+    "kind": "connector/v1",
+    "metadata": {"name": "TBD", "description": "TBD", "inputPrompt": "TBD"},
+    "spec": {
+        "timeout": 10,
+        "apiCalls": {
+            "GetPersons": {
+                "type": "url",
+                "endpoint": "/persons",
+                "method": "get",
+                "arguments": [],
+            },
+            "GetVisits": {
+                "type": "url",
+                "endpoint": "/visits/{person_id}",
+                "method": "get",
+                "arguments": [
+                    {
+                        "name": "person_id",
+                        "argLocation": "parameter",
+                        "type": "integer",
+                        "source": "reference",
+                        "value": {"api": "GetPersons", "path": ".person_id"},
+                    }
+                ],
+            },
+        },
+        "output": {
+            "execution": "",
+            "runtimeType": "python",
+            "data": {"Visit": {"api": "GetVisits", "metadata": [], "path": "."}},
+            "exports": {},
+        },
+    },
+    "servers": [{"url": "http://origin.example.com/"}],
+}
+
+
+class VisitsOrigin:
+    """Two visits per person, tracking the concurrent requests."""
+
+    def __init__(self):
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request.url.path)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if request.url.path == "/persons":
+                return httpx.Response(200, json=persons)
+            person_id = int(request.url.path.rsplit("/", 1)[1])
+            return httpx.Response(
+                200, json=[{"visit_id": person_id * 10 + n, "days": n} for n in range(2)])
+        finally:
+            self.active -= 1
+
+
+def make_fetcher(origin: VisitsOrigin, **kwargs) -> OriginFetcher:
+    settings = HttpSettings(http_timeout=5, http_max_pages=5, http_max_retries=1,
+        http_retry_backoff=0.0, **kwargs)
+    fetcher = OriginFetcher(settings=settings, cache=None)
+    fetcher.client = httpx.AsyncClient(transport=httpx.MockTransport(origin))
+    return fetcher
+
+
+async def get_origin_data(origin: VisitsOrigin, max_dependent_calls: int = 1000, **kwargs):
+    helper = GinHelper(
+        orjson.dumps(base_spec).decode(), TRANSFORMS_PATH, max_dependent_calls=max_dependent_calls)
+    fetcher = make_fetcher(origin, **kwargs)
+    try:
+        return await helper.get_data_from_sources(helper.get_origin_sources(), fetcher)
+    finally:
+        await fetcher.aclose()
+
+
+def test_collect_dependent_call():
+    helper = GinHelper(orjson.dumps(base_spec).decode(), TRANSFORMS_PATH)
+    sources = {source.api_name: source for source in helper.get_origin_sources()}
+    assert not sources["GetPersons"].is_output
+    assert sources["GetVisits"].references == {
+        "person_id": {
+            "api": "GetPersons", "path": "", "field_name": "person_id", "location": "parameter",
+        }
+    }
+
+
+@pytest.mark.asyncio
+async def test_all_reference_values_fetched():
+    origin = VisitsOrigin()
+    origin_data = await get_origin_data(origin)
+
+    assert list(origin_data) == ["."]
+    visits = normalize_json(origin_data["."])
+    # beyond the 21 calls of the former fixed limit
+    assert len(visits) == 2 * NUM_PERSONS
+    assert list(visits.columns) == ["visit_id", "days", "argument-person_id"]
+    assert (visits["visit_id"] // 10 == visits["argument-person_id"]).all()
+    assert origin.requests.count("/persons") == 1
+    assert len(origin.requests) == 1 + NUM_PERSONS
+
+
+@pytest.mark.asyncio
+async def test_dependent_calls_bounded_concurrency():
+    origin = VisitsOrigin()
+    await get_origin_data(origin, http_max_concurrent_sources=4, http_max_concurrent_pages=8)
+    assert 1 < origin.max_active <= 4
+
+
+@pytest.mark.asyncio
+async def test_dependent_calls_limit(caplog):
+    origin = VisitsOrigin()
+    with caplog.at_level(logging.WARNING):
+        origin_data = await get_origin_data(origin, max_dependent_calls=5)
+    assert origin_data["."].arguments["argument-person_id"].tolist() == [0, 0, 1, 1, 2, 2, 3, 3, 4, 4]
+    assert len(origin.requests) == 1 + 5
+    assert any("first 5" in record.message for record in caplog.records)
+
+
+def test_dependent_result_transforms():
+    spec = copy.deepcopy(base_spec)
+    spec["spec"]["output"]["exports"] = {
+        "Visit": {
+            "dataframe": ".",
+            "fields": {
+                "visit_ID": [
+                    {"function": "map_field", "params": {"source": "visit_id", "target": "visit_ID"}},
+                ],
+            },
+        }
+    }
+    helper = GinHelper(orjson.dumps(spec).decode(), TRANSFORMS_PATH)
+    origin_data = {
+        ".": ArgumentRecords(
+            [{"visit_id": 1}, {"visit_id": 2}], {"argument-person_id": np.array([0, 0])}),
+    }
+    assert helper.apply_transforms(origin_data) == {"Visit": [{"visit_ID": 1}, {"visit_ID": 2}]}
+
+
+def test_argument_records_normalized_with_schema_hints():
+    records = ArgumentRecords(
+        [{"visit_id": n, "days": n % 2} for n in range(4)],
+        {"argument-person_id": np.array([0, 0, 1, 1])})
+    hints = SchemaHints()
+    normalize_json(records, hints, "visits")
+    df = normalize_json(records[2:], hints, "visits")
+    assert hints.get_stats().fast_normalizations == 1
+    assert df.to_dict("records") == [
+        {"visit_id": 2, "days": 0, "argument-person_id": 1},
+        {"visit_id": 3, "days": 1, "argument-person_id": 1},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_legacy_fetch_rejects_references():
+    helper = GinHelper(orjson.dumps(base_spec).decode(), TRANSFORMS_PATH)
+    # rejected before fetching GetPersons from the unreachable origin
+    with pytest.raises(ValueError, match="GetVisits.*origin fetcher"):
+        await helper.get_data_from_sources(helper.get_origin_sources(), None)
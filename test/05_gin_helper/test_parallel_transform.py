@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from asg_runtime.gin import (
+    SchemaHints,
+    apply_transformations_json,
+    apply_transformations_json_parallel,
+)
+from asg_runtime.gin.common.con_spec.spec_helper_models import ProcessDataSet
+from asg_runtime.models import TransformStats
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_parallel_transform")
+
+TRANSFORMS_PATH = Path(__file__).parent.parent / "transforms"
+
+persons = [
+    {"person_id": i, "year_of_birth": 1940 + i % 60, "care_site_id": 600 + i % 7}
+    for i in range(500)
+]
+sites = [{"site_id": 600 + i, "beds": 10 * i} for i in range(7)]
+
+origin_data = {".": persons, "Sites": sites}
+
+exports = {
+    "Born1970": ProcessDataSet(
+        dataframe=".",
+        fields={
+            "person_ID": [
+                {"function": "filter_by_year", "params": {"year_col": "year_of_birth", "input_year": 1970}},
+                {"function": "map_field", "params": {"source": "person_id", "target": "person_ID"}},
+            ],
+        },
+    ),
+    "Sites": ProcessDataSet(
+        dataframe="Sites",
+        fields={
+            "site": [{"function": "map_field", "params": {"source": "site_id", "target": "site"}}],
+            "double_beds": [
+                {"function": "multiply_by_value", "params": {"column": "beds", "value": 2, "output": "double_beds"}}
+            ],
+        },
+    ),
+    "Persons": ProcessDataSet(
+        dataframe=".",
+        fields={
+            "person_ID": [{"function": "map_field", "params": {"source": "person_id", "target": "person_ID"}}],
+            "site": [{"function": "pd.DataFrame.eval", "params": {"expr": "site = care_site_id * 10"}}],
+        },
+    ),
+}
+
+
+def sequential() -> dict:
+    return {
+        name: apply_transformations_json(origin_data[pds.dataframe], pds, TRANSFORMS_PATH)
+        for name, pds in exports.items()
+    }
+
+
+def test_parallel_matches_sequential():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results, export_times = apply_transformations_json_parallel(
+            origin_data, exports, pool, TRANSFORMS_PATH)
+
+    assert results == sequential()
+    assert list(results) == list(exports)
+    assert list(export_times) == list(exports)
+    assert all(t >= 0 for t in export_times.values())
+
+
+def test_single_worker_does_not_deadlock():
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        results, _ = apply_transformations_json_parallel(origin_data, exports, pool, TRANSFORMS_PATH)
+    assert results == sequential()
+
+
+def test_parallel_with_schema_hints():
+    hints = SchemaHints()
+    keys = {".": "persons", "Sites": "sites"}
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for _ in range(2):
+            results, _ = apply_transformations_json_parallel(
+                origin_data, exports, pool, TRANSFORMS_PATH, hints, keys)
+            assert results == sequential()
+    # every origin dataset is normalized once per call
+    assert hints.stats.full_normalizations == 2
+    assert hints.stats.fast_normalizations == 2
+
+
+def test_transform_stats():
+    stats = TransformStats()
+    stats.update({"A": 0.5, "B": 0.25}, transform_time=0.5, parallel=True)
+    stats.update({"A": 0.5}, transform_time=0.5, parallel=False)
+    assert stats.transforms == 2
+    assert stats.parallel_transforms == 1
+    assert stats.exports == 3
+    assert stats.export_time == 1.25
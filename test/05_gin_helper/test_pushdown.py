@@ -0,0 +1,160 @@
+import copy
+from pathlib import Path
+
+import orjson
+
+from asg_runtime.gin.common.con_spec.spec_helper_models import Pushdown, TransformFunction
+from asg_runtime.gin_helper import GinHelper
+from asg_runtime.pushdown import plan_pushdown
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_pushdown")
+
+TRANSFORMS_PATH = Path(__file__).parent.parent / "transforms"
+
+records = [
+    {"person_id": i, "year_of_birth": 1940 + i % 60, "care_site_id": 600 + i % 7, "note": "x"}
+    for i in range(100)
+]
+
+pushdown = {
+    "projectionParam": "fields",
+    "filters": {"filter_by_year": {"{year_col}": "{input_year}"}},
+}
+
+year_filter = {
+    "function": "filter_by_year",
+    "params": {"year_col": "year_of_birth", "input_year": 1970},
+}
+
+base_spec = {
+    "apiVersion": "connector/v1",
+    "kind": "connector/v1",
+    "metadata": {"name": "TBD", "description": "TBD", "inputPrompt": "TBD"},
+    "spec": {
+        "timeout": 10,
+        "apiCalls": {
+            "GetPersons": {
+                "type": "url",
+                "endpoint": "/persons",
+                "method": "get",
+                "arguments": [],
+                "pushdown": pushdown,
+            }
+        },
+        "output": {
+            "execution": "",
+            "runtimeType": "python",
+            "data": {"Person": {"api": "GetPersons", "metadata": [], "path": "."}},
+            "exports": {
+                "Person": {
+                    "dataframe": ".",
+                    "fields": {
+                        "person_ID": [
+                            year_filter,
+                            {"function": "map_field", "params": {"source": "person_id", "target": "person_ID"}},
+                        ],
+                        "site": [
+                            year_filter,
+                            {"function": "map_field", "params": {"source": "care_site_id", "target": "site"}},
+                        ],
+                    },
+                }
+            },
+        },
+    },
+    "servers": [{"url": "http://origin.example.com/"}],
+}
+
+
+def make_helper(spec: dict) -> GinHelper:
+    return GinHelper(orjson.dumps(spec).decode(), TRANSFORMS_PATH)
+
+
+def test_plan_filters_and_projection():
+    pipelines = [
+        ("person_ID", [TransformFunction(**year_filter), TransformFunction(function="map_field", params={"source": "person_id", "target": "person_ID"})]),
+        ("birth_year", [TransformFunction(**year_filter)]),
+    ]
+    plan = plan_pushdown(Pushdown(**pushdown), pipelines)
+    assert plan.filters == 1
+    assert plan.projection == ["birth_year", "person_id"]
+    assert plan.query_params == {"year_of_birth": "1970", "fields": "birth_year,person_id"}
+
+
+def test_plan_skips_filter_not_leading_all_pipelines():
+    pipelines = [
+        ("person_ID", [TransformFunction(**year_filter)]),
+        ("site", [TransformFunction(function="map_field", params={"source": "care_site_id", "target": "site"})]),
+    ]
+    plan = plan_pushdown(Pushdown(**pushdown), pipelines)
+    assert plan.filters == 0
+    assert "year_of_birth" not in plan.query_params
+
+
+def test_plan_no_projection_for_unknown_functions():
+    pipelines = [("first", [TransformFunction(function="pd.DataFrame.head", params={"n": 3})])]
+    plan = plan_pushdown(Pushdown(**pushdown), pipelines)
+    assert plan.projection is None
+    assert plan.query_params == {}
+
+
+def test_plan_respects_reserved_params():
+    pipelines = [("person_ID", [TransformFunction(**year_filter)])]
+    plan = plan_pushdown(Pushdown(**pushdown), pipelines, reserved_params={"year_of_birth", "fields"})
+    assert plan.filters == 0
+    assert plan.query_params == {}
+
+
+def test_helper_pushes_down_and_rewrites_pipelines():
+    helper = make_helper(base_spec)
+    sources = helper.get_origin_sources()
+    assert len(sources) == 1
+    assert sources[0].param_args == {
+        "year_of_birth": "1970",
+        "fields": "care_site_id,person_id",
+    }
+
+    # the origin already applied the filter and the projection
+    origin_records = [
+        {"person_id": r["person_id"], "care_site_id": r["care_site_id"]}
+        for r in records
+        if r["year_of_birth"] == 1970
+    ]
+    pushed = helper.apply_transforms({".": origin_records})
+
+    local = make_helper(_without_pushdown(base_spec)).apply_transforms({".": records})
+    assert pushed == local
+
+
+def test_helper_without_pushdown_keeps_pipelines():
+    helper = make_helper(_without_pushdown(base_spec))
+    assert helper.get_origin_sources()[0].param_args == {}
+    fields = helper.con_spec.spec.output.exports["Person"].fields
+    assert all(pipeline[0].function == "filter_by_year" for pipeline in fields.values())
+
+
+def test_helper_skips_referenced_apis():
+    spec = copy.deepcopy(base_spec)
+    spec["spec"]["apiCalls"]["GetVisits"] = {
+        "type": "url",
+        "endpoint": "/visits",
+        "method": "get",
+        "arguments": [
+            {
+                "name": "person",
+                "argLocation": "parameter",
+                "source": "reference",
+                "type": "string",
+                "value": {"api": "GetPersons", "path": "..person_id"},
+            }
+        ],
+    }
+    helper = make_helper(spec)
+    assert not helper._get_pushdown_params("GetPersons")
+
+
+def _without_pushdown(spec: dict) -> dict:
+    spec = copy.deepcopy(spec)
+    del spec["spec"]["apiCalls"]["GetPersons"]["pushdown"]
+    return spec
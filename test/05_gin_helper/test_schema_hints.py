@@ -0,0 +1,170 @@
+from pathlib import Path
+
+import orjson
+import pandas as pd
+
+from asg_runtime.gin import SchemaHints
+from asg_runtime.gin.executor.transform import schema_hints
+from asg_runtime.gin_helper import GinHelper
+from asg_runtime.utils import get_logger
+
+logger = get_logger("test_schema_hints")
+
+KEY = "http://origin/persons#."
+TRANSFORMS_PATH = Path(__file__).parent.parent / "transforms"
+
+
+def make_records(count: int, offset: int = 0) -> list[dict]:
+    return [
+        {
+            "person_id": offset + i,
+            "year_of_birth": 1950 + i,
+            "score": 0.5 * i,
+            "name": f"name-{i}",
+            "location": {"city": f"city-{i}", "zip": 1000 + i},
+        }
+        for i in range(count)
+    ]
+
+
+def test_learn_then_fast_path():
+    hints = SchemaHints()
+    first = hints.normalize(make_records(5), KEY)
+    assert hints.get(KEY) is not None
+    assert hints.get_stats().full_normalizations == 1
+    assert hints.get_stats().schemas_learned == 1
+
+    records = make_records(7, offset=100)
+    fast = hints.normalize(records, KEY)
+    logger.debug(f"fast path dtypes={fast.dtypes.to_dict()}")
+    assert hints.get_stats().fast_normalizations == 1
+    assert list(fast.columns) == list(first.columns)
+    pd.testing.assert_frame_equal(fast, pd.json_normalize(records))
+
+
+def test_fallback_on_mismatch():
+    hints = SchemaHints()
+    hints.normalize(make_records(3), KEY)
+
+    extra_key = make_records(3)
+    extra_key[1]["extra"] = "surprise"
+    df = hints.normalize(extra_key, KEY)
+    assert "extra" in df.columns
+    assert hints.get_stats().fallbacks == 1
+
+    # records of different shapes can not be hinted, the stale schema is dropped
+    assert hints.get(KEY) is None
+
+    more_keys = make_records(3)
+    for record in more_keys:
+        record["extra"] = "surprise"
+    hints.normalize(more_keys, KEY)
+    assert "extra" in hints.get(KEY).columns
+
+
+def test_fallback_on_dtype_mismatch():
+    hints = SchemaHints()
+    hints.normalize(make_records(3), KEY)
+
+    records = make_records(3)
+    records[2]["person_id"] = 2.5
+    df = hints.normalize(records, KEY)
+    assert hints.get_stats().fallbacks == 1
+    pd.testing.assert_frame_equal(df, pd.json_normalize(records))
+
+
+def test_nulls_in_float_column():
+    hints = SchemaHints()
+    hints.normalize(make_records(3), KEY)
+
+    records = make_records(3)
+    records[0]["score"] = None
+    df = hints.normalize(records, KEY)
+    assert hints.get_stats().fast_normalizations == 1
+    pd.testing.assert_frame_equal(df, pd.json_normalize(records))
+
+
+def test_persisted_hints(tmp_path):
+    path = tmp_path / "hints.json"
+    hints = SchemaHints(path=path)
+    hints.normalize(make_records(3), KEY)
+    assert path.is_file()
+
+    reloaded = SchemaHints(path=path)
+    assert reloaded.get(KEY) == hints.get(KEY)
+    reloaded.normalize(make_records(3), KEY)
+    assert reloaded.get_stats().fast_normalizations == 1
+
+
+def test_only_changed_hints_saved(tmp_path, monkeypatch):
+    path = tmp_path / "hints.json"
+    hints = SchemaHints(path=path)
+    records = make_records(3)
+    hints.normalize(records, KEY)
+    path.unlink()
+
+    # relearning the same schema does not write the file
+    monkeypatch.setattr(schema_hints, "SAVE_INTERVAL", 0.0)
+    hints.learn(KEY, records, pd.json_normalize(records))
+    assert not path.exists()
+    assert hints.get_stats().schemas_learned == 1
+
+    # a changed schema within the save interval is saved at shutdown
+    monkeypatch.setattr(schema_hints, "SAVE_INTERVAL", 60.0)
+    records[2]["person_id"] = 2.5
+    hints.normalize(records, KEY)
+    assert not path.exists()
+    hints.save()
+    assert SchemaHints(path=path).get(KEY).dtypes["person_id"] == "float64"
+
+
+def test_fallback_on_equal_length_lists():
+    hints = SchemaHints()
+    hints.normalize([{"id": 1, "tags": 2}, {"id": 2, "tags": 3}], KEY)
+
+    records = [{"id": 1, "tags": [1, 2]}, {"id": 2, "tags": [3, 4]}]
+    df = hints.normalize(records, KEY)
+    assert hints.get_stats().fallbacks == 1
+    assert df["tags"].tolist() == [[1, 2], [3, 4]]
+
+
+def make_spec(params: dict, servers: list[str]) -> str:
+    return orjson.dumps({
+        "apiVersion": "connector/v1",
+        "kind": "connector/v1",
+        "metadata": {"name": "TBD", "description": "TBD", "inputPrompt": "TBD"},
+        "spec": {
+            "timeout": 10,
+            "apiCalls": {
+                "GetPersons": {
+                    "type": "url",
+                    "endpoint": "/persons",
+                    "method": "get",
+                    "arguments": [
+                        {
+                            "name": name, "argLocation": "parameter", "type": "string",
+                            "source": "constant", "value": value,
+                        }
+                        for name, value in params.items()
+                    ],
+                },
+            },
+            "output": {
+                "execution": "",
+                "runtimeType": "python",
+                "data": {"Person": {"api": "GetPersons", "metadata": [], "path": "."}},
+                "exports": {},
+            },
+        },
+        "servers": [{"url": url} for url in servers],
+    }).decode()
+
+
+def test_dataset_key_by_call_arguments():
+    def key(params: dict, servers: list[str]) -> str:
+        return GinHelper(make_spec(params, servers), TRANSFORMS_PATH).get_dataset_key(".")
+
+    servers = ["http://a.example.com/", "http://b.example.com/"]
+    assert key({"fields": "id,name"}, servers) == key({"fields": "id,name"}, servers[::-1])
+    assert key({"fields": "id,name"}, servers) != key({"fields": "id"}, servers)
+    assert key({"fields": "id"}, servers).endswith("#.")
@@ -1,6 +1,7 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from starlette.status import HTTP_200_OK
 
 from asg_runtime import Executor
@@ -61,10 +62,18 @@ async def get_endpoint_data(request: Request, endpoint_spec: str) -> Response:
     try:
         result = await executor.async_get_endpoint_data(endpoint_spec)
 
+        if result.get("status") == "ok" and not isinstance(result["data"], bytes | str):
+            # spilled to disk, streamed in blocks
+            return StreamingResponse(
+                result["data"],
+                media_type="application/json",
+                headers={"Warning": '110 - "Response is Stale"'} if result.get("stale") else None,
+                status_code=HTTP_200_OK)
         if result.get("status") == "ok":
             return Response(
                 content=result["data"], 
                 media_type="application/json",
+                headers={"Warning": '110 - "Response is Stale"'} if result.get("stale") else None,
                 status_code=HTTP_200_OK)
         
         # "status" is is not "ok" - return error
@@ -1,7 +1,7 @@
 import datetime
 import logging
 
-from asg_runtime import make_tool
+from asg_runtime import make_tool, row_local
 
 logger = logging.getLogger("med_trans")
 
@@ -16,6 +16,7 @@ def calculate_age(row):
     return age
 
 
+@row_local
 @make_tool
 def persons_above_age(df, age, target):
     """
@@ -31,7 +32,7 @@ def persons_above_age(df, age, target):
         DataFrame: A filtered DataFrame with rows where the age is bigger than input_age.
     """
     logger.debug(f"persons_above_age - enter for age={age}, target={target}")
-    df[target] = df.apply(calculate_age, axis=1)
+    df = df.assign(**{target: df.apply(calculate_age, axis=1)})
     df = df[df[target] >= age]
     # logger.debug(f"persons_above_age - return {df}")
     return df
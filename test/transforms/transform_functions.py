@@ -1,6 +1,7 @@
-from asg_runtime import make_tool
+from asg_runtime import make_tool, row_local
 
 
+@row_local
 @make_tool
 def map_field(df, source, target):
     """
@@ -13,10 +14,10 @@ def map_field(df, source, target):
     Returns:
         df after mapping the source to target
     """
-    df[target] = df[source]
-    return df
+    return df.assign(**{target: df[source]})
 
 
+@row_local
 @make_tool
 def concatenate_fields(df, col1, col2, output):
     """
@@ -31,10 +32,10 @@ def concatenate_fields(df, col1, col2, output):
         df with new output column of the concatenation of col1 and col2
     """
     # Convert the columns to strings and concatenate their values
-    df[output] = df[col1].astype(str) + df[col2].astype(str)
-    return df
+    return df.assign(**{output: df[col1].astype(str) + df[col2].astype(str)})
 
 
+@row_local
 @make_tool
 def filter_by_year(df, year_col, input_year):
     """
@@ -51,6 +52,7 @@ def filter_by_year(df, year_col, input_year):
     return df[df[year_col] == input_year]
 
 
+@row_local
 @make_tool
 def filter_by_quarter(df, month_col, quarter):
     """